@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
 from datetime import timedelta
-import functools
 import logging
 
 from django.utils import timezone
@@ -26,6 +25,7 @@ from sentry.api.helpers.group_index import rate_limit_endpoint
 from sentry.plugins.base import plugins
 from sentry.plugins.bases import IssueTrackingPlugin2
 from sentry.signals import issue_deleted
+from sentry.tsdb.base import TSDBRequest
 from sentry.utils import metrics
 from sentry.utils.safe import safe_execute
 from sentry.utils.compat import zip
@@ -194,8 +194,6 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
             elif last_release is not None:
                 last_release = self._get_release_info(request, group, last_release)
 
-            get_range = functools.partial(tsdb.get_range, environment_ids=environment_ids)
-
             tags = tagstore.get_group_tag_keys(
                 group.project_id, group.id, environment_ids, limit=100
             )
@@ -207,21 +205,28 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
                 )
 
             now = timezone.now()
-            hourly_stats = tsdb.rollup(
-                get_range(
-                    model=tsdb.models.group, keys=[group.id], end=now, start=now - timedelta(days=1)
-                ),
-                3600,
-            )[group.id]
-            daily_stats = tsdb.rollup(
-                get_range(
-                    model=tsdb.models.group,
-                    keys=[group.id],
-                    end=now,
-                    start=now - timedelta(days=30),
-                ),
-                3600 * 24,
-            )[group.id]
+            hourly_stats, daily_stats = tsdb.get_many(
+                [
+                    TSDBRequest(
+                        "get_range",
+                        tsdb.models.group,
+                        [group.id],
+                        start=now - timedelta(days=1),
+                        end=now,
+                        environment_ids=environment_ids,
+                    ),
+                    TSDBRequest(
+                        "get_range",
+                        tsdb.models.group,
+                        [group.id],
+                        start=now - timedelta(days=30),
+                        end=now,
+                        environment_ids=environment_ids,
+                    ),
+                ]
+            )
+            hourly_stats = tsdb.rollup(hourly_stats, 3600)[group.id]
+            daily_stats = tsdb.rollup(daily_stats, 3600 * 24)[group.id]
 
             participants = list(
                 User.objects.filter(
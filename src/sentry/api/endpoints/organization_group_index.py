@@ -105,6 +105,8 @@ class OrganizationGroupIndexEndpoint(OrganizationEventsEndpointBase):
         :auth: required
         :qparam list expand: an optional list of strings to opt in to additional data. Supports `inbox`
         :qparam list collapse: an optional list of strings to opt out of certain pieces of data. Supports `stats`, `lifetime`, `base`
+        :qparam list field: an optional list of the fields to return for each issue.
+                            All fields are returned if not provided.
         """
         stats_period = request.GET.get("groupStatsPeriod")
         try:
@@ -114,6 +116,7 @@ class OrganizationGroupIndexEndpoint(OrganizationEventsEndpointBase):
 
         expand = request.GET.getlist("expand", [])
         collapse = request.GET.getlist("collapse", [])
+        fields = request.GET.getlist("field") or None
         has_inbox = features.has("organizations:inbox", organization, actor=request.user)
         has_workflow_owners = features.has(
             "organizations:workflow-owners", organization=organization, actor=request.user
@@ -136,6 +139,7 @@ class OrganizationGroupIndexEndpoint(OrganizationEventsEndpointBase):
             collapse=collapse,
             has_inbox=has_inbox,
             has_workflow_owners=has_workflow_owners,
+            fields=fields,
         )
 
         projects = self.get_projects(request, organization)
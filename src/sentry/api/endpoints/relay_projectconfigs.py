@@ -13,7 +13,14 @@ from sentry.api.base import Endpoint
 from sentry.api.permissions import RelayPermission
 from sentry.api.authentication import RelayAuthentication
 from sentry.relay import config, projectconfig_cache
-from sentry.models import Project, ProjectKey, Organization, OrganizationOption, ProjectKeyStatus
+from sentry.models import (
+    Project,
+    ProjectKey,
+    Organization,
+    OrganizationOption,
+    ProjectKeyStatus,
+    ProjectOption,
+)
 from sentry.utils import metrics
 
 logger = logging.getLogger(__name__)
@@ -57,10 +64,37 @@ class RelayProjectConfigsEndpoint(Endpoint):
         else:
             return Response("Unsupported version, we only support version null, 1 and 2.", 400)
 
+    def _get_cached_configs(self, cache_keys, full_config_requested):
+        # Only full configs are cached.
+        if not full_config_requested:
+            return {}
+
+        with start_span(op="relay_fetch_cached_configs"):
+            with metrics.timer("relay_project_configs.fetching_cached_configs.duration"):
+                cached = projectconfig_cache.get_many(cache_keys)
+
+        metrics.timing("relay_project_configs.cache_hits", len(cached))
+        metrics.timing("relay_project_configs.cache_misses", len(cache_keys) - len(cached))
+        return cached
+
+    def _fetch_options(self, projects, orgs):
+        # Preload the options of all projects and organizations in bulk to
+        # prevent repeated database access when computing the configuration.
+        with start_span(op="relay_fetch_options"):
+            with metrics.timer("relay_project_configs.fetching_org_options.duration"):
+                OrganizationOption.objects.get_all_values_bulk(list(orgs))
+            with metrics.timer("relay_project_configs.fetching_project_options.duration"):
+                ProjectOption.objects.get_all_values_bulk(
+                    [project.id for project in six.itervalues(projects)]
+                )
+
     def _post_by_key(self, request, full_config_requested):
         public_keys = request.relay_request_data.get("publicKeys")
         public_keys = set(public_keys or ())
 
+        configs = self._get_cached_configs(public_keys, full_config_requested)
+        public_keys -= set(configs)
+
         project_keys = {}  # type: dict[str, ProjectKey]
         project_ids = set()  # type: set[int]
 
@@ -93,51 +127,62 @@ class RelayProjectConfigsEndpoint(Endpoint):
                     if request.relay.has_org_access(org):
                         orgs[org.id] = org
 
-        with start_span(op="relay_fetch_org_options"):
-            with metrics.timer("relay_project_configs.fetching_org_options.duration"):
-                for org_id in orgs:
-                    OrganizationOption.objects.get_all_values(org_id)
+        self._fetch_options(projects, orgs)
 
         metrics.timing("relay_project_configs.projects_requested", len(project_ids))
         metrics.timing("relay_project_configs.projects_fetched", len(projects))
         metrics.timing("relay_project_configs.orgs_fetched", len(orgs))
 
-        configs = {}
-        for public_key in public_keys:
-            configs[public_key] = {"disabled": True}
+        generated = {}
+        fragments = {}
+        with metrics.timer("relay_project_configs.generating_configs.duration"):
+            for public_key in public_keys:
+                generated[public_key] = {"disabled": True}
 
-            key = project_keys.get(public_key)
-            if key is None:
-                continue
+                key = project_keys.get(public_key)
+                if key is None:
+                    continue
 
-            project = projects.get(key.project_id)
-            if project is None:
-                continue
+                project = projects.get(key.project_id)
+                if project is None:
+                    continue
 
-            organization = orgs.get(project.organization_id)
-            if organization is None:
-                continue
+                organization = orgs.get(project.organization_id)
+                if organization is None:
+                    continue
 
-            # Try to prevent organization from being fetched again in quotas.
-            project.organization = organization
-            project._organization_cache = organization
+                # Try to prevent organization from being fetched again in quotas.
+                project.organization = organization
+                project._organization_cache = organization
 
-            with Hub.current.start_span(op="get_config"):
-                with metrics.timer("relay_project_configs.get_config.duration"):
-                    project_config = config.get_project_config(
-                        project, full_config=full_config_requested, project_keys=[key],
-                    )
+                with Hub.current.start_span(op="get_config"):
+                    with metrics.timer("relay_project_configs.get_config.duration"):
+                        project_config = config.get_project_config(
+                            project,
+                            full_config=full_config_requested,
+                            project_keys=[key],
+                            fragments=fragments,
+                        )
 
-            configs[public_key] = project_config.to_dict()
+                generated[public_key] = project_config.to_dict()
 
-        if full_config_requested:
-            projectconfig_cache.set_many(configs)
+        if full_config_requested and generated:
+            with metrics.timer("relay_project_configs.caching_configs.duration"):
+                projectconfig_cache.set_many(generated)
 
+        configs.update(generated)
         return Response({"configs": configs}, status=200)
 
     def _post_by_project(self, request, full_config_requested):
         project_ids = set(request.relay_request_data.get("projects") or ())
 
+        configs = self._get_cached_configs(
+            [six.text_type(project_id) for project_id in project_ids], full_config_requested
+        )
+        project_ids = set(
+            project_id for project_id in project_ids if six.text_type(project_id) not in configs
+        )
+
         with start_span(op="relay_fetch_projects"):
             if project_ids:
                 with metrics.timer("relay_project_configs.fetching_projects.duration"):
@@ -146,8 +191,8 @@ class RelayProjectConfigsEndpoint(Endpoint):
                 projects = {}
 
         with start_span(op="relay_fetch_orgs"):
-            # Preload all organizations and their options to prevent repeated
-            # database access when computing the project configuration.
+            # Preload all organizations to prevent repeated database access
+            # when computing the project configuration.
             org_ids = set(project.organization_id for project in six.itervalues(projects))
             if org_ids:
                 with metrics.timer("relay_project_configs.fetching_orgs.duration"):
@@ -156,9 +201,7 @@ class RelayProjectConfigsEndpoint(Endpoint):
             else:
                 orgs = {}
 
-            with metrics.timer("relay_project_configs.fetching_org_options.duration"):
-                for org_id in six.iterkeys(orgs):
-                    OrganizationOption.objects.get_all_values(org_id)
+        self._fetch_options(projects, orgs)
 
         with start_span(op="relay_fetch_keys"):
             project_keys = {}
@@ -169,33 +212,38 @@ class RelayProjectConfigsEndpoint(Endpoint):
         metrics.timing("relay_project_configs.projects_fetched", len(projects))
         metrics.timing("relay_project_configs.orgs_fetched", len(orgs))
 
-        configs = {}
-        for project_id in project_ids:
-            configs[six.text_type(project_id)] = {"disabled": True}
+        generated = {}
+        fragments = {}
+        with metrics.timer("relay_project_configs.generating_configs.duration"):
+            for project_id in project_ids:
+                generated[six.text_type(project_id)] = {"disabled": True}
 
-            project = projects.get(int(project_id))
-            if project is None:
-                continue
+                project = projects.get(int(project_id))
+                if project is None:
+                    continue
 
-            organization = orgs.get(project.organization_id)
-            if organization is None:
-                continue
+                organization = orgs.get(project.organization_id)
+                if organization is None:
+                    continue
 
-            # Try to prevent organization from being fetched again in quotas.
-            project.organization = organization
-            project._organization_cache = organization
+                # Try to prevent organization from being fetched again in quotas.
+                project.organization = organization
+                project._organization_cache = organization
 
-            with start_span(op="get_config"):
-                with metrics.timer("relay_project_configs.get_config.duration"):
-                    project_config = config.get_project_config(
-                        project,
-                        full_config=full_config_requested,
-                        project_keys=project_keys.get(project.id) or [],
-                    )
+                with start_span(op="get_config"):
+                    with metrics.timer("relay_project_configs.get_config.duration"):
+                        project_config = config.get_project_config(
+                            project,
+                            full_config=full_config_requested,
+                            project_keys=project_keys.get(project.id) or [],
+                            fragments=fragments,
+                        )
 
-            configs[six.text_type(project_id)] = project_config.to_dict()
+                generated[six.text_type(project_id)] = project_config.to_dict()
 
-        if full_config_requested:
-            projectconfig_cache.set_many(configs)
+        if full_config_requested and generated:
+            with metrics.timer("relay_project_configs.caching_configs.duration"):
+                projectconfig_cache.set_many(generated)
 
+        configs.update(generated)
         return Response({"configs": configs}, status=200)
@@ -28,6 +28,7 @@ from sentry.search.utils import (
 )
 from sentry.snuba.dataset import Dataset
 from sentry.utils.dates import to_timestamp
+from sentry.utils.lru import LRUCache
 from sentry.utils.snuba import (
     DATASETS,
     FUNCTION_TO_OPERATOR,
@@ -190,6 +191,15 @@ spaces               = ~r"\ *"
 """
 )
 
+# Syntax trees of the most recently parsed queries, bounded by the total
+# length of the queries.
+_search_trees = LRUCache(100000, sizeof=lambda tree: len(tree.full_text) + 1)
+
+# Search filters of the most recently visited queries, keyed by visitor class,
+# query and whether boolean operators are allowed. Filters that depend on the
+# current time or on the params of the request are not cached.
+_parsed_queries = LRUCache(5000)
+
 
 # Create the known set of fields from the issue properties
 # and the transactions and events dataset mapping definitions.
@@ -326,6 +336,8 @@ class SearchVisitor(NodeVisitor):
     def __init__(self, allow_boolean=True, params=None):
         self.allow_boolean = allow_boolean
         self.params = params if params is not None else {}
+        # Set to False by visits whose result depends on more than the query.
+        self.cacheable = True
         super(SearchVisitor, self).__init__()
 
     @cached_property
@@ -461,6 +473,7 @@ class SearchVisitor(NodeVisitor):
         try:
             aggregate_value = None
             if search_value.expr_name in ["duration_format", "percentage_format"]:
+                self.cacheable = False
                 # Even if the search value matches duration format, only act as duration for certain columns
                 function = resolve_field(
                     search_key.name, self.params, functions_acl=FUNCTIONS.keys()
@@ -504,6 +517,7 @@ class SearchVisitor(NodeVisitor):
         operator = self.handle_negation(negation, operator)
         is_date_aggregate = any(key in search_key.name for key in self.date_keys)
         if is_date_aggregate:
+            self.cacheable = False
             try:
                 from_val, to_val = parse_datetime_range(search_value.text)
             except InvalidQuery as exc:
@@ -551,6 +565,7 @@ class SearchVisitor(NodeVisitor):
     def visit_rel_time_filter(self, node, children):
         (search_key, _, value) = children
         if search_key.name in self.date_keys:
+            self.cacheable = False
             try:
                 from_val, to_val = parse_datetime_range(value.text)
             except InvalidQuery as exc:
@@ -734,9 +749,36 @@ class SearchVisitor(NodeVisitor):
         return children or node
 
 
+def get_search_tree(query):
+    """
+    Parses a query with the search grammar, reusing the syntax tree of
+    recently parsed queries.
+    """
+    tree = _search_trees.get(query)
+    if tree is None:
+        tree = event_search_grammar.parse(query)
+        _search_trees.set(query, tree)
+    return tree
+
+
+def visit_search_query(visitor, query):
+    """
+    Returns the search filters of a query. The filters of recently visited
+    queries are reused if they only depend on the query itself.
+    """
+    key = (type(visitor), query, visitor.allow_boolean)
+    parsed = _parsed_queries.get(key)
+    if parsed is None:
+        parsed = visitor.visit(get_search_tree(query))
+        if visitor.cacheable:
+            _parsed_queries.set(key, parsed)
+    # Callers are free to modify the returned list.
+    return list(parsed)
+
+
 def parse_search_query(query, allow_boolean=True, params=None):
     try:
-        tree = event_search_grammar.parse(query)
+        return visit_search_query(SearchVisitor(allow_boolean, params=params), query)
     except IncompleteParseError as e:
         idx = e.column()
         prefix = query[max(0, idx - 5) : idx]
@@ -747,7 +789,6 @@ def parse_search_query(query, allow_boolean=True, params=None):
                 "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor(allow_boolean, params=params).visit(tree)
 
 
 def convert_aggregate_filter_to_snuba_query(aggregate_filter, params):
@@ -4,13 +4,13 @@ from django.utils.functional import cached_property
 from parsimonious.exceptions import IncompleteParseError
 
 from sentry.api.event_search import (
-    event_search_grammar,
     InvalidSearchQuery,
     SearchFilter,
     AggregateFilter,
     SearchKey,
     SearchValue,
     SearchVisitor,
+    visit_search_query,
 )
 from sentry.models.group import STATUS_QUERY_CHOICES
 from sentry.search.utils import (
@@ -80,7 +80,7 @@ class IssueSearchVisitor(SearchVisitor):
 
 def parse_search_query(query):
     try:
-        tree = event_search_grammar.parse(query)
+        return visit_search_query(IssueSearchVisitor(allow_boolean=False), query)
     except IncompleteParseError as e:
         raise InvalidSearchQuery(
             "%s %s"
@@ -89,7 +89,6 @@ def parse_search_query(query):
                 "This is commonly caused by unmatched-parentheses. Enclose any text in double quotes.",
             )
         )
-    return IssueSearchVisitor(allow_boolean=False).visit(tree)
 
 
 def convert_actor_value(value, projects, user, environments):
@@ -3,22 +3,29 @@ from __future__ import absolute_import
 import bisect
 import functools
 import math
+import six
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import connections
+from django.db import connections, models
 from django.db.models.sql.datastructures import EmptyResultSet
 from django.utils import timezone
 
+from sentry.utils import json
 from sentry.utils.cursors import build_cursor, Cursor, CursorResult
 from sentry.utils.compat import map
 from sentry.utils.compat import zip
+from sentry.utils.hashlib import md5_text
 
 quote_name = connections["default"].ops.quote_name
 
 
 MAX_LIMIT = 100
 MAX_HITS_LIMIT = 1000
+ESTIMATED_HITS_TTL = 60
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 class BadPaginationError(Exception):
@@ -204,6 +211,167 @@ class DateTimePaginator(BasePaginator):
         )
 
 
+def estimate_hits(queryset, max_hits=MAX_HITS_LIMIT):
+    """
+    Returns the number of rows in ``queryset`` as estimated by the Postgres
+    planner, capped at ``max_hits``. Querysets without any filters use the
+    ``reltuples`` statistic of their table, everything else uses the row
+    estimate of ``EXPLAIN``. Estimates are cached per query for
+    ``ESTIMATED_HITS_TTL`` seconds.
+    """
+    hits_query = queryset.values().query
+    hits_query.clear_select_clause()
+    hits_query.add_fields(["id"])
+    hits_query.clear_ordering(force_empty=True)
+    try:
+        sql, params = hits_query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    cache_key = "paginator:estimate:%s" % (md5_text(sql, repr(params)).hexdigest(),)
+    hits = cache.get(cache_key)
+    if hits is None:
+        cursor = connections[queryset.db].cursor()
+        if not hits_query.where and not hits_query.distinct and len(hits_query.alias_map) == 1:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # reltuples is negative (or zero) for tables that were never analyzed.
+            if row and row[0] > 0:
+                hits = int(row[0])
+        if hits is None:
+            cursor.execute(u"EXPLAIN (FORMAT JSON) {}".format(sql), params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, six.string_types):
+                plan = json.loads(plan)
+            hits = int(plan[0]["Plan"]["Plan Rows"])
+        cache.set(cache_key, hits, ESTIMATED_HITS_TTL)
+
+    if max_hits:
+        return min(hits, max_hits)
+    return hits
+
+
+class KeysetPaginator(BasePaginator):
+    """
+    Pages through a queryset ordered by ``order_by`` and the primary key,
+    starting every page after the last row of the previous one instead of
+    skipping over an offset. Deep pages are as cheap as the first one and
+    rows sharing the same ``order_by`` value are neither skipped nor repeated.
+
+    ``order_by`` has to be a non-null integer or datetime field. Cursors hold
+    the value of that field (datetimes in microseconds) and the ``id`` of the
+    row to page from, the latter in place of the offset.
+
+    Hits are estimated by the query planner rather than counted, see
+    ``estimate_hits``.
+    """
+
+    def __init__(self, queryset, order_by="id", max_limit=MAX_LIMIT, on_results=None):
+        super(KeysetPaginator, self).__init__(
+            queryset, order_by=order_by, max_limit=max_limit, on_results=on_results
+        )
+        field = queryset.model._meta.get_field(self.key)
+        self.column = field.column
+        self.is_datetime = isinstance(field, models.DateTimeField)
+
+    def _build_queryset(self, cursor):
+        asc = self._is_asc(cursor.is_prev)
+        prefix = "" if asc else "-"
+
+        queryset = self.queryset
+        if self.key == "id":
+            queryset = queryset.order_by(prefix + "id")
+        else:
+            queryset = queryset.order_by(prefix + self.key, prefix + "id")
+
+        if cursor.offset:
+            table = quote_name(queryset.model._meta.db_table)
+            id_column = quote_name("id")
+            operator = ">" if asc else "<"
+            if self.key == "id":
+                where = "%s.%s %s %%s" % (table, id_column, operator)
+                params = [cursor.offset]
+            else:
+                where = "(%s.%s, %s.%s) %s (%%s, %%s)" % (
+                    table,
+                    quote_name(self.column),
+                    table,
+                    id_column,
+                    operator,
+                )
+                params = [self.value_from_cursor(cursor), cursor.offset]
+            queryset = queryset.extra(where=[where], params=params)
+
+        return queryset
+
+    def get_item_key(self, item, for_prev=False):
+        value = getattr(item, self.key)
+        if self.is_datetime:
+            delta = value - EPOCH
+            return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        return int(value)
+
+    def value_from_cursor(self, cursor):
+        if self.is_datetime:
+            return EPOCH + timedelta(microseconds=int(cursor.value))
+        return cursor.value
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None):
+        if cursor is None:
+            cursor = Cursor(0, 0, 0)
+
+        limit = min(limit, self.max_limit)
+
+        if count_hits:
+            hits = self.count_hits(MAX_HITS_LIMIT)
+        elif known_hits is not None:
+            hits = known_hits
+        else:
+            hits = None
+
+        # Fetch one extra row to know whether there is another page in the
+        # direction we are paging in. The other direction has more rows
+        # whenever we started from a row.
+        results = list(self._build_queryset(cursor)[: limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        if cursor.is_prev:
+            results.reverse()
+            has_prev, has_next = has_more, bool(cursor.offset)
+        else:
+            has_prev, has_next = bool(cursor.offset), has_more
+
+        if results:
+            first, last = results[0], results[-1]
+            prev_cursor = Cursor(self.get_item_key(first), first.id, True, has_prev)
+            next_cursor = Cursor(self.get_item_key(last), last.id, False, has_next)
+        else:
+            # Keep paging from the same row, so that rows created later are
+            # still found.
+            prev_cursor = Cursor(cursor.value, cursor.offset, True, has_prev)
+            next_cursor = Cursor(cursor.value, cursor.offset, False, has_next)
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        return CursorResult(
+            results=results,
+            next=next_cursor,
+            prev=prev_cursor,
+            hits=hits,
+            max_hits=MAX_HITS_LIMIT if count_hits else None,
+        )
+
+    def count_hits(self, max_hits):
+        if not max_hits:
+            return 0
+        return estimate_hits(self.queryset, max_hits)
+
+
 # TODO(dcramer): previous cursors are too complex at the moment for many things
 # and are only useful for polling situations. The OffsetPaginator ignores them
 # entirely and uses standard paging
@@ -50,11 +50,13 @@ from sentry.models import (
 from sentry.models.groupinbox import get_inbox_details
 from sentry.models.groupowner import get_owner_details
 from sentry.tagstore.snuba.backend import fix_tag_value_data
+from sentry.tagstore.snuba.coalescer import coalesce_queries
 from sentry.tsdb.snuba import SnubaTSDB
-from sentry.utils import snuba
+from sentry.utils import metrics, snuba
 from sentry.utils.db import attach_foreignkey
 from sentry.utils.safe import safe_execute
 from sentry.utils.compat import map, zip
+from sentry.utils.imports import import_string
 from sentry.utils.snuba import Dataset, raw_query
 from sentry.reprocessing2 import get_progress
 
@@ -73,6 +75,10 @@ disabled = object()
 # TODO(jess): remove when snuba is primary backend
 snuba_tsdb = SnubaTSDB(**settings.SENTRY_TSDB_OPTIONS)
 
+loader_executor = import_string(settings.SENTRY_GROUP_SERIALIZER_EXECUTOR["path"])(
+    **settings.SENTRY_GROUP_SERIALIZER_EXECUTOR.get("options", {})
+)
+
 
 logger = logging.getLogger(__name__)
 
@@ -83,13 +89,26 @@ def merge_list_dictionaries(dict1, dict2):
 
 
 class GroupSerializerBase(Serializer):
+    # The fields that depend on the seen stats of the groups.
+    seen_stats_fields = (
+        "count",
+        "userCount",
+        "firstSeen",
+        "lastSeen",
+        "status",
+        "statusDetails",
+        "isUnhandled",
+    )
+
     def __init__(
-        self, collapse=None, expand=None, has_inbox=False, has_workflow_owners=False,
+        self, collapse=None, expand=None, has_inbox=False, has_workflow_owners=False, fields=None,
     ):
         self.collapse = collapse
         self.expand = expand
         self.has_inbox = has_inbox
         self.has_workflow_owners = has_workflow_owners
+        self.fields = frozenset(fields) if fields is not None else None
+        self.loader_timings = {}
 
     def _expand(self, key):
         if self.expand is None:
@@ -108,6 +127,22 @@ class GroupSerializerBase(Serializer):
             return False
         return key in self.collapse
 
+    def _is_requested(self, *fields):
+        """
+        Returns whether any of the given fields is part of the response. All
+        fields are returned unless ``fields`` is passed to the serializer.
+        """
+        if self.fields is None:
+            return True
+        return any(field in self.fields for field in fields)
+
+    def _select_fields(self, result):
+        if self.fields is None:
+            return result
+        return {
+            key: value for key, value in six.iteritems(result) if key in self.fields or key == "id"
+        }
+
     def _get_seen_stats(self, item_list, user):
         """
         Returns a dictionary keyed by item that includes:
@@ -237,38 +272,32 @@ class GroupSerializerBase(Serializer):
 
         return results
 
-    def get_attrs(self, item_list, user):
-        from sentry.plugins.base import plugins
-        from sentry.integrations import IntegrationFeatures
-        from sentry.models import PlatformExternalIssue
-
-        GroupMeta.objects.populate_cache(item_list)
-
-        attach_foreignkey(item_list, Group.project)
-
-        if user.is_authenticated() and item_list:
-            bookmarks = set(
-                GroupBookmark.objects.filter(user=user, group__in=item_list).values_list(
-                    "group_id", flat=True
-                )
+    def _get_bookmarks(self, item_list, user):
+        return set(
+            GroupBookmark.objects.filter(user=user, group__in=item_list).values_list(
+                "group_id", flat=True
             )
-            seen_groups = dict(
-                GroupSeen.objects.filter(user=user, group__in=item_list).values_list(
-                    "group_id", "last_seen"
-                )
+        )
+
+    def _get_seen_groups(self, item_list, user):
+        return dict(
+            GroupSeen.objects.filter(user=user, group__in=item_list).values_list(
+                "group_id", "last_seen"
             )
-            subscriptions = self._get_subscriptions(item_list, user)
-        else:
-            bookmarks = set()
-            seen_groups = {}
-            subscriptions = defaultdict(lambda: (False, None))
+        )
 
+    def _get_assignees(self, item_list):
         assignees = {
             a.group_id: a.assigned_actor()
             for a in GroupAssignee.objects.filter(group__in=item_list)
         }
-        resolved_assignees = Actor.resolve_dict(assignees)
+        return Actor.resolve_dict(assignees)
 
+    def _get_resolutions(self, item_list, user):
+        """
+        Returns a four-tuple of the ignore items, release resolutions, commit
+        resolutions and serialized actors of the provided groups.
+        """
         ignore_items = {g.group_id: g for g in GroupSnooze.objects.filter(group__in=item_list)}
 
         resolved_item_list = [i for i in item_list if i.status == GroupStatus.RESOLVED]
@@ -312,20 +341,13 @@ class GroupSerializerBase(Serializer):
         else:
             actors = {}
 
-        share_ids = dict(
-            GroupShare.objects.filter(group__in=item_list).values_list("group_id", "uuid")
-        )
-
-        result = {}
+        return ignore_items, release_resolutions, commit_resolutions, actors
 
-        seen_stats = self._get_seen_stats(item_list, user)
-
-        annotations_by_group_id = defaultdict(list)
+    def _get_share_ids(self, item_list):
+        return dict(GroupShare.objects.filter(group__in=item_list).values_list("group_id", "uuid"))
 
+    def _get_organization_id(self, item_list):
         organization_id_list = list(set(item.project.organization_id for item in item_list))
-        # if no groups, then we can't proceed but this seems to be a valid use case
-        if not item_list:
-            return {}
         if len(organization_id_list) > 1:
             # this should never happen but if it does we should know about it
             logger.warn(
@@ -334,12 +356,18 @@ class GroupSerializerBase(Serializer):
             )
 
         # should only have 1 org at this point
-        organization_id = organization_id_list[0]
-        organization = Organization.objects.get_from_cache(id=organization_id)
+        return organization_id_list[0]
 
-        has_unhandled_flag = features.has(
-            "organizations:unhandled-issue-flag", organization, actor=user
-        )
+    def _get_annotations(self, item_list):
+        """
+        Returns the annotations of integrations and sentry apps, keyed by
+        group ID. Plugin annotations are added in ``get_attrs``.
+        """
+        from sentry.integrations import IntegrationFeatures
+        from sentry.models import PlatformExternalIssue
+
+        organization_id = self._get_organization_id(item_list)
+        annotations_by_group_id = defaultdict(list)
 
         # find all the integration installs that have issue tracking
         for integration in Integration.objects.filter(organizations=organization_id):
@@ -371,25 +399,126 @@ class GroupSerializerBase(Serializer):
         )
         merge_list_dictionaries(annotations_by_group_id, local_annotations_by_group_id)
 
+        return annotations_by_group_id
+
+    def _get_loaders(self, item_list, user):
+        """
+        Returns the loaders of the attributes needed for the requested fields,
+        keyed by name. See ``_run_loaders``.
+        """
+        loaders = {}
+
+        if user.is_authenticated():
+            if self._is_requested("isBookmarked"):
+                loaders["bookmarks"] = functools.partial(self._get_bookmarks, item_list, user)
+            if self._is_requested("hasSeen"):
+                loaders["seen_groups"] = functools.partial(self._get_seen_groups, item_list, user)
+            if self._is_requested("isSubscribed", "subscriptionDetails"):
+                loaders["subscriptions"] = functools.partial(
+                    self._get_subscriptions, item_list, user
+                )
+
+        if self._is_requested("assignedTo"):
+            loaders["assignees"] = functools.partial(self._get_assignees, item_list)
+        if self._is_requested("status", "statusDetails"):
+            loaders["resolutions"] = functools.partial(self._get_resolutions, item_list, user)
+        if self._is_requested("shareId", "isPublic"):
+            loaders["share_ids"] = functools.partial(self._get_share_ids, item_list)
+        if self._is_requested("annotations"):
+            loaders["annotations"] = functools.partial(self._get_annotations, item_list)
+        if self._is_requested(*self.seen_stats_fields):
+            loaders["seen_stats"] = functools.partial(self._get_seen_stats, item_list, user)
+
+        return loaders
+
+    def _run_loaders(self, loaders):
+        """
+        Runs the given loaders on the ``SENTRY_GROUP_SERIALIZER_EXECUTOR`` and
+        returns their results, keyed by name. The time spent in each loader is
+        recorded in ``loader_timings``.
+        """
+        hub = sentry_sdk.Hub.current
+
+        def bind_hub(loader):
+            def run():
+                with sentry_sdk.Hub(hub):
+                    return loader()
+
+            return run
+
+        futures = {
+            name: loader_executor.submit(bind_hub(loader)) for name, loader in loaders.items()
+        }
+
+        results = {}
+        for name, future in futures.items():
+            results[name] = future.result()
+            started, finished = future.get_timing()
+            self.loader_timings[name] = finished - started
+            metrics.timing(
+                "serializers.group.loader.duration", finished - started, tags={"loader": name}
+            )
+        return results
+
+    def get_attrs(self, item_list, user):
+        # if no groups, then we can't proceed but this seems to be a valid use case
+        if not item_list:
+            return {}
+
+        attach_foreignkey(item_list, Group.project)
+
+        results = self._run_loaders(self._get_loaders(item_list, user))
+        return self._get_base_attrs(item_list, user, results)
+
+    def _get_base_attrs(self, item_list, user, results):
+        from sentry.plugins.base import plugins
+
+        bookmarks = results.get("bookmarks", set())
+        seen_groups = results.get("seen_groups", {})
+        subscriptions = results.get("subscriptions") or defaultdict(lambda: (False, None))
+        resolved_assignees = results.get("assignees", {})
+        ignore_items, release_resolutions, commit_resolutions, actors = results.get(
+            "resolutions", ({}, {}, {}, {})
+        )
+        share_ids = results.get("share_ids", {})
+        annotations_by_group_id = results.get("annotations", {})
+        seen_stats = results.get("seen_stats")
+
+        result = {}
+
+        has_unhandled_flag = self._is_requested("isUnhandled") and features.has(
+            "organizations:unhandled-issue-flag",
+            Organization.objects.get_from_cache(id=self._get_organization_id(item_list)),
+            actor=user,
+        )
+
         snuba_stats = {}
         if has_unhandled_flag:
-            snuba_stats = self._get_group_snuba_stats(item_list, seen_stats)
+            snuba_stats = self._run_loaders(
+                {"unhandled": functools.partial(self._get_group_snuba_stats, item_list, seen_stats)}
+            )["unhandled"]
+
+        if self._is_requested("annotations"):
+            # Plugins read their data from GroupMeta. Cache it for all groups
+            # up front, so that the plugin loops below don't make a bunch of
+            # queries.
+            GroupMeta.objects.populate_cache(item_list)
 
         for item in item_list:
             active_date = item.active_at or item.first_seen
 
             annotations = []
-            annotations.extend(annotations_by_group_id[item.id])
-
-            # add the annotations for plugins
-            # note that the model GroupMeta where all the information is stored is already cached at the top of this function
-            # so these for loops doesn't make a bunch of queries
-            for plugin in plugins.for_project(project=item.project, version=1):
-                safe_execute(plugin.tags, None, item, annotations, _with_transaction=False)
-            for plugin in plugins.for_project(project=item.project, version=2):
-                annotations.extend(
-                    safe_execute(plugin.get_annotations, group=item, _with_transaction=False) or ()
-                )
+            if self._is_requested("annotations"):
+                annotations.extend(annotations_by_group_id.get(item.id, ()))
+
+                # add the annotations for plugins
+                for plugin in plugins.for_project(project=item.project, version=1):
+                    safe_execute(plugin.tags, None, item, annotations, _with_transaction=False)
+                for plugin in plugins.for_project(project=item.project, version=2):
+                    annotations.extend(
+                        safe_execute(plugin.get_annotations, group=item, _with_transaction=False)
+                        or ()
+                    )
 
             resolution_actor = None
             resolution_type = None
@@ -529,8 +658,11 @@ class GroupSerializerBase(Serializer):
         return is_subscribed, subscription_details
 
     def serialize(self, obj, attrs, user):
-        status_details, status_label = self._get_status(attrs, obj)
-        permalink = self._get_permalink(obj, user)
+        if self._is_requested("status", "statusDetails"):
+            status_details, status_label = self._get_status(attrs, obj)
+        else:
+            status_details, status_label = {}, None
+        permalink = self._get_permalink(obj, user) if self._is_requested("permalink") else None
         is_subscribed, subscription_details = self._get_subscription(attrs)
         share_id = attrs["share_id"]
         group_dict = {
@@ -568,7 +700,7 @@ class GroupSerializerBase(Serializer):
             group_dict["isUnhandled"] = attrs["is_unhandled"]
         if "times_seen" in attrs:
             group_dict.update(self._convert_seen_stats(attrs))
-        return group_dict
+        return self._select_fields(group_dict)
 
     def _convert_seen_stats(self, stats):
         return {
@@ -581,8 +713,8 @@ class GroupSerializerBase(Serializer):
 
 @register(Group)
 class GroupSerializer(GroupSerializerBase):
-    def __init__(self, environment_func=None):
-        GroupSerializerBase.__init__(self)
+    def __init__(self, environment_func=None, fields=None):
+        GroupSerializerBase.__init__(self, fields=fields)
         self.environment_func = environment_func if environment_func is not None else lambda: None
 
     def _get_seen_stats(self, item_list, user):
@@ -596,20 +728,33 @@ class GroupSerializer(GroupSerializerBase):
         else:
             project_id = item_list[0].project_id
             item_ids = [g.id for g in item_list]
-            user_counts = tagstore.get_groups_user_counts(
-                [project_id], item_ids, environment_ids=environment and [environment.id]
-            )
+            # The environment filter already restricts the events to the
+            # environment, so both queries only differ in their aggregations
+            # and are sent to Snuba as one.
+            with coalesce_queries() as coalescer:
+                user_counts = coalescer.defer(
+                    tagstore.get_groups_user_counts,
+                    [project_id],
+                    item_ids,
+                    environment_ids=environment and [environment.id],
+                )
+                if environment is not None:
+                    environment_seen = coalescer.defer(
+                        tagstore.get_group_seen_values_for_environments,
+                        [project_id],
+                        item_ids,
+                        [environment.id],
+                    )
+                    environment_seen = environment_seen.result()
+                user_counts = user_counts.result()
             first_seen = {}
             last_seen = {}
             times_seen = {}
             if environment is not None:
-                environment_tagvalues = tagstore.get_group_list_tag_value(
-                    [project_id], item_ids, [environment.id], "environment", environment.name
-                )
-                for item_id, value in environment_tagvalues.items():
-                    first_seen[item_id] = value.first_seen
-                    last_seen[item_id] = value.last_seen
-                    times_seen[item_id] = value.times_seen
+                for item_id, value in environment_seen.items():
+                    first_seen[item_id] = value["first_seen"]
+                    last_seen[item_id] = value["last_seen"]
+                    times_seen[item_id] = value["times_seen"]
             else:
                 for item in item_list:
                     first_seen[item.id] = item.first_seen
@@ -804,12 +949,14 @@ class GroupSerializerSnuba(GroupSerializerBase):
         expand=None,
         has_inbox=False,
         has_workflow_owners=False,
+        fields=None,
     ):
         super(GroupSerializerSnuba, self).__init__(
             collapse=collapse,
             expand=expand,
             has_inbox=has_inbox,
             has_workflow_owners=has_workflow_owners,
+            fields=fields,
         )
         from sentry.search.snuba.executors import get_search_filter
 
@@ -923,6 +1070,7 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
         expand=None,
         has_inbox=False,
         has_workflow_owners=False,
+        fields=None,
     ):
         super(StreamGroupSerializerSnuba, self).__init__(
             environment_ids,
@@ -933,6 +1081,7 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
             expand=expand,
             has_inbox=has_inbox,
             has_workflow_owners=has_workflow_owners,
+            fields=fields,
         )
 
         if stats_period is not None:
@@ -945,83 +1094,127 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
         self.stats_period_end = stats_period_end
         self.matching_event_id = matching_event_id
 
-    def _get_seen_stats(self, item_list, user):
-        if not self._collapse("stats"):
-            partial_execute_seen_stats_query = functools.partial(
-                self._execute_seen_stats_query,
-                item_list=item_list,
-                environment_ids=self.environment_ids,
-                start=self.start,
-                end=self.end,
+    def query_tsdb(self, group_ids, query_params, conditions=None, environment_ids=None, **kwargs):
+        return snuba_tsdb.get_range(
+            model=snuba_tsdb.models.group,
+            keys=group_ids,
+            environment_ids=environment_ids,
+            conditions=conditions,
+            **query_params
+        )
+
+    def _get_loaders(self, item_list, user):
+        if not self._collapse("base"):
+            loaders = super(StreamGroupSerializerSnuba, self)._get_loaders(item_list, user)
+        else:
+            loaders = {}
+
+        # The seen stats of the time range, the filtered stats and the
+        # lifetime stats are independent queries, so they're loaded
+        # separately.
+        loaders.pop("seen_stats", None)
+        if self._collapse("stats"):
+            return self._get_expand_loaders(item_list, loaders)
+
+        execute_seen_stats_query = functools.partial(
+            self._execute_seen_stats_query,
+            item_list=item_list,
+            environment_ids=self.environment_ids,
+            start=self.start,
+            end=self.end,
+        )
+        if self._is_requested(*self.seen_stats_fields) or (
+            self._is_requested("lifetime") and not (self.start or self.end)
+        ):
+            loaders["seen_stats"] = execute_seen_stats_query
+        if self.conditions and not self._collapse("filtered") and self._is_requested("filtered"):
+            loaders["seen_stats.filtered"] = functools.partial(
+                execute_seen_stats_query, conditions=self.conditions
             )
-            time_range_result = partial_execute_seen_stats_query()
-            filtered_result = (
-                partial_execute_seen_stats_query(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
+        if (
+            (self.start or self.end)
+            and not self._collapse("lifetime")
+            and self._is_requested("lifetime")
+        ):
+            loaders["seen_stats.lifetime"] = functools.partial(
+                execute_seen_stats_query, start=None, end=None
             )
+
+        if self.stats_period:
+            get_stats = functools.partial(
+                self.get_stats, item_list=item_list, user=user, environment_ids=self.environment_ids
+            )
+            if self._is_requested("stats"):
+                loaders["stats"] = get_stats
+            if (
+                self.conditions
+                and not self._collapse("filtered")
+                and self._is_requested("filtered")
+            ):
+                loaders["stats.filtered"] = functools.partial(get_stats, conditions=self.conditions)
+
+        return self._get_expand_loaders(item_list, loaders)
+
+    def _get_expand_loaders(self, item_list, loaders):
+        if self._expand("inbox"):
+            loaders["inbox"] = functools.partial(get_inbox_details, item_list)
+        if self._expand("owners"):
+            loaders["owners"] = functools.partial(get_owner_details, item_list)
+        return loaders
+
+    def get_attrs(self, item_list, user):
+        if not item_list:
+            return {}
+
+        attach_foreignkey(item_list, Group.project)
+
+        results = self._run_loaders(self._get_loaders(item_list, user))
+
+        if not self._collapse("stats"):
+            time_range_result = results.get("seen_stats")
+            filtered_result = results.get("seen_stats.filtered")
             if not self._collapse("lifetime"):
-                lifetime_result = (
-                    partial_execute_seen_stats_query(start=None, end=None)
-                    if self.start or self.end
-                    else time_range_result
-                )
+                lifetime_result = results.get("seen_stats.lifetime", time_range_result)
             else:
                 lifetime_result = None
 
+            seen_stats = {}
             for item in item_list:
-                time_range_result[item].update(
+                seen_stats[item] = dict(
+                    time_range_result.get(item, {}) if time_range_result else {}
+                )
+                seen_stats[item].update(
                     {
                         "filtered": filtered_result.get(item) if filtered_result else None,
                         "lifetime": lifetime_result.get(item) if lifetime_result else None,
                     }
                 )
-            return time_range_result
-        return None
+            results["seen_stats"] = seen_stats
 
-    def query_tsdb(self, group_ids, query_params, conditions=None, environment_ids=None, **kwargs):
-        return snuba_tsdb.get_range(
-            model=snuba_tsdb.models.group,
-            keys=group_ids,
-            environment_ids=environment_ids,
-            conditions=conditions,
-            **query_params
-        )
-
-    def get_attrs(self, item_list, user):
         if not self._collapse("base"):
-            attrs = super(StreamGroupSerializerSnuba, self).get_attrs(item_list, user)
+            attrs = self._get_base_attrs(item_list, user, results)
         else:
-            seen_stats = self._get_seen_stats(item_list, user)
+            seen_stats = results.get("seen_stats")
             if seen_stats:
                 attrs = {item: seen_stats.get(item, {}) for item in item_list}
             else:
                 attrs = {item: {} for item in item_list}
 
-        if self.stats_period and not self._collapse("stats"):
-            partial_get_stats = functools.partial(
-                self.get_stats, item_list=item_list, user=user, environment_ids=self.environment_ids
-            )
-            stats = partial_get_stats()
-            filtered_stats = (
-                partial_get_stats(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
-            )
-            for item in item_list:
-                if filtered_stats:
-                    attrs[item].update({"filtered_stats": filtered_stats[item.id]})
+        stats = results.get("stats")
+        filtered_stats = results.get("stats.filtered")
+        for item in item_list:
+            if filtered_stats:
+                attrs[item].update({"filtered_stats": filtered_stats[item.id]})
+            if stats:
                 attrs[item].update({"stats": stats[item.id]})
 
         if self._expand("inbox"):
-            inbox_stats = get_inbox_details(item_list)
             for item in item_list:
-                attrs[item].update({"inbox": inbox_stats.get(item.id)})
+                attrs[item].update({"inbox": results["inbox"].get(item.id)})
 
         if self._expand("owners"):
-            owner_details = get_owner_details(item_list)
             for item in item_list:
-                attrs[item].update({"owners": owner_details.get(item.id)})
+                attrs[item].update({"owners": results["owners"].get(item.id)})
 
         return attrs
 
@@ -1033,23 +1226,23 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
                 "id": six.text_type(obj.id),
             }
             if "times_seen" in attrs:
-                result.update(self._convert_seen_stats(attrs))
+                result.update(self._select_fields(self._convert_seen_stats(attrs)))
 
-        if self.matching_event_id:
+        if self.matching_event_id and self._is_requested("matchingEventId"):
             result["matchingEventId"] = self.matching_event_id
 
         if not self._collapse("stats"):
-            if self.stats_period:
+            if self.stats_period and self._is_requested("stats"):
                 result["stats"] = {self.stats_period: attrs["stats"]}
 
-            if not self._collapse("lifetime"):
+            if not self._collapse("lifetime") and self._is_requested("lifetime"):
                 result["lifetime"] = self._convert_seen_stats(attrs["lifetime"])
                 if self.stats_period:
                     result["lifetime"].update(
                         {"stats": None}
                     )  # Not needed in current implementation
 
-            if not self._collapse("filtered"):
+            if not self._collapse("filtered") and self._is_requested("filtered"):
                 if self.conditions:
                     result["filtered"] = self._convert_seen_stats(attrs["filtered"])
                     if self.stats_period:
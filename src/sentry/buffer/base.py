@@ -3,10 +3,14 @@ from __future__ import absolute_import
 import logging
 import six
 
-from django.db.models import F
+from collections import defaultdict
+from django.db import connections, router
+from django.db.models import AutoField, F, Model
+from django.core.exceptions import FieldDoesNotExist
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils.compat import zip
 from sentry.utils.services import Service
 
 
@@ -32,7 +36,7 @@ class Buffer(Service):
     keep up with the updates.
     """
 
-    __all__ = ("incr", "process", "process_pending", "validate")
+    __all__ = ("incr", "process", "process_batch", "process_pending", "validate")
 
     def incr(self, model, columns, filters, extra=None, signal_only=None):
         """
@@ -86,3 +90,161 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, items):
+        """
+        Applies many buffered increments at once.
+
+        ``items`` is a list of ``(model, columns, filters, extra, signal_only)``
+        tuples, as they would otherwise be passed to ``process``. Increments
+        sharing the same model and column shape are written with a single
+        ``UPDATE ... FROM (VALUES ...)`` statement; anything that can't be
+        expressed that way (signal-only updates, rows that do not exist yet,
+        relation lookups) goes through ``Buffer.process`` one by one.
+        """
+        shapes = defaultdict(list)
+        for item in items:
+            model, columns, filters, extra, signal_only = item
+            if signal_only or not columns or not filters:
+                Buffer.process(self, *item)
+                continue
+            shape = (
+                model,
+                tuple(sorted(filters)),
+                tuple(sorted(columns)),
+                tuple(sorted(extra or ())),
+            )
+            shapes[shape].append(item)
+
+        for shape, batch in six.iteritems(shapes):
+            if len(batch) == 1:
+                Buffer.process(self, *batch[0])
+                continue
+
+            try:
+                updated = self._bulk_update(shape, batch)
+            except _Unbatchable:
+                updated = set()
+
+            for idx, item in enumerate(batch):
+                if idx not in updated:
+                    Buffer.process(self, *item)
+                    continue
+                model, columns, filters, extra, _ = item
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+    def _bulk_update(self, shape, batch):
+        """
+        Returns the set of indexes into ``batch`` whose rows were updated.
+        """
+        from sentry.models import Group
+
+        model, filter_names, column_names, extra_names = shape
+        using = router.db_for_write(model)
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        opts = model._meta
+
+        def get_field(name):
+            if name == "pk":
+                return opts.pk
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                raise _Unbatchable(name)
+            if not getattr(field, "concrete", False):
+                raise _Unbatchable(name)
+            return field
+
+        def prep_value(field, value):
+            if isinstance(value, Model):
+                value = value.pk
+                field = field.target_field if field.is_relation else field
+            return field.get_db_prep_save(value, connection)
+
+        filter_fields = [get_field(name) for name in filter_names]
+        column_fields = [get_field(name) for name in column_names]
+        extra_fields = [get_field(name) for name in extra_names]
+
+        # Aliases inside of the VALUES list, prefixed so that they can't clash
+        # with each other when the same column is both a filter and extra.
+        value_columns = (
+            ["idx"]
+            + ["f%d" % i for i in range(len(filter_fields))]
+            + ["i%d" % i for i in range(len(column_fields))]
+            + ["e%d" % i for i in range(len(extra_fields))]
+        )
+
+        rows = []
+        params = []
+        for idx, (_, columns, filters, extra, _) in enumerate(batch):
+            row = [idx]
+            row.extend(prep_value(f, filters[n]) for f, n in zip(filter_fields, filter_names))
+            row.extend(int(columns[n]) for n in column_names)
+            row.extend(prep_value(f, extra[n]) for f, n in zip(extra_fields, extra_names))
+            rows.append("(%s)" % ", ".join(["%s"] * len(row)))
+            params.extend(row)
+
+        def cast(alias, field):
+            if isinstance(field, AutoField):
+                # serial types can't be used in casts
+                if hasattr(field, "get_related_db_type"):
+                    db_type = field.get_related_db_type(connection)
+                else:
+                    db_type = field.rel_db_type(connection)
+            else:
+                db_type = field.db_type(connection)
+            return "v.%s::%s" % (alias, db_type)
+
+        assignments = []
+        for i, field in enumerate(column_fields):
+            assignments.append(
+                "%s = t.%s + %s"
+                % (quote_name(field.column), quote_name(field.column), cast("i%d" % i, field))
+            )
+        for i, field in enumerate(extra_fields):
+            assignments.append("%s = %s" % (quote_name(field.column), cast("e%d" % i, field)))
+
+        # HACK(dcramer): mirrors the ScoreClause special case in ``process``
+        if model is Group and "last_seen" in extra_names and "times_seen" in column_names:
+            assignments.append(
+                "score = log(t.times_seen + %s) * 600 + floor(extract(epoch from %s))::int"
+                % (
+                    cast("i%d" % column_names.index("times_seen"), opts.get_field("times_seen")),
+                    cast("e%d" % extra_names.index("last_seen"), opts.get_field("last_seen")),
+                )
+            )
+
+        where = [
+            "t.%s = %s" % (quote_name(field.column), cast("f%d" % i, field))
+            for i, field in enumerate(filter_fields)
+        ]
+
+        query = """
+            update %(table)s as t
+            set %(assignments)s
+            from (values %(rows)s) as v(%(value_columns)s)
+            where %(where)s
+            returning v.idx
+        """ % dict(
+            table=quote_name(opts.db_table),
+            assignments=", ".join(assignments),
+            rows=", ".join(rows),
+            value_columns=", ".join(value_columns),
+            where=" and ".join(where),
+        )
+
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        return set(r[0] for r in cursor.fetchall())
+
+
+class _Unbatchable(Exception):
+    pass
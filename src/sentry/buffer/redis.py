@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import six
 
 import threading
+from collections import defaultdict
 from time import time
 
 from datetime import datetime
@@ -54,10 +55,13 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(self, pending_partitions=1, incr_batch_size=2, batch_flush=False, **options):
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        # When enabled, each ``process_incr`` batch is read with pipelined
+        # commands and written with one bulk update per model.
+        self.batch_flush = batch_flush
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
@@ -103,9 +107,12 @@ class RedisBuffer(Buffer):
         to route a key into the correct pending buffer. If partitioning
         is disabled, route into the no partition buffer.
         """
+        return self._make_pending_key(self._get_partition_for_key(key))
+
+    def _get_partition_for_key(self, key):
         if self.pending_partitions == 1:
-            return self.pending_key
-        return self._make_pending_key(crc32(key) % self.pending_partitions)
+            return None
+        return crc32(key) % self.pending_partitions
 
     def _make_lock_key(self, key):
         return "l:%s" % (key,)
@@ -218,6 +225,7 @@ class RedisBuffer(Buffer):
             return
 
         pending_buffer = PendingBuffer(self.incr_batch_size)
+        partition_tag = "none" if partition is None else six.text_type(partition)
 
         try:
             keycount = 0
@@ -240,6 +248,12 @@ class RedisBuffer(Buffer):
                 process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
 
             metrics.timing("buffer.pending-size", keycount)
+            metrics.incr(
+                "buffer.pending-keys",
+                amount=keycount,
+                tags={"partition": partition_tag},
+                skip_internal=False,
+            )
         finally:
             client.delete(lock_key)
 
@@ -250,9 +264,69 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.batch_flush and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
+    def _process_batch_incr(self, keys):
+        """
+        Same as ``_process_single_incr`` for many keys at once: locks, reads
+        and deletes are pipelined per Redis host, and the resulting increments
+        are handed to ``process_batch`` to be written in bulk.
+        """
+        with self.cluster.map() as conn:
+            locks = [(key, conn.set(self._make_lock_key(key), "1", nx=True, ex=10)) for key in keys]
+
+        locked_keys = []
+        for key, result in locks:
+            if result.value:
+                locked_keys.append(key)
+            else:
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not locked_keys:
+            return
+
+        try:
+            pending_keys = defaultdict(list)
+            with self.cluster.map() as conn:
+                results = []
+                for key in locked_keys:
+                    results.append((key, conn.hgetall(key)))
+                    conn.delete(key)
+                    pending_keys[self._make_pending_key_from_key(key)].append(key)
+
+            for pending_key, pending_members in six.iteritems(pending_keys):
+                client = self.cluster.get_local_client_for_key(pending_key)
+                client.zrem(pending_key, *pending_members)
+
+            items = []
+            partitions = defaultdict(int)
+            for key, result in results:
+                item = self._load_incr(key, result.value)
+                if item is not None:
+                    items.append(item)
+                    partitions[self._get_partition_for_key(key)] += 1
+
+            with metrics.timer("buffer.batch.process"):
+                super(RedisBuffer, self).process_batch(items)
+
+            for partition, count in six.iteritems(partitions):
+                metrics.incr(
+                    "buffer.batch.processed",
+                    amount=count,
+                    tags={"partition": "none" if partition is None else six.text_type(partition)},
+                    skip_internal=False,
+                )
+        finally:
+            with self.cluster.map() as conn:
+                for key in locked_keys:
+                    conn.delete(self._make_lock_key(key))
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -273,42 +347,51 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in six.iteritems(values)}
+            item = self._load_incr(key, values)
+            if item is not None:
+                super(RedisBuffer, self).process(*item)
+        finally:
+            client.delete(lock_key)
 
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
-                return
+    def _load_incr(self, key, values):
+        """
+        Decodes a buffer hash into ``(model, columns, filters, extra, signal_only)``,
+        or returns ``None`` if the hash was already consumed.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in six.iteritems(values)}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
 
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in six.iteritems(values):
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            super(RedisBuffer, self).process(model, incr_values, filters, extra_values, signal_only)
-        finally:
-            client.delete(lock_key)
+        if values["f"].startswith(b"{"):
+            filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in six.iteritems(values):
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
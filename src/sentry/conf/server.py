@@ -1174,6 +1174,12 @@ SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS = {}
 
+# Size in bytes of the in-process LRU cache layered in front of the
+# ``nodedata`` cache. Disabled when set to 0.
+SENTRY_NODESTORE_LOCAL_CACHE_SIZE = 0
+# Time in seconds before an item in the in-process node cache expires.
+SENTRY_NODESTORE_LOCAL_CACHE_TTL = 60
+
 # Tag storage backend
 SENTRY_TAGSTORE = os.environ.get("SENTRY_TAGSTORE", "sentry.tagstore.snuba.SnubaTagStorage")
 SENTRY_TAGSTORE_OPTIONS = {}
@@ -1192,6 +1198,11 @@ SENTRY_SEARCH_OPTIONS = {}
 SENTRY_TSDB = "sentry.tsdb.dummy.DummyTSDB"
 SENTRY_TSDB_OPTIONS = {}
 
+# Executor for the queries that the group serializers issue to load the
+# attributes of a page of issues. A ``sentry.utils.concurrent.ThreadedExecutor``
+# runs them concurrently, using one database connection per worker.
+SENTRY_GROUP_SERIALIZER_EXECUTOR = {"path": "sentry.utils.concurrent.SynchronousExecutor"}
+
 SENTRY_NEWSLETTER = "sentry.newsletter.base.Newsletter"
 SENTRY_NEWSLETTER_OPTIONS = {}
 
@@ -1259,6 +1270,11 @@ SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 # e.g. memcached defaults to 1MB  = 1024 * 1024
 SENTRY_CACHE_MAX_VALUE_SIZE = None
 
+# Maximum total size (in bytes) of the source maps that are kept parsed in
+# memory by each worker process. This counts the size of the raw source maps,
+# parsed source maps take up several times more memory. Disabled when set to 0.
+SENTRY_SOURCEMAP_CACHE_SIZE = 0
+
 # Fields which managed users cannot change via Sentry UI. Username and password
 # cannot be changed by managed users. Optionally include 'email' and
 # 'name' in SENTRY_MANAGED_USER_FIELDS.
@@ -4,7 +4,7 @@ import six
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
 from rest_framework.response import Response
-from sentry import features
+from sentry import features, options
 from sentry.api.base import EnvironmentMixin
 from sentry.api.bases.organization import OrganizationEndpoint, OrganizationDataExportPermission
 from sentry.api.event_search import get_filter, InvalidSearchQuery
@@ -135,7 +135,10 @@ class DataExportEndpoint(OrganizationEndpoint, EnvironmentMixin):
                     "dataexport.enqueue", tags={"query_type": data["query_type"]}, sample_rate=1.0
                 )
                 assemble_download.delay(
-                    data_export_id=data_export.id, export_limit=limit, environment_id=environment_id
+                    data_export_id=data_export.id,
+                    export_limit=limit,
+                    environment_id=environment_id,
+                    compress=options.get("dataexport.compress"),
                 )
                 status = 201
         except ValidationError as e:
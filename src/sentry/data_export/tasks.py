@@ -1,21 +1,25 @@
 from __future__ import absolute_import
 
 import csv
+import gzip
 import logging
 import six
-import tempfile
 import codecs
 
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha1
+from time import time
 
 from celery.task import current
 from celery.exceptions import MaxRetriesExceededError
+from django import db
 from django.core.files.base import ContentFile
 from django.db import transaction, IntegrityError
 from django.utils import timezone
 
 import sentry_sdk
 
+from sentry import options
 from sentry.models import (
     AssembleChecksumMismatch,
     DEFAULT_BLOB_SIZE,
@@ -58,6 +62,7 @@ def assemble_download(
     offset=0,
     bytes_written=0,
     environment_id=None,
+    compress=False,
     **kwargs
 ):
     with sentry_sdk.start_transaction(
@@ -103,42 +108,58 @@ def assemble_download(
 
             processor = get_processor(data_export, environment_id)
 
-            with tempfile.TemporaryFile(mode="w+b") as tf:
-                # XXX(python3):
-                #
-                # In python2 land we write utf-8 encoded strings as bytes via
-                # the csv writer (see convert_to_utf8). The CSV writer will
-                # ONLY write bytes, even if you give it unicode it will convert
-                # it to bytes.
-                #
-                # In python3 we write unicode strings (which is all the csv
-                # module is able to do, it will NOT write bytes like in py2).
-                # Because of this we use the codec getwriter to transform our
-                # file handle to a stream writer that will encode to utf8.
-                if six.PY2:
-                    tfw = tf
-                else:
-                    tfw = codecs.getwriter("utf-8")(tf)
-
-                writer = csv.DictWriter(tfw, processor.header_fields, extrasaction="ignore")
-                if first_page:
-                    writer.writeheader()
-
-                # the position in the file at the end of the headers
-                starting_pos = tf.tell()
-
-                # the row offset relative to the start of the current task
-                # this offset tells you the number of rows written during this batch fragment
-                fragment_offset = 0
-
-                # the absolute row offset from the beginning of the export
-                next_offset = offset + fragment_offset
-
-                while True:
-                    # the number of rows to export in the next batch fragment
-                    fragment_row_count = min(batch_size, max(export_limit - next_offset, 1))
-
-                    rows = process_rows(processor, data_export, fragment_row_count, next_offset)
+            concurrency = max(options.get("dataexport.fetch-concurrency"), 1)
+            started = time()
+
+            # Rows are streamed into blobs as they are written, and every task
+            # writes a complete gzip member if the export is compressed. The
+            # concatenation of all members is a valid gzip file.
+            blob_writer = ExportBlobWriter()
+            fileobj = gzip.GzipFile(fileobj=blob_writer, mode="wb") if compress else blob_writer
+
+            # XXX(python3):
+            #
+            # In python2 land we write utf-8 encoded strings as bytes via
+            # the csv writer (see convert_to_utf8). The CSV writer will
+            # ONLY write bytes, even if you give it unicode it will convert
+            # it to bytes.
+            #
+            # In python3 we write unicode strings (which is all the csv
+            # module is able to do, it will NOT write bytes like in py2).
+            # Because of this we use the codec getwriter to transform our
+            # file handle to a stream writer that will encode to utf8.
+            if six.PY2:
+                tfw = fileobj
+            else:
+                tfw = codecs.getwriter("utf-8")(fileobj)
+
+            writer = csv.DictWriter(tfw, processor.header_fields, extrasaction="ignore")
+            if first_page:
+                writer.writeheader()
+
+            # the row offset relative to the start of the current task
+            # this offset tells you the number of rows written during this batch fragment
+            fragment_offset = 0
+
+            # the absolute row offset from the beginning of the export
+            next_offset = offset + fragment_offset
+
+            done = False
+            while not done:
+                # the batch fragments to fetch concurrently, as (offset, row count) pairs
+                fragments = []
+                for fragment_start in range(
+                    next_offset, next_offset + concurrency * batch_size, batch_size
+                ):
+                    if fragments and fragment_start >= export_limit:
+                        break
+                    # the number of rows to export in the batch fragment
+                    fragment_row_count = min(batch_size, max(export_limit - fragment_start, 1))
+                    fragments.append((fragment_start, fragment_row_count))
+
+                # the fragments are written in order, and the ones following the
+                # end of the batch are discarded
+                for rows in process_fragments(processor, data_export, fragments):
                     writer.writerows(rows)
 
                     fragment_offset += len(rows)
@@ -147,14 +168,32 @@ def assemble_download(
                     if (
                         not rows
                         or len(rows) < batch_size
+                        or next_offset >= export_limit
                         # the batch may exceed MAX_BATCH_SIZE but immediately stops
-                        or tf.tell() - starting_pos >= MAX_BATCH_SIZE
+                        or blob_writer.size >= MAX_BATCH_SIZE
                     ):
+                        done = True
                         break
 
-                tf.seek(0)
-                new_bytes_written = store_export_chunk_as_blob(data_export, bytes_written, tf)
-                bytes_written += new_bytes_written
+            fileobj.close()
+            blob_writer.close()
+            new_bytes_written = store_export_chunk_as_blob(
+                data_export, bytes_written, blob_writer.blobs
+            )
+            bytes_written += new_bytes_written
+
+            duration = max(time() - started, 0.001)
+            logger.info(
+                "dataexport.fragment",
+                extra={
+                    "data_export_id": data_export_id,
+                    "offset": offset,
+                    "rows": fragment_offset,
+                    "bytes": blob_writer.size,
+                    "rows_per_second": fragment_offset / duration,
+                    "bytes_per_second": blob_writer.size / duration,
+                },
+            )
         except ExportError as error:
             return data_export.email_failure(message=six.text_type(error))
         except Exception as error:
@@ -189,11 +228,19 @@ def assemble_download(
                     offset=next_offset,
                     bytes_written=bytes_written,
                     environment_id=environment_id,
+                    compress=compress,
                 )
             else:
+                time_elapsed = max((timezone.now() - data_export.date_added).total_seconds(), 1)
                 metrics.timing("dataexport.row_count", next_offset, sample_rate=1.0)
                 metrics.timing("dataexport.file_size", bytes_written, sample_rate=1.0)
-                merge_export_blobs.delay(data_export_id)
+                metrics.timing(
+                    "dataexport.rows_per_second", next_offset / time_elapsed, sample_rate=1.0
+                )
+                metrics.timing(
+                    "dataexport.bytes_per_second", bytes_written / time_elapsed, sample_rate=1.0
+                )
+                merge_export_blobs.delay(data_export_id, compress=compress)
 
 
 def get_processor(data_export, environment_id):
@@ -218,6 +265,29 @@ def get_processor(data_export, environment_id):
         raise
 
 
+def process_fragments(processor, data_export, fragments):
+    """
+    Fetches the rows of several batch fragments, given as ``(offset, row
+    count)`` pairs, concurrently and returns them in the order of the
+    fragments.
+    """
+    if len(fragments) == 1:
+        ((offset, batch_size),) = fragments
+        return [process_rows(processor, data_export, batch_size, offset)]
+
+    def _process(fragment):
+        offset, batch_size = fragment
+        try:
+            return process_rows(processor, data_export, batch_size, offset)
+        finally:
+            # Database connections are per thread, and the threads of this
+            # pool do not outlive the fetch.
+            db.connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(fragments)) as executor:
+        return list(executor.map(_process, fragments))
+
+
 def process_rows(processor, data_export, batch_size, offset):
     try:
         if data_export.query_type == ExportQueryType.ISSUES_BY_TAG:
@@ -257,33 +327,72 @@ def process_discover(processor, limit, offset):
     return raw_data
 
 
+class ExportBlobWriter(object):
+    """
+    A write-only file object that stores everything written to it as blobs of
+    ``blob_size`` bytes as soon as they are complete, so that an export never
+    has to be staged in a temporary file. The last blob is stored on
+    ``close``.
+    """
+
+    def __init__(self, blob_size=DEFAULT_BLOB_SIZE):
+        self.blob_size = blob_size
+        self.blobs = []
+        self.size = 0
+        self._buffer = []
+        self._buffer_size = 0
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        self.size += len(data)
+        if self._buffer_size >= self.blob_size:
+            self._store_blobs()
+
+    def flush(self):
+        pass
+
+    def tell(self):
+        return self.size
+
+    def close(self):
+        self._store_blobs(final=True)
+
+    def _store_blobs(self, final=False):
+        # adapted from `putfile` in  `src/sentry/models/file.py`
+        contents = b"".join(self._buffer)
+        pos = 0
+        while len(contents) - pos >= self.blob_size or (final and pos < len(contents)):
+            blob_fileobj = ContentFile(contents[pos : pos + self.blob_size])
+            blob = FileBlob.from_file(blob_fileobj, logger=logger)
+            self.blobs.append(blob)
+            pos += blob.size
+
+        self._buffer = [contents[pos:]] if pos < len(contents) else []
+        self._buffer_size = len(contents) - pos
+
+
 @transaction.atomic()
-def store_export_chunk_as_blob(data_export, bytes_written, fileobj, blob_size=DEFAULT_BLOB_SIZE):
-    # adapted from `putfile` in  `src/sentry/models/file.py`
-    bytes_offset = 0
-    while True:
-        contents = fileobj.read(blob_size)
-        if not contents:
-            return bytes_offset
-
-        blob_fileobj = ContentFile(contents)
-        blob = FileBlob.from_file(blob_fileobj, logger=logger)
+def store_export_chunk_as_blob(data_export, bytes_written, blobs):
+    bytes_offset = sum(blob.size for blob in blobs)
+
+    # there is a maximum file size allowed, so we need to make sure we don't exceed it
+    # NOTE: there seems to be issues with downloading files larger than 1 GB on slower
+    # networks, limit the export to 1 GB for now to improve reliability
+    if bytes_written + bytes_offset >= min(MAX_FILE_SIZE, 2 ** 30):
+        return 0
+
+    for blob in blobs:
         ExportedDataBlob.objects.get_or_create(
-            data_export=data_export, blob=blob, offset=bytes_written + bytes_offset
+            data_export=data_export, blob=blob, offset=bytes_written
         )
+        bytes_written += blob.size
 
-        bytes_offset += blob.size
-
-        # there is a maximum file size allowed, so we need to make sure we don't exceed it
-        # NOTE: there seems to be issues with downloading files larger than 1 GB on slower
-        # networks, limit the export to 1 GB for now to improve reliability
-        if bytes_written + bytes_offset >= min(MAX_FILE_SIZE, 2 ** 30):
-            transaction.set_rollback(True)
-            return 0
+    return bytes_offset
 
 
 @instrumented_task(name="sentry.data_export.tasks.merge_blobs", queue="data_export", acks_late=True)
-def merge_export_blobs(data_export_id, **kwargs):
+def merge_export_blobs(data_export_id, compress=False, **kwargs):
     with sentry_sdk.start_transaction(
         op="task.data_export.merge", name="DataExportMerge", sampled=True,
     ):
@@ -312,9 +421,9 @@ def merge_export_blobs(data_export_id, **kwargs):
         try:
             with transaction.atomic():
                 file = File.objects.create(
-                    name=data_export.file_name,
+                    name=data_export.file_name + (".gz" if compress else ""),
                     type="export.csv",
-                    headers={"Content-Type": "text/csv"},
+                    headers={"Content-Type": "application/gzip" if compress else "text/csv"},
                 )
                 size = 0
                 file_checksum = sha1(b"")
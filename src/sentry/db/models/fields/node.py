@@ -142,13 +142,28 @@ class NodeData(collections.MutableMapping):
         if self._node_data is None:
             return
 
+        nodestore.set(self.id, self._get_data_to_write())
+
+    @classmethod
+    def save_many(cls, nodes):
+        """
+        Write the data of many nodes back to nodestore at once.
+        """
+        to_write = {
+            node.id: node._get_data_to_write() for node in nodes if node._node_data is not None
+        }
+        if len(to_write) == 1:
+            nodestore.set(*next(six.iteritems(to_write)))
+        elif to_write:
+            nodestore.set_multi(to_write)
+
+    def _get_data_to_write(self):
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
         to_write = self._node_data
         if isinstance(to_write, CANONICAL_TYPES):
             to_write = dict(to_write.items())
-
-        nodestore.set(self.id, to_write)
+        return to_write
 
 
 class NodeField(GzippedDictField):
@@ -493,3 +493,30 @@ class OptionManager(BaseManager):
     def _make_key(self, instance_id):
         assert instance_id
         return u"%s:%s" % (self.model._meta.db_table, instance_id)
+
+    def _get_all_values_bulk(self, instance_ids, field_name):
+        """
+        Like ``get_all_values`` for many instances at once, where
+        ``field_name`` is the foreign key the options belong to. Options of
+        instances missing from the cache are loaded with a single query.
+        """
+        cache_keys = {self._make_key(instance_id): instance_id for instance_id in instance_ids}
+        missing = [cache_key for cache_key in cache_keys if cache_key not in self._option_cache]
+
+        if missing:
+            cached = cache.get_many(missing)
+            self._option_cache.update(cached)
+
+            uncached = [cache_keys[cache_key] for cache_key in missing if cache_key not in cached]
+            if uncached:
+                attname = self.model._meta.get_field(field_name).attname
+                results = {self._make_key(instance_id): {} for instance_id in uncached}
+                for option in self.filter(**{"%s__in" % field_name: uncached}):
+                    results[self._make_key(getattr(option, attname))][option.key] = option.value
+                cache.set_many(results)
+                self._option_cache.update(results)
+
+        return {
+            instance_id: self._option_cache.get(cache_key, {})
+            for cache_key, instance_id in six.iteritems(cache_keys)
+        }
@@ -21,6 +21,41 @@ class Record(namedtuple("Record", "key value timestamp")):
         return to_datetime(self.timestamp)
 
 
+class LazyRecord(Record):
+    """
+    A record that holds the encoded value as returned by a backend, and only
+    decodes it with ``codec`` when it is first accessed.
+    """
+
+    def __new__(cls, key, value, timestamp, codec):
+        self = super(LazyRecord, cls).__new__(cls, key, value, timestamp)
+        self.codec = codec
+        return self
+
+    @property
+    def value(self):
+        try:
+            return self._decoded_value
+        except AttributeError:
+            self._decoded_value = self.codec.decode(self[1])
+            return self._decoded_value
+
+    def _as_record(self):
+        return Record(self.key, self.value, self.timestamp)
+
+    def __eq__(self, other):
+        return self._as_record() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._as_record())
+
+    def __reduce__(self):
+        return (Record, tuple(self._as_record()))
+
+
 ScheduleEntry = namedtuple("ScheduleEntry", "key timestamp")
 
 OPTIONS = frozenset(("increment_delay", "maximum_delay", "minimum_delay"))
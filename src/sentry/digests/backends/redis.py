@@ -7,13 +7,12 @@ import time
 from contextlib import contextmanager
 from redis.client import ResponseError
 
-from sentry.digests import Record, ScheduleEntry
+from sentry.digests import LazyRecord, ScheduleEntry
 from sentry.digests.backends.base import Backend, InvalidState
 from sentry.utils.locking.backends.redis import RedisLockBackend
 from sentry.utils.locking.manager import LockManager
 from sentry.utils.redis import check_cluster_versions, get_cluster_from_options, load_script
 from sentry.utils.versioning import Version
-from sentry.utils.compat import map
 
 logger = logging.getLogger("sentry.digests")
 
@@ -205,27 +204,21 @@ class RedisBackend(Backend):
                 else:
                     raise
 
-            records = map(
-                lambda key__value__timestamp: Record(
-                    key__value__timestamp[0].decode("utf-8"),
-                    self.codec.decode(key__value__timestamp[1])
-                    if key__value__timestamp[1] is not None
-                    else None,
-                    float(key__value__timestamp[2]),
-                ),
-                response,
-            )
-
             # If the record value is `None`, this means the record data was
             # missing (it was presumably evicted by Redis) so we don't need to
-            # return it here.
-            yield [record for record in records if record.value is not None]
+            # return it here. The other values are only decoded when they are
+            # accessed.
+            yield [
+                LazyRecord(record_key.decode("utf-8"), value, float(record_timestamp), self.codec)
+                for record_key, value, record_timestamp in response
+                if value is not None
+            ]
 
             script(
                 connection,
                 [key],
                 ["DIGEST_CLOSE", self.namespace, self.ttl, timestamp, key, minimum_delay]
-                + [record.key for record in records],
+                + [record_key for record_key, _, _ in response],
             )
 
     def delete(self, key, timestamp=None):
@@ -11,6 +11,7 @@ from six.moves import reduce
 from sentry.app import tsdb
 from sentry.digests import Record
 from sentry.models import Project, Group, GroupStatus, Rule
+from sentry.tsdb.base import TSDBRequest
 from sentry.utils.dates import to_timestamp
 
 logger = logging.getLogger("sentry.digests")
@@ -45,14 +46,46 @@ def event_to_record(event, rules):
     if not rules:
         logger.warning("Creating record for %r that does not contain any rules!", event)
 
+    # The group is part of the key, so that digests can be built without
+    # decoding the records of groups that are left out.
     return Record(
-        event.event_id,
+        u"{}:{}".format(event.event_id, event.group_id),
         Notification(event, [rule.id for rule in rules]),
         to_timestamp(event.datetime),
     )
 
 
-def fetch_state(project, records):
+def get_record_group_id(record):
+    __, __, group_id = record.key.partition(":")
+    if group_id:
+        return int(group_id)
+    # Records that are only keyed by event ID need to be decoded.
+    return record.value.event.group_id
+
+
+def select_records(records, groups, max_records_per_group=None):
+    """
+    Returns the records of the unresolved groups in ``groups``, keeping at
+    most ``max_records_per_group`` records of each group. The other records
+    are discarded without being decoded.
+    """
+    selected = []
+    group_record_counts = defaultdict(int)
+    for record in records:
+        group = groups.get(get_record_group_id(record))
+        if group is None or group.get_status() != GroupStatus.UNRESOLVED:
+            continue
+
+        if max_records_per_group and group_record_counts[group.id] >= max_records_per_group:
+            continue
+
+        group_record_counts[group.id] += 1
+        selected.append(record)
+
+    return selected
+
+
+def fetch_state(project, records, max_records_per_group=None):
     # This reads a little strange, but remember that records are returned in
     # reverse chronological order, and we query the database in chronological
     # order.
@@ -60,17 +93,35 @@ def fetch_state(project, records):
     start = records[-1].datetime
     end = records[0].datetime
 
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
+    # Groups are not read from the cache, as their status decides which
+    # records are part of the digest.
+    groups = Group.objects.in_bulk(set(get_record_group_id(record) for record in records))
+    for group in six.itervalues(groups):
+        # The status of a group depends on options of its project.
+        group.project = project
+    records = select_records(records, groups, max_records_per_group)
+
+    group_ids = list(set(get_record_group_id(record) for record in records))
+    event_counts, user_counts = tsdb.get_many(
+        [
+            TSDBRequest("get_sums", tsdb.models.group, group_ids, start, end),
+            TSDBRequest(
+                "get_distinct_counts_totals",
+                tsdb.models.users_affected_by_group,
+                group_ids,
+                start,
+                end,
+            ),
+        ]
+    )
+
+    rule_ids = set(itertools.chain.from_iterable(record.value.rules for record in records))
     return {
         "project": project,
         "groups": groups,
-        "rules": Rule.objects.in_bulk(
-            itertools.chain.from_iterable(record.value.rules for record in records)
-        ),
-        "event_counts": tsdb.get_sums(tsdb.models.group, list(groups.keys()), start, end),
-        "user_counts": tsdb.get_distinct_counts_totals(
-            tsdb.models.users_affected_by_group, list(groups.keys()), start, end
-        ),
+        "rules": {rule.id: rule for rule in Rule.objects.get_many_from_cache(rule_ids)},
+        "event_counts": event_counts,
+        "user_counts": user_counts,
     }
 
 
@@ -192,7 +243,7 @@ def sort_rule_groups(rules):
     )
 
 
-def build_digest(project, records, state=None):
+def build_digest(project, records, state=None, max_records_per_group=None):
     records = list(records)
     if not records:
         return
@@ -200,10 +251,13 @@ def build_digest(project, records, state=None):
     # XXX: This is a hack to allow generating a mock digest without actually
     # doing any real IO!
     if state is None:
-        state = fetch_state(project, records)
+        state = fetch_state(project, records, max_records_per_group)
 
     state = attach_state(**state)
 
+    # Only the records that end up in the digest are decoded by the pipeline.
+    records = select_records(records, state["groups"], max_records_per_group)
+
     def check_group_state(record):
         return record.value.event.group.get_status() == GroupStatus.UNRESOLVED
 
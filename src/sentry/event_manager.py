@@ -11,11 +11,13 @@ from django.conf import settings
 from django.core.cache import cache
 from django.db import connection, IntegrityError, router, transaction
 from django.db.models import Func
+from django.db.models.signals import post_save
 from django.utils.encoding import force_text
 from pytz import UTC
 
 from sentry import buffer, eventstore, eventtypes, eventstream, features, tsdb
 from sentry.attachments import MissingAttachmentChunks, attachment_cache
+from sentry.db.models.fields.node import NodeData
 from sentry.constants import (
     DataCategory,
     DEFAULT_STORE_NORMALIZER_ARGS,
@@ -33,6 +35,7 @@ from sentry.grouping.api import (
 from sentry.lang.native.utils import STORE_CRASH_REPORTS_ALL, convert_crashreport_count
 from sentry.models import (
     Activity,
+    Counter,
     Environment,
     EventAttachment,
     EventDict,
@@ -69,7 +72,6 @@ from sentry.utils.outcomes import Outcome, track_outcome
 from sentry.utils.safe import safe_execute, trim, get_path, setdefault_path
 from sentry.stacktraces.processing import normalize_stacktraces_for_grouping
 from sentry.culprit import generate_culprit
-from sentry.utils.compat import map
 from sentry.reprocessing2 import save_unprocessed_event, is_reprocessed_event
 
 logger = logging.getLogger("sentry.events")
@@ -305,205 +307,17 @@ class EventManager(object):
             jobs = save_transaction_events([job], projects)
             return jobs[0]["event"]
 
-        with metrics.timer("event_manager.save.organization.get_from_cache"):
-            project._organization_cache = Organization.objects.get_from_cache(
-                id=project.organization_id
-            )
-
-        job = {"data": self._data, "project_id": project_id, "raw": raw, "start_time": start_time}
-        jobs = [job]
-
-        is_reprocessed = is_reprocessed_event(job["data"])
-
-        _pull_out_data(jobs, projects)
-        _get_or_create_release_many(jobs, projects)
-        _get_event_user_many(jobs, projects)
-
-        job["project_key"] = None
-        if job["key_id"] is not None:
-            with metrics.timer("event_manager.load_project_key"):
-                try:
-                    job["project_key"] = ProjectKey.objects.get_from_cache(id=job["key_id"])
-                except ProjectKey.DoesNotExist:
-                    pass
-
-        with metrics.timer("event_manager.load_grouping_config"):
-            # At this point we want to normalize the in_app values in case the
-            # clients did not set this appropriately so far.
-            grouping_config = load_grouping_config(
-                get_grouping_config_dict_for_event_data(job["data"], project)
-            )
-
-        with metrics.timer("event_manager.normalize_stacktraces_for_grouping"):
-            normalize_stacktraces_for_grouping(job["data"], grouping_config)
-
-        _derive_plugin_tags_many(jobs, projects)
-        _derive_interface_tags_many(jobs)
-
-        with metrics.timer("event_manager.apply_server_fingerprinting"):
-            # The active grouping config was put into the event in the
-            # normalize step before.  We now also make sure that the
-            # fingerprint was set to `'{{ default }}' just in case someone
-            # removed it from the payload.  The call to get_hashes will then
-            # look at `grouping_config` to pick the right parameters.
-            job["data"]["fingerprint"] = job["data"].get("fingerprint") or ["{{ default }}"]
-            apply_server_fingerprinting(
-                job["data"],
-                get_fingerprinting_config_for_project(project),
-                allow_custom_title=features.has(
-                    "organizations:custom-event-title", project.organization, actor=None
-                ),
-            )
-
-        with metrics.timer("event_manager.event.get_hashes"):
-            # Here we try to use the grouping config that was requested in the
-            # event.  If that config has since been deleted (because it was an
-            # experimental grouping config) we fall back to the default.
-            try:
-                hashes = job["event"].get_hashes()
-            except GroupingConfigNotFound:
-                job["data"]["grouping_config"] = get_grouping_config_dict_for_project(project)
-                hashes = job["event"].get_hashes()
-
-        job["data"]["hashes"] = hashes
-
-        _materialize_metadata_many(jobs)
-
-        # The group gets the same metadata as the event when it's flushed but
-        # additionally the `last_received` key is set.  This key is used by
-        # _save_aggregate.
-        group_metadata = dict(job["materialized_metadata"])
-        group_metadata["last_received"] = job["received_timestamp"]
-        kwargs = {
-            "platform": job["platform"],
-            "message": job["event"].search_message,
-            "culprit": job["culprit"],
-            "logger": job["logger_name"],
-            "level": LOG_LEVELS_MAP.get(job["level"]),
-            "last_seen": job["event"].datetime,
-            "first_seen": job["event"].datetime,
-            "active_at": job["event"].datetime,
-            "data": group_metadata,
+        job = {
+            "data": self._data,
+            "project_id": project_id,
+            "raw": raw,
+            "start_time": start_time,
+            "cache_key": cache_key,
         }
+        save_error_events([job], projects)
 
-        if job["release"]:
-            kwargs["first_release"] = job["release"]
-
-        # Load attachments first, but persist them at the very last after
-        # posting to eventstream to make sure all counters and eventstream are
-        # incremented for sure. Also wait for grouping to remove attachments
-        # based on the group counter.
-        with metrics.timer("event_manager.get_attachments"):
-            attachments = get_attachments(cache_key, job)
-
-        try:
-            job["group"], job["is_new"], job["is_regression"] = _save_aggregate(
-                event=job["event"], hashes=hashes, release=job["release"], **kwargs
-            )
-        except HashDiscarded:
-            discard_event(job, attachments)
-            raise
-
-        job["event"].group = job["group"]
-
-        # store a reference to the group id to guarantee validation of isolation
-        # XXX(markus): No clue what this does
-        job["event"].data.bind_ref(job["event"])
-
-        _get_or_create_environment_many(jobs, projects)
-
-        if job["group"]:
-            group_environment, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
-                group_id=job["group"].id,
-                environment_id=job["environment"].id,
-                defaults={"first_release": job["release"] or None},
-            )
-        else:
-            job["is_new_group_environment"] = False
-
-        _get_or_create_release_associated_models(jobs, projects)
-
-        if job["release"] and job["group"]:
-            job["grouprelease"] = GroupRelease.get_or_create(
-                group=job["group"],
-                release=job["release"],
-                environment=job["environment"],
-                datetime=job["event"].datetime,
-            )
-
-        _tsdb_record_all_metrics(jobs)
-
-        if job["group"]:
-            UserReport.objects.filter(project=project, event_id=job["event"].event_id).update(
-                group=job["group"], environment=job["environment"]
-            )
-
-        with metrics.timer("event_manager.filter_attachments_for_group"):
-            attachments = filter_attachments_for_group(attachments, job)
-
-        # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
-        _materialize_event_metrics(jobs)
-
-        for attachment in attachments:
-            key = "bytes.stored.%s" % (attachment.type,)
-            old_bytes = job["event_metrics"].get(key) or 0
-            job["event_metrics"][key] = old_bytes + attachment.size
-
-        _nodestore_save_many(jobs)
-        save_unprocessed_event(project, event_id=job["event"].event_id)
-
-        if job["release"]:
-            if job["is_new"]:
-                buffer.incr(
-                    ReleaseProject,
-                    {"new_groups": 1},
-                    {"release_id": job["release"].id, "project_id": project.id},
-                )
-            if job["is_new_group_environment"]:
-                buffer.incr(
-                    ReleaseProjectEnvironment,
-                    {"new_issues_count": 1},
-                    {
-                        "project_id": project.id,
-                        "release_id": job["release"].id,
-                        "environment_id": job["environment"].id,
-                    },
-                )
-
-        if not raw:
-            if not project.first_event:
-                project.update(first_event=job["event"].datetime)
-                first_event_received.send_robust(
-                    project=project, event=job["event"], sender=Project
-                )
-
-        _eventstream_insert_many(jobs)
-
-        # Do this last to ensure signals get emitted even if connection to the
-        # file store breaks temporarily.
-        #
-        # We do not need this for reprocessed events as for those we update the
-        # group_id on existing models in post_process_group, which already does
-        # this because of indiv. attachments.
-        if not is_reprocessed:
-            with metrics.timer("event_manager.save_attachments"):
-                save_attachments(cache_key, attachments, job)
-
-        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
-
-        metrics.timing(
-            "events.latency",
-            job["received_timestamp"] - job["recorded_timestamp"],
-            tags=metric_tags,
-        )
-        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
-        metrics.incr(
-            "events.post_save.normalize.errors",
-            amount=len(job["data"].get("errors") or ()),
-            tags=metric_tags,
-        )
-
-        _track_outcome_accepted_many(jobs)
+        if job.get("discarded"):
+            raise job["discarded"]
 
         self._data = job["event"].data.data
         return job["event"]
@@ -702,17 +516,28 @@ def _tsdb_record_all_metrics(jobs):
 
     # XXX: validate whether anybody actually uses those metrics
 
-    for job in jobs:
-        incrs = []
-        frequencies = []
-        records = []
+    # Events whose timestamps fall into the same bucket of every rollup and
+    # that share an environment are written with a single call.
+    rollups = list(tsdb.get_rollups())
+    resolution = min(rollups)
+    if any(rollup % resolution for rollup in rollups):
+        resolution = 1
 
-        incrs.append((tsdb.models.project, job["project_id"]))
+    batches = {}
+
+    for job in jobs:
         event = job["event"]
         group = job["group"]
         release = job["release"]
         environment = job["environment"]
 
+        batch_key = (tsdb.normalize_to_epoch(event.datetime, resolution), environment.id)
+        if batch_key not in batches:
+            batches[batch_key] = (event.datetime, environment.id, [], [], [])
+        _, _, incrs, frequencies, records = batches[batch_key]
+
+        incrs.append((tsdb.models.project, job["project_id"]))
+
         if group:
             incrs.append((tsdb.models.group, group.id))
             frequencies.append(
@@ -739,21 +564,21 @@ def _tsdb_record_all_metrics(jobs):
             if group:
                 records.append((tsdb.models.users_affected_by_group, group.id, (user.tag_value,)))
 
+    for timestamp, environment_id, incrs, frequencies, records in six.itervalues(batches):
         if incrs:
-            tsdb.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
+            tsdb.incr_multi(incrs, timestamp=timestamp, environment_id=environment_id)
 
         if records:
-            tsdb.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
+            tsdb.record_multi(records, timestamp=timestamp, environment_id=environment_id)
 
         if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+            tsdb.record_frequency_multi(frequencies, timestamp=timestamp)
 
 
 @metrics.wraps("save_event.nodestore_save_many")
 def _nodestore_save_many(jobs):
-    for job in jobs:
-        # Write the event to Nodestore
-        job["event"].data.save()
+    # Write the events to Nodestore
+    NodeData.save_many([job["event"].data for job in jobs])
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
@@ -892,87 +717,6 @@ def get_culprit(data):
     )
 
 
-def _save_aggregate(event, hashes, release, **kwargs):
-    project = event.project
-
-    # attempt to find a matching hash
-    all_hashes = _find_hashes(project, hashes)
-
-    existing_group_id = None
-    for h in all_hashes:
-        if h.group_id is not None:
-            existing_group_id = h.group_id
-            break
-        if h.group_tombstone_id is not None:
-            raise HashDiscarded("Matches group tombstone %s" % h.group_tombstone_id)
-
-    # XXX(dcramer): this has the opportunity to create duplicate groups
-    # it should be resolved by the hash merging function later but this
-    # should be better tested/reviewed
-    if existing_group_id is None:
-        # it's possible the release was deleted between
-        # when we queried for the release and now, so
-        # make sure it still exists
-        first_release = kwargs.pop("first_release", None)
-
-        short_id = project.next_short_id()
-
-        with transaction.atomic():
-            group, group_is_new = (
-                Group.objects.create(
-                    project=project,
-                    short_id=short_id,
-                    first_release_id=Release.objects.filter(id=first_release.id)
-                    .values_list("id", flat=True)
-                    .first()
-                    if first_release
-                    else None,
-                    **kwargs
-                ),
-                True,
-            )
-
-        metrics.incr(
-            "group.created", skip_internal=True, tags={"platform": event.platform or "unknown"}
-        )
-
-    else:
-        group = Group.objects.get(id=existing_group_id)
-
-        group_is_new = False
-
-    group._project_cache = project
-
-    # If all hashes are brand new we treat this event as new
-    is_new = False
-    new_hashes = [h for h in all_hashes if h.group_id is None]
-    if new_hashes:
-        # XXX: There is a race condition here wherein another process could
-        # create a new group that is associated with one of the new hashes,
-        # add some event(s) to it, and then subsequently have the hash
-        # "stolen" by this process. This then "orphans" those events from
-        # their "siblings" in the group we've created here. We don't have a
-        # way to fix this, since we can't update the group on those hashes
-        # without filtering on `group_id` (which we can't do due to query
-        # planner weirdness.) For more context, see 84c6f75a and d0e22787,
-        # as well as GH-5085.
-        GroupHash.objects.filter(id__in=[h.id for h in new_hashes]).exclude(
-            state=GroupHash.State.LOCKED_IN_MIGRATION
-        ).update(group=group)
-
-        if group_is_new and len(new_hashes) == len(all_hashes):
-            is_new = True
-
-    if not is_new:
-        is_regression = _process_existing_aggregate(
-            group=group, event=event, data=kwargs, release=release
-        )
-    else:
-        is_regression = False
-
-    return group, is_new, is_regression
-
-
 def _handle_regression(group, event, release):
     if not group.is_resolved():
         return
@@ -1366,12 +1110,6 @@ def save_attachments(cache_key, attachments, job):
         )
 
 
-def _find_hashes(project, hash_list):
-    return map(
-        lambda hash: GroupHash.objects.get_or_create(project=project, hash=hash)[0], hash_list
-    )
-
-
 @metrics.wraps("event_manager.save_transactions.materialize_event_metrics")
 def _materialize_event_metrics(jobs):
     for job in jobs:
@@ -1430,3 +1168,430 @@ def save_transaction_events(jobs, projects):
     _eventstream_insert_many(jobs)
     _track_outcome_accepted_many(jobs)
     return jobs
+
+
+@metrics.wraps("save_event.find_hashes_many")
+def _find_hashes_many(jobs, projects):
+    """
+    Resolves the ``GroupHash`` rows for all jobs with one query per project,
+    creating the ones that do not exist yet. Jobs that share a hash share the
+    same ``GroupHash`` instance, so that a group created for one job is seen by
+    the following ones.
+    """
+    hashes_by_project = {}
+    for job in jobs:
+        hashes_by_project.setdefault(job["project_id"], set()).update(job["data"]["hashes"])
+
+    for project_id, hashes in six.iteritems(hashes_by_project):
+        group_hashes = {
+            h.hash: h for h in GroupHash.objects.filter(project_id=project_id, hash__in=hashes)
+        }
+        for hash in hashes:
+            if hash not in group_hashes:
+                group_hashes[hash] = GroupHash.objects.get_or_create(
+                    project=projects[project_id], hash=hash
+                )[0]
+        hashes_by_project[project_id] = group_hashes
+
+    for job in jobs:
+        group_hashes = hashes_by_project[job["project_id"]]
+        job["all_hashes"] = [group_hashes[hash] for hash in job["data"]["hashes"]]
+
+
+@metrics.wraps("save_event.create_groups_many")
+def _create_groups_many(jobs):
+    """
+    Creates a new group for each job with one insert, allocating the short IDs
+    of each project in one go.
+    """
+    # it's possible the release was deleted between
+    # when we queried for the release and now, so
+    # make sure it still exists
+    release_ids = set(
+        job["group_kwargs"]["first_release"].id
+        for job in jobs
+        if "first_release" in job["group_kwargs"]
+    )
+    if release_ids:
+        release_ids = set(Release.objects.filter(id__in=release_ids).values_list("id", flat=True))
+
+    jobs_by_project = {}
+    for job in jobs:
+        jobs_by_project.setdefault(job["project_id"], []).append(job)
+
+    groups = []
+    for project_jobs in six.itervalues(jobs_by_project):
+        project = project_jobs[0]["event"].project
+        last_short_id = Counter.increment(project, len(project_jobs))
+        first_short_id = last_short_id - len(project_jobs) + 1
+        for short_id, job in enumerate(project_jobs, first_short_id):
+            kwargs = dict(job["group_kwargs"])
+            first_release = kwargs.pop("first_release", None)
+            group = Group(
+                project=project,
+                short_id=short_id,
+                first_release_id=first_release.id
+                if first_release and first_release.id in release_ids
+                else None,
+                **kwargs
+            )
+            group.set_defaults()
+            job["group"] = group
+            groups.append(group)
+
+    with transaction.atomic():
+        Group.objects.bulk_create(groups)
+
+    using = router.db_for_write(Group)
+    for job in jobs:
+        # bulk_create does not send any signals
+        post_save.send(sender=Group, instance=job["group"], created=True, raw=False, using=using)
+        metrics.incr(
+            "group.created",
+            skip_internal=True,
+            tags={"platform": job["event"].platform or "unknown"},
+        )
+
+
+@metrics.wraps("save_event.save_aggregate_many")
+def _save_aggregate_many(jobs):
+    """
+    Assigns a group to every job, in order. A job joins the group of the first
+    of its hashes that has one, which includes the groups created for earlier
+    jobs of the batch. Otherwise a new group is created for it, unless one of
+    its hashes matches a group tombstone: then the event is discarded.
+    """
+    existing_group_ids = set()
+    for job in jobs:
+        for h in job["all_hashes"]:
+            if h.group_id is not None:
+                existing_group_ids.add(h.group_id)
+                break
+
+    groups = Group.objects.in_bulk(existing_group_ids)
+
+    # Hashes without a group that are taken by a group created for an earlier
+    # job, keyed by the ``id()`` of the ``GroupHash`` instance (which is shared
+    # between jobs, see ``_find_hashes_many``.) Groups that do not exist yet
+    # are identified by the job creating them.
+    claimed_hashes = {}
+    new_hashes_by_group = {}
+    new_group_jobs = []
+
+    for job in jobs:
+        group_key = None
+        for h in job["all_hashes"]:
+            if h.group_id is not None:
+                group_key = h.group_id
+                break
+            if id(h) in claimed_hashes:
+                group_key = claimed_hashes[id(h)]
+                break
+            if h.group_tombstone_id is not None:
+                discard_event(job, job["attachments"])
+                job["discarded"] = HashDiscarded(
+                    "Matches group tombstone %s" % h.group_tombstone_id
+                )
+                break
+
+        if job.get("discarded"):
+            continue
+
+        # XXX(dcramer): this has the opportunity to create duplicate groups
+        # it should be resolved by the hash merging function later but this
+        # should be better tested/reviewed
+        if group_key is None:
+            group_key = ("new", id(job))
+            new_group_jobs.append(job)
+
+            # If all hashes are brand new we treat this event as new, which
+            # is always the case for the job creating the group.
+            job["is_new"] = True
+        else:
+            job["is_new"] = False
+
+        job["group_key"] = group_key
+
+        new_hashes = [
+            h for h in job["all_hashes"] if h.group_id is None and id(h) not in claimed_hashes
+        ]
+        for h in new_hashes:
+            if h.state != GroupHash.State.LOCKED_IN_MIGRATION:
+                claimed_hashes[id(h)] = group_key
+        new_hashes_by_group.setdefault(group_key, []).extend(new_hashes)
+
+    if new_group_jobs:
+        _create_groups_many(new_group_jobs)
+        for job in new_group_jobs:
+            groups[job["group_key"]] = job["group"]
+
+    for group_key, new_hashes in six.iteritems(new_hashes_by_group):
+        if not new_hashes:
+            continue
+
+        if group_key not in groups:
+            groups[group_key] = Group.objects.get(id=group_key)
+        group = groups[group_key]
+
+        # XXX: There is a race condition here wherein another process could
+        # create a new group that is associated with one of the new hashes,
+        # add some event(s) to it, and then subsequently have the hash
+        # "stolen" by this process. This then "orphans" those events from
+        # their "siblings" in the group we've created here. We don't have a
+        # way to fix this, since we can't update the group on those hashes
+        # without filtering on `group_id` (which we can't do due to query
+        # planner weirdness.) For more context, see 84c6f75a and d0e22787,
+        # as well as GH-5085.
+        GroupHash.objects.filter(id__in=[h.id for h in new_hashes]).exclude(
+            state=GroupHash.State.LOCKED_IN_MIGRATION
+        ).update(group=group)
+
+        for h in new_hashes:
+            if h.state != GroupHash.State.LOCKED_IN_MIGRATION:
+                h.group_id = group.id
+
+    for job in jobs:
+        if job.get("discarded"):
+            continue
+
+        group_key = job.pop("group_key")
+        if group_key not in groups:
+            groups[group_key] = Group.objects.get(id=group_key)
+        group = job["group"] = groups[group_key]
+        group._project_cache = job["event"].project
+
+        if job["is_new"]:
+            job["is_regression"] = False
+        else:
+            job["is_regression"] = _process_existing_aggregate(
+                group=group, event=job["event"], data=job["group_kwargs"], release=job["release"]
+            )
+
+        job["event"].group = group
+
+        # store a reference to the group id to guarantee validation of isolation
+        # XXX(markus): No clue what this does
+        job["event"].data.bind_ref(job["event"])
+
+
+@metrics.wraps("event_manager.save_error_events")
+def save_error_events(jobs, projects):
+    """
+    Saves many error events at once. Every job needs ``data``, ``project_id``,
+    ``raw``, ``start_time`` and ``cache_key``; after the call it holds the
+    saved ``event`` and its ``group``.
+
+    Events that are discarded because they match a group tombstone are marked
+    with ``job["discarded"]`` and skipped, the other jobs are saved normally.
+    """
+    with metrics.timer("event_manager.save_error_events.fetch_organizations"):
+        organization_ids = set(project.organization_id for project in six.itervalues(projects))
+        organizations = {
+            o.id: o for o in Organization.objects.get_many_from_cache(organization_ids)
+        }
+        for project in six.itervalues(projects):
+            try:
+                project._organization_cache = organizations[project.organization_id]
+            except KeyError:
+                continue
+
+    is_reprocessed = {id(job): is_reprocessed_event(job["data"]) for job in jobs}
+
+    _pull_out_data(jobs, projects)
+    _get_or_create_release_many(jobs, projects)
+    _get_event_user_many(jobs, projects)
+
+    with metrics.timer("event_manager.load_project_key"):
+        key_ids = set(job["key_id"] for job in jobs if job["key_id"] is not None)
+        project_keys = {k.id: k for k in ProjectKey.objects.get_many_from_cache(key_ids)}
+        for job in jobs:
+            job["project_key"] = project_keys.get(job["key_id"])
+
+    for job in jobs:
+        project = projects[job["project_id"]]
+
+        with metrics.timer("event_manager.load_grouping_config"):
+            # At this point we want to normalize the in_app values in case the
+            # clients did not set this appropriately so far.
+            grouping_config = load_grouping_config(
+                get_grouping_config_dict_for_event_data(job["data"], project)
+            )
+
+        with metrics.timer("event_manager.normalize_stacktraces_for_grouping"):
+            normalize_stacktraces_for_grouping(job["data"], grouping_config)
+
+    _derive_plugin_tags_many(jobs, projects)
+    _derive_interface_tags_many(jobs)
+
+    for job in jobs:
+        project = projects[job["project_id"]]
+
+        with metrics.timer("event_manager.apply_server_fingerprinting"):
+            # The active grouping config was put into the event in the
+            # normalize step before.  We now also make sure that the
+            # fingerprint was set to `'{{ default }}' just in case someone
+            # removed it from the payload.  The call to get_hashes will then
+            # look at `grouping_config` to pick the right parameters.
+            job["data"]["fingerprint"] = job["data"].get("fingerprint") or ["{{ default }}"]
+            apply_server_fingerprinting(
+                job["data"],
+                get_fingerprinting_config_for_project(project),
+                allow_custom_title=features.has(
+                    "organizations:custom-event-title", project.organization, actor=None
+                ),
+            )
+
+        with metrics.timer("event_manager.event.get_hashes"):
+            # Here we try to use the grouping config that was requested in the
+            # event.  If that config has since been deleted (because it was an
+            # experimental grouping config) we fall back to the default.
+            try:
+                hashes = job["event"].get_hashes()
+            except GroupingConfigNotFound:
+                job["data"]["grouping_config"] = get_grouping_config_dict_for_project(project)
+                hashes = job["event"].get_hashes()
+
+        job["data"]["hashes"] = hashes
+
+    _materialize_metadata_many(jobs)
+
+    for job in jobs:
+        # The group gets the same metadata as the event when it's flushed but
+        # additionally the `last_received` key is set.  This key is used by
+        # _save_aggregate.
+        group_metadata = dict(job["materialized_metadata"])
+        group_metadata["last_received"] = job["received_timestamp"]
+        job["group_kwargs"] = kwargs = {
+            "platform": job["platform"],
+            "message": job["event"].search_message,
+            "culprit": job["culprit"],
+            "logger": job["logger_name"],
+            "level": LOG_LEVELS_MAP.get(job["level"]),
+            "last_seen": job["event"].datetime,
+            "first_seen": job["event"].datetime,
+            "active_at": job["event"].datetime,
+            "data": group_metadata,
+        }
+
+        if job["release"]:
+            kwargs["first_release"] = job["release"]
+
+        # Load attachments first, but persist them at the very last after
+        # posting to eventstream to make sure all counters and eventstream are
+        # incremented for sure. Also wait for grouping to remove attachments
+        # based on the group counter.
+        with metrics.timer("event_manager.get_attachments"):
+            job["attachments"] = get_attachments(job["cache_key"], job)
+
+    _find_hashes_many(jobs, projects)
+    _save_aggregate_many(jobs)
+
+    discarded_jobs = [job for job in jobs if job.get("discarded")]
+    if discarded_jobs:
+        jobs = [job for job in jobs if not job.get("discarded")]
+        if not jobs:
+            return discarded_jobs
+
+    _get_or_create_environment_many(jobs, projects)
+
+    for job in jobs:
+        if job["group"]:
+            group_environment, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
+                group_id=job["group"].id,
+                environment_id=job["environment"].id,
+                defaults={"first_release": job["release"] or None},
+            )
+        else:
+            job["is_new_group_environment"] = False
+
+    _get_or_create_release_associated_models(jobs, projects)
+
+    for job in jobs:
+        if job["release"] and job["group"]:
+            job["grouprelease"] = GroupRelease.get_or_create(
+                group=job["group"],
+                release=job["release"],
+                environment=job["environment"],
+                datetime=job["event"].datetime,
+            )
+
+    _tsdb_record_all_metrics(jobs)
+
+    for job in jobs:
+        if job["group"]:
+            UserReport.objects.filter(
+                project_id=job["project_id"], event_id=job["event"].event_id
+            ).update(group=job["group"], environment=job["environment"])
+
+        with metrics.timer("event_manager.filter_attachments_for_group"):
+            job["attachments"] = filter_attachments_for_group(job["attachments"], job)
+
+    # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
+    _materialize_event_metrics(jobs)
+
+    for job in jobs:
+        for attachment in job["attachments"]:
+            key = "bytes.stored.%s" % (attachment.type,)
+            old_bytes = job["event_metrics"].get(key) or 0
+            job["event_metrics"][key] = old_bytes + attachment.size
+
+    _nodestore_save_many(jobs)
+
+    for job in jobs:
+        project = projects[job["project_id"]]
+        save_unprocessed_event(project, event_id=job["event"].event_id)
+
+        if job["release"]:
+            if job["is_new"]:
+                buffer.incr(
+                    ReleaseProject,
+                    {"new_groups": 1},
+                    {"release_id": job["release"].id, "project_id": project.id},
+                )
+            if job["is_new_group_environment"]:
+                buffer.incr(
+                    ReleaseProjectEnvironment,
+                    {"new_issues_count": 1},
+                    {
+                        "project_id": project.id,
+                        "release_id": job["release"].id,
+                        "environment_id": job["environment"].id,
+                    },
+                )
+
+        if not job["raw"]:
+            if not project.first_event:
+                project.update(first_event=job["event"].datetime)
+                first_event_received.send_robust(
+                    project=project, event=job["event"], sender=Project
+                )
+
+    _eventstream_insert_many(jobs)
+
+    for job in jobs:
+        # Do this last to ensure signals get emitted even if connection to the
+        # file store breaks temporarily.
+        #
+        # We do not need this for reprocessed events as for those we update the
+        # group_id on existing models in post_process_group, which already does
+        # this because of indiv. attachments.
+        if not is_reprocessed[id(job)]:
+            with metrics.timer("event_manager.save_attachments"):
+                save_attachments(job["cache_key"], job["attachments"], job)
+
+        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
+
+        metrics.timing(
+            "events.latency",
+            job["received_timestamp"] - job["recorded_timestamp"],
+            tags=metric_tags,
+        )
+        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
+        metrics.incr(
+            "events.post_save.normalize.errors",
+            amount=len(job["data"].get("errors") or ()),
+            tags=metric_tags,
+        )
+
+    _track_outcome_accepted_many(jobs)
+    return jobs + discarded_jobs
@@ -12,12 +12,14 @@ from parsimonious.grammar import Grammar, NodeVisitor
 from parsimonious.exceptions import ParseError
 
 from sentry import projectoptions
-from sentry.stacktraces.functions import set_in_app
+from sentry.stacktraces.functions import get_function_name_for_frame, set_in_app
 from sentry.stacktraces.platform import get_behavior_family_for_platform
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.utils import get_rule_bool
+from sentry.utils.cache import memoize
 from sentry.utils.compat import implements_to_string
 from sentry.utils.glob import glob_match
+from sentry.utils.lru import LRUCache
 from sentry.utils.safe import get_path
 from sentry.utils.compat import zip
 from sentry.utils.strings import unescape_string
@@ -111,10 +113,40 @@ MATCHERS = {
 }
 
 
+# Characters with a special meaning in glob patterns.  Everything in front of
+# the first one of those has to match literally.
+GLOB_SPECIAL_CHARS = frozenset("*?[]{}\\!")
+
+
 class InvalidEnhancerConfig(Exception):
     pass
 
 
+def get_frame_value(key, frame_data, platform):
+    """Returns the value of a frame that a matcher of the given key tests."""
+    if key == "path":
+        return frame_data.get("abs_path") or frame_data.get("filename") or ""
+    if key == "package":
+        return frame_data.get("package") or ""
+    if key == "family":
+        return get_behavior_family_for_platform(frame_data.get("platform") or platform)
+    if key == "app":
+        return frame_data.get("in_app")
+    if key == "function":
+        return get_function_name_for_frame(frame_data, platform) or "<unknown>"
+    if key == "module":
+        return frame_data.get("module") or "<unknown>"
+    # should not happen :)
+    return "<unknown>"
+
+
+def get_literal_prefix(pattern):
+    for idx, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:idx]
+    return pattern
+
+
 class Match(object):
     def __init__(self, key, pattern, negated=False):
         try:
@@ -138,12 +170,14 @@ class Match(object):
         return rv
 
     def _positive_frame_match(self, frame_data, platform):
+        if self.key == "app":
+            return self._positive_value_match(frame_data.get("in_app"))
+        return self._positive_value_match(get_frame_value(self.key, frame_data, platform))
+
+    def _positive_value_match(self, value):
+        """Matches against a value as returned by ``get_frame_value``."""
         # Path matches are always case insensitive
         if self.key in ("path", "package"):
-            if self.key == "package":
-                value = frame_data.get("package") or ""
-            else:
-                value = frame_data.get("abs_path") or frame_data.get("filename") or ""
             if glob_match(
                 value, self.pattern, ignorecase=True, doublestar=True, path_normalize=True
             ):
@@ -159,24 +193,14 @@ class Match(object):
             flags = self.pattern.split(",")
             if "all" in flags:
                 return True
-            family = get_behavior_family_for_platform(frame_data.get("platform") or platform)
-            return family in flags
+            return value in flags
 
         # in-app matching is just a bool
         if self.key == "app":
             ref_val = get_rule_bool(self.pattern)
-            return ref_val is not None and ref_val == frame_data.get("in_app")
+            return ref_val is not None and ref_val == value
 
         # all other matches are case sensitive
-        if self.key == "function":
-            from sentry.stacktraces.functions import get_function_name_for_frame
-
-            value = get_function_name_for_frame(frame_data, platform) or "<unknown>"
-        elif self.key == "module":
-            value = frame_data.get("module") or "<unknown>"
-        else:
-            # should not happen :)
-            value = "<unknown>"
         return glob_match(value, self.pattern)
 
     def _to_config_structure(self):
@@ -342,26 +366,27 @@ class Enhancements(object):
             bases = []
         self.bases = bases
 
+    @memoize
+    def _matcher(self):
+        return EnhancementsMatcher(list(self.iter_rules()))
+
     def apply_modifications_to_frame(self, frames, platform):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
         """
-        for rule in self.iter_rules():
-            for idx, frame in enumerate(frames):
-                actions = rule.get_matching_frame_actions(frame, platform)
-                for action in actions or ():
-                    action.apply_modifications_to_frame(frames, idx)
+        for rule, idx in self._matcher.iter_matches(frames, platform):
+            for action in rule.actions:
+                action.apply_modifications_to_frame(frames, idx)
 
     def update_frame_components_contributions(self, components, frames, platform):
         stacktrace_state = StacktraceState()
 
         # Apply direct frame actions and update the stack state alongside
-        for rule in self.iter_rules():
-            for idx, (component, frame) in enumerate(zip(components, frames)):
-                actions = rule.get_matching_frame_actions(frame, platform)
-                for action in actions or ():
-                    action.update_frame_components_contributions(components, frames, idx, rule=rule)
-                    action.modify_stacktrace_state(stacktrace_state, rule)
+        frames = frames[: len(components)]
+        for rule, idx in self._matcher.iter_matches(frames, platform):
+            for action in rule.actions:
+                action.update_frame_components_contributions(components, frames, idx, rule=rule)
+                action.modify_stacktrace_state(stacktrace_state, rule)
 
         # Use the stack state to update frame contributions again to trim
         # down to max-frames.  min-frames is handled on the other hand for
@@ -456,14 +481,24 @@ class Enhancements(object):
     def loads(cls, data):
         if isinstance(data, six.text_type):
             data = data.encode("ascii", "ignore")
+
+        # Configs are loaded for every event, cache them so that their
+        # compiled matchers can be reused as well.
+        rv = _loaded_enhancements.get((cls, data))
+        if rv is not None:
+            return rv
+
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
-            return cls._from_config_structure(
+            rv = cls._from_config_structure(
                 msgpack.loads(zlib.decompress(base64.urlsafe_b64decode(padded)), raw=False)
             )
         except (LookupError, AttributeError, TypeError, ValueError) as e:
             raise ValueError("invalid stack trace rule config: %s" % e)
 
+        _loaded_enhancements.set((cls, data), rv)
+        return rv
+
     @classmethod
     def from_config_string(self, s, bases=None, id=None):
         try:
@@ -478,6 +513,101 @@ class Enhancements(object):
         return EnhancmentsVisitor(bases, id).visit(tree)
 
 
+class EnhancementsMatcher(object):
+    """Matches the rules of an enhancements config against frames.
+
+    All matchers except for ``app`` only depend on attributes of a frame that
+    rules cannot change, so their results are computed once per distinct
+    combination of those attributes and cached.  Rules are additionally
+    bucketed by the families they are restricted to, and function and module
+    patterns are rejected by their literal prefix before globbing.
+    """
+
+    def __init__(self, rules, cache_size=10000):
+        self.rules = rules
+        self._static_matchers = []
+        self._app_matchers = []
+        self._families = []
+        self._cache = LRUCache(cache_size)
+        self._rules_by_family = {}
+
+        for rule in rules:
+            static_matchers = []
+            app_matchers = []
+            families = None
+            for match in rule.matchers:
+                if match.key == "app":
+                    app_matchers.append(match)
+                    continue
+                if match.key == "family" and not match.negated:
+                    flags = set(match.pattern.split(","))
+                    if "all" not in flags:
+                        families = flags if families is None else families & flags
+                        continue
+                prefix = None
+                if match.key in ("function", "module") and not match.negated:
+                    prefix = get_literal_prefix(match.pattern)
+                static_matchers.append((match, prefix))
+            self._static_matchers.append(static_matchers)
+            self._app_matchers.append(app_matchers)
+            self._families.append(families)
+
+    def _get_rules_for_family(self, family):
+        rv = self._rules_by_family.get(family)
+        if rv is None:
+            rv = self._rules_by_family[family] = [
+                rule_idx
+                for rule_idx, rule in enumerate(self.rules)
+                if rule.matchers
+                and (self._families[rule_idx] is None or family in self._families[rule_idx])
+            ]
+        return rv
+
+    def _get_static_matches(self, frame, platform):
+        values = {}
+        for key in ("family", "function", "module", "path", "package"):
+            values[key] = get_frame_value(key, frame, platform)
+
+        cache_key = tuple(values[key] for key in sorted(values))
+        rv = self._cache.get(cache_key)
+        if rv is not None:
+            return rv
+
+        rv = []
+        for rule_idx in self._get_rules_for_family(values["family"]):
+            for match, prefix in self._static_matchers[rule_idx]:
+                value = values[match.key]
+                if prefix and not value.startswith(prefix):
+                    break
+                if match._positive_value_match(value) == match.negated:
+                    break
+            else:
+                rv.append(rule_idx)
+
+        rv = tuple(rv)
+        self._cache.set(cache_key, rv)
+        return rv
+
+    def iter_matches(self, frames, platform):
+        """Yields ``(rule, frame_index)`` for every rule matching a frame, in
+        the same order as testing every rule against every frame would.
+
+        ``app`` matchers are tested lazily, as actions applied for earlier
+        matches may change the in-app flag of a frame.
+        """
+        frames_by_rule = {}
+        for idx, frame in enumerate(frames):
+            for rule_idx in self._get_static_matches(frame, platform):
+                frames_by_rule.setdefault(rule_idx, []).append(idx)
+
+        for rule_idx in sorted(frames_by_rule):
+            rule = self.rules[rule_idx]
+            app_matchers = self._app_matchers[rule_idx]
+            for idx in frames_by_rule[rule_idx]:
+                if all(m.matches_frame(frames[idx], platform) for m in app_matchers):
+                    yield rule, idx
+
+
 class Rule(object):
     def __init__(self, matchers, actions):
         self.matchers = matchers
@@ -633,5 +763,7 @@ def _load_configs():
     return rv
 
 
+_loaded_enhancements = LRUCache(100)
+
 ENHANCEMENT_BASES = _load_configs()
 del _load_configs
@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import logging
 import operator
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import timedelta
 
@@ -59,21 +60,30 @@ class SubscriptionProcessor(object):
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription):
+    def __init__(self, subscription, alert_rule=None, triggers=None, alert_rule_stats=None):
+        """
+        :param alert_rule: The `AlertRule` of the subscription, if already fetched
+        :param triggers: The `AlertRuleTrigger`s of the alert rule, if already fetched
+        :param alert_rule_stats: The result of `get_alert_rule_stats`, if already fetched
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
-
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
-
-        (
-            self.last_update,
-            self.trigger_alert_counts,
-            self.rule_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
+
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
+
+        if alert_rule_stats is None:
+            alert_rule_stats = get_alert_rule_stats(
+                self.alert_rule, self.subscription, self.triggers
+            )
+        (self.last_update, self.trigger_alert_counts, self.rule_resolve_counts) = alert_rule_stats
+        self.orig_last_update = self.last_update
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_rule_resolve_counts = self.rule_resolve_counts
 
@@ -141,7 +151,12 @@ class SubscriptionProcessor(object):
 
         return func(trigger.alert_threshold for trigger in self.triggers) + resolve_add
 
-    def process_update(self, subscription_update):
+    def process_update(self, subscription_update, update_stats=True):
+        """
+        :param update_stats: Whether to write the updated alert rule stats to Redis once
+        the update has been processed. If False, the caller is responsible for calling
+        `update_alert_rule_stats`.
+        """
         dataset = self.subscription.snuba_query.dataset
         try:
             # Check that the project exists
@@ -246,7 +261,8 @@ class SubscriptionProcessor(object):
         # is killed here. The trade-off is that we might process an update twice. Mostly
         # this will have no effect, but if someone manages to close a triggered incident
         # before the next one then we might alert twice.
-        self.update_alert_rule_stats()
+        if update_stats:
+            self.update_alert_rule_stats()
 
     def calculate_event_date_from_update_date(self, update_date):
         """
@@ -372,9 +388,11 @@ class SubscriptionProcessor(object):
                     status_method=IncidentStatusMethod.RULE_TRIGGERED,
                 )
 
-    def update_alert_rule_stats(self):
+    def update_alert_rule_stats(self, pipeline=None):
         """
         Updates stats about the alert rule, if they're changed.
+        :param pipeline: A Redis pipeline to add the updates to. If passed, the caller
+        is responsible for executing it.
         :return:
         """
         updated_trigger_alert_counts = {
@@ -392,9 +410,82 @@ class SubscriptionProcessor(object):
             self.last_update,
             updated_trigger_alert_counts,
             resolve_counts,
+            pipeline=pipeline,
         )
 
 
+def process_updates(subscription_updates):
+    """
+    Processes a batch of subscription updates. Alert rules and triggers for all
+    subscriptions are fetched at once, and the alert rule stats are read and written
+    with a single Redis round trip each. Multiple updates for the same subscription are
+    processed in order by the same `SubscriptionProcessor`.
+    :param subscription_updates: A list of `(subscription_update, subscription)` tuples
+    """
+    updates_by_subscription = OrderedDict()
+    subscriptions = {}
+    for subscription_update, subscription in subscription_updates:
+        subscriptions[subscription.id] = subscription
+        updates_by_subscription.setdefault(subscription.id, []).append(subscription_update)
+
+    alert_rules = AlertRule.objects.get_many_for_subscriptions(list(subscriptions.values()))
+    triggers = AlertRuleTrigger.objects.get_for_alert_rules(list(alert_rules.values()))
+
+    stat_args = [
+        (
+            alert_rule,
+            subscriptions[subscription_id],
+            sorted(triggers[alert_rule.id], key=lambda trigger: trigger.alert_threshold),
+        )
+        for subscription_id, alert_rule in alert_rules.items()
+    ]
+    stats = dict(zip(alert_rules.keys(), get_alert_rule_stats_many(stat_args)))
+
+    processors = []
+    try:
+        for subscription_id, updates in updates_by_subscription.items():
+            subscription = subscriptions[subscription_id]
+            if subscription_id not in alert_rules:
+                processor = SubscriptionProcessor(subscription)
+                for subscription_update in updates:
+                    processor.process_update(subscription_update, update_stats=False)
+                continue
+
+            processor = SubscriptionProcessor(
+                subscription,
+                alert_rule=alert_rules[subscription_id],
+                triggers=triggers[alert_rules[subscription_id].id],
+                alert_rule_stats=stats[subscription_id],
+            )
+            processors.append(processor)
+            for subscription_update in updates:
+                committed_stats = (
+                    processor.last_update,
+                    deepcopy(processor.trigger_alert_counts),
+                    processor.rule_resolve_counts,
+                )
+                try:
+                    processor.process_update(subscription_update, update_stats=False)
+                except Exception:
+                    # The transaction of this update was rolled back, so its
+                    # stats must not be written.
+                    (
+                        processor.last_update,
+                        processor.trigger_alert_counts,
+                        processor.rule_resolve_counts,
+                    ) = committed_stats
+                    raise
+    finally:
+        # As in `process_update`, stats are only written for updates whose
+        # transactions were committed. They are written even if a later update
+        # fails, so that the committed updates are not processed again.
+        pipeline = get_redis_client().pipeline()
+        for processor in processors:
+            if processor.last_update != processor.orig_last_update:
+                processor.update_alert_rule_stats(pipeline=pipeline)
+        pipeline.execute()
+
+
 def build_alert_rule_stat_keys(alert_rule, subscription):
     """
     Builds keys for fetching stats about alert rules
@@ -449,6 +540,37 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
     alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
     trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
     results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return parse_alert_rule_stats(results, triggers)
+
+
+def get_alert_rule_stats_many(items):
+    """
+    Fetches stats for multiple alert rules with a single Redis round trip.
+    :param items: A list of `(alert_rule, subscription, triggers)` tuples
+    :return: A list containing the results of `get_alert_rule_stats` for each item
+    """
+    if not items:
+        return []
+
+    keys = [
+        build_alert_rule_stat_keys(alert_rule, subscription)
+        + build_trigger_stat_keys(alert_rule, subscription, triggers)
+        for alert_rule, subscription, triggers in items
+    ]
+    # Cluster pipelines don't support `mget`, so fetch each key separately
+    pipeline = get_redis_client().pipeline()
+    for item_keys in keys:
+        for key in item_keys:
+            pipeline.get(key)
+    results = iter(pipeline.execute())
+
+    return [
+        parse_alert_rule_stats([next(results) for _ in item_keys], triggers)
+        for item_keys, (_, _, triggers) in zip(keys, items)
+    ]
+
+
+def parse_alert_rule_stats(results, triggers):
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     rule_resolve_counts = results[1]
@@ -461,12 +583,15 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
 
 
 def update_alert_rule_stats(
-    alert_rule, subscription, last_update, alert_counts, resolve_count=None
+    alert_rule, subscription, last_update, alert_counts, resolve_count=None, pipeline=None
 ):
     """
     Updates stats about the alert rule, subscription and triggers if they've changed.
+    If a pipeline is passed, the updates are added to it without executing it.
     """
-    pipeline = get_redis_client().pipeline()
+    execute = pipeline is None
+    if execute:
+        pipeline = get_redis_client().pipeline()
 
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts,))
     for stat_key, trigger_counts in counts_with_stat_keys:
@@ -483,7 +608,8 @@ def update_alert_rule_stats(
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
     if resolve_count is not None:
         pipeline.set(resolve_count_key, resolve_count, ex=REDIS_TTL)
-    pipeline.execute()
+    if execute:
+        pipeline.execute()
 
 
 def get_redis_client():
@@ -22,7 +22,7 @@ from sentry.incidents.models import (
     INCIDENT_STATUS,
 )
 from sentry.models import Project
-from sentry.snuba.query_subscription_consumer import register_subscriber
+from sentry.snuba.query_subscription_consumer import register_batch_subscriber, register_subscriber
 from sentry.tasks.base import instrumented_task
 from sentry.utils.email import MessageBuilder
 from sentry.utils.http import absolute_uri
@@ -121,6 +121,18 @@ def handle_snuba_query_update(subscription_update, subscription):
         SubscriptionProcessor(subscription).process_update(subscription_update)
 
 
+@register_batch_subscriber(INCIDENTS_SNUBA_SUBSCRIPTION_TYPE)
+def handle_snuba_query_updates(subscription_updates):
+    """
+    Handles a batch of subscription updates for `QuerySubscription`s.
+    :param subscription_updates: A list of `(subscription_update, subscription)` tuples
+    """
+    from sentry.incidents.subscription_processor import process_updates
+
+    with metrics.timer("incidents.subscription_procesor.process_updates"):
+        process_updates(subscription_updates)
+
+
 @instrumented_task(
     name="sentry.incidents.tasks.handle_trigger_action",
     queue="incidents",
@@ -269,6 +269,10 @@ def get_ingest_consumer(consumer_types, once=False, **options):
     Handles events coming via a kafka queue.
 
     The events should have already been processed (normalized... ) upstream (by Relay).
+
+    With a ``concurrency`` greater than one, batches of different partitions
+    are flushed concurrently on that many threads. Messages of a partition
+    are still processed in order.
     """
     topic_names = set(
         ConsumerType.get_topic_name(consumer_type) for consumer_type in consumer_types
@@ -77,6 +77,9 @@ class SourceMapCache(object):
     def __contains__(self, sourcemap_url):
         return sourcemap_url in self._cache
 
+    def __len__(self):
+        return len(self._cache)
+
     def link(self, url, sourcemap_url):
         self._mapping[url] = sourcemap_url
 
@@ -9,8 +9,11 @@ import re
 import sys
 import base64
 import six
+import threading
 import zlib
 
+from concurrent.futures import ThreadPoolExecutor
+from django import db
 from django.conf import settings
 from os.path import splitext
 from requests.utils import get_encoding_from_headers
@@ -27,7 +30,7 @@ except ImportError:
         pass
 
 
-from sentry import http
+from sentry import http, options
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, ReleaseFile, Organization
 
@@ -37,10 +40,12 @@ from sentry.models import EventError, ReleaseFile, Organization
 from sentry.utils.cache import cache
 
 from sentry.utils.files import compress_file
-from sentry.utils.hashlib import md5_text
+from sentry.utils.hashlib import md5_text, sha1_text
 from sentry.utils.http import is_valid_origin
 from sentry.utils.safe import get_path
 from sentry.utils import metrics
+from sentry.utils.compat import zip
+from sentry.utils.lru import LRUCache
 from sentry.utils.urls import non_standard_url_join
 from sentry.stacktraces.processing import StacktraceProcessor
 
@@ -74,12 +79,37 @@ CACHE_CONTROL_MIN = 60
 # the maximum number of remote resources (i.e. source files) that should be
 # fetched
 MAX_RESOURCE_FETCHES = 100
+# the maximum number of resources that are fetched from the same host at the
+# same time. This is independent of the `sourcemaps.fetch-concurrency` option,
+# which limits the number of resources fetched at the same time from all hosts.
+MAX_CONCURRENT_FETCHES_PER_HOST = 4
 
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
+_parsed_sourcemaps = None
+_parsed_sourcemaps_lock = threading.Lock()
+
 logger = logging.getLogger(__name__)
 
 
+def get_parsed_sourcemaps():
+    """
+    Returns the process-wide cache of parsed source maps, or ``None`` if it has
+    been disabled through ``SENTRY_SOURCEMAP_CACHE_SIZE``.
+
+    Parsed source maps are shared between events processed by the same worker,
+    and accounted for by the size of their raw JSON.
+    """
+    global _parsed_sourcemaps
+    if _parsed_sourcemaps is None and settings.SENTRY_SOURCEMAP_CACHE_SIZE:
+        with _parsed_sourcemaps_lock:
+            if _parsed_sourcemaps is None:
+                _parsed_sourcemaps = LRUCache(
+                    settings.SENTRY_SOURCEMAP_CACHE_SIZE, sizeof=lambda item: item[1]
+                )
+    return _parsed_sourcemaps
+
+
 class UnparseableSourcemap(http.BadSource):
     error_type = EventError.JS_INVALID_SOURCEMAP
 
@@ -222,12 +252,120 @@ def get_release_file_cache_key_meta(release_id, releasefile_ident):
     return "meta:%s" % get_release_file_cache_key(release_id, releasefile_ident)
 
 
+def get_release_file_body_cache_key(checksum):
+    return "releasefile:body:v1:%s" % (checksum,)
+
+
+def get_release_file_headers_cache_key(file_id):
+    return "releasefile:headers:v1:%s" % (file_id,)
+
+
+def read_release_file(filename, releasefile, cache_key_meta):
+    """
+    Reads the contents of a release artifact and compresses them for caching,
+    unless the metadata under ``cache_key_meta`` says they are too large to be
+    cached.
+
+    Returns the ``UrlResult`` and the compressed body (or ``None``), or
+    ``(None, None)`` if the artifact could not be read.
+    """
+    # If the release file is not in cache, check if we can retrieve at
+    # least the size metadata from cache and prevent compression and
+    # caching if payload exceeds the backend limit.
+    z_body = None
+    z_body_size = None
+
+    if CACHE_MAX_VALUE_SIZE:
+        cache_meta = cache.get(cache_key_meta)
+        if cache_meta:
+            z_body_size = int(cache_meta.get("compressed_size"))
+
+    logger.debug(
+        "Found release artifact %r (id=%s, release_id=%s)",
+        filename,
+        releasefile.id,
+        releasefile.release_id,
+    )
+    try:
+        with metrics.timer("sourcemaps.release_file_read"):
+            with ReleaseFile.cache.getfile(releasefile) as fp:
+                if z_body_size and z_body_size > CACHE_MAX_VALUE_SIZE:
+                    body = fp.read()
+                else:
+                    z_body, body = compress_file(fp)
+    except Exception:
+        logger.error("sourcemap.compress_read_failed", exc_info=sys.exc_info())
+        return None, None
+
+    headers = {k.lower(): v for k, v in releasefile.file.headers.items()}
+    encoding = get_encoding_from_headers(headers)
+    result = http.UrlResult(filename, headers, body, 200, encoding)
+
+    if z_body:
+        # In case caching the compressed body implicitly fails, we use the
+        # meta data to avoid pointless compression which is done only for
+        # caching.
+        cache.set(cache_key_meta, {"compressed_size": len(z_body)}, 3600)
+
+    return result, z_body
+
+
+def fetch_indexed_release_file(filename, release, dist, index):
+    """
+    Retrieves a release artifact through the index of its release.
+
+    Artifacts are cached by their checksum and file, so a cached artifact is
+    served without querying the database, even if it was cached under a
+    different name or for another release.
+    """
+    dist_name = dist and dist.name or None
+    dist_id = dist.id if dist else None
+
+    # Only the artifact with the highest priority has to be loaded.
+    for filename_choice in ReleaseFile.normalize(filename):
+        entry = index.get(ReleaseFile.get_ident(filename_choice, dist_name))
+        if entry is not None and entry[2] == dist_id:
+            break
+    else:
+        logger.debug("Release artifact %r not in index (release_id=%s)", filename, release.id)
+        return None
+
+    releasefile_id, file_id, _, checksum = entry
+    body_cache_key = get_release_file_body_cache_key(checksum)
+    headers_cache_key = get_release_file_headers_cache_key(file_id)
+
+    cached = cache.get_many([body_cache_key, headers_cache_key])
+    if body_cache_key in cached and headers_cache_key in cached:
+        headers, encoding = cached[headers_cache_key]
+        return http.UrlResult(
+            filename, headers, zlib.decompress(cached[body_cache_key]), 200, encoding
+        )
+
+    try:
+        releasefile = ReleaseFile.objects.select_related("file").get(id=releasefile_id)
+    except ReleaseFile.DoesNotExist:
+        # The artifact was deleted after the index was loaded.
+        return None
+
+    result, z_body = read_release_file(filename, releasefile, "meta:%s" % body_cache_key)
+    if result is not None:
+        cache.set(headers_cache_key, (result.headers, result.encoding), 3600)
+        if z_body:
+            # This will implicitly skip too large payloads. Those will be
+            # cached on the file system by `ReleaseFile.cache`, instead.
+            cache.set(body_cache_key, z_body, 3600)
+    return result
+
+
 def fetch_release_file(filename, release, dist=None):
     """
     Attempt to retrieve a release artifact from the database.
 
     Caches the result of that attempt (whether successful or not).
     """
+    index = ReleaseFile.get_index(release.id)
+    if index is not None:
+        return fetch_indexed_release_file(filename, release, dist, index)
 
     dist_name = dist and dist.name or None
     releasefile_ident = ReleaseFile.get_ident(filename, dist_name)
@@ -278,47 +416,15 @@ def fetch_release_file(filename, release, dist=None):
                 (rf for ident in filename_idents for rf in possible_files if rf.ident == ident)
             )
 
-        # If the release file is not in cache, check if we can retrieve at
-        # least the size metadata from cache and prevent compression and
-        # caching if payload exceeds the backend limit.
-        z_body = None
-        z_body_size = None
+        result, z_body = read_release_file(filename, releasefile, cache_key_meta)
 
-        if CACHE_MAX_VALUE_SIZE:
-            cache_meta = cache.get(cache_key_meta)
-            if cache_meta:
-                z_body_size = int(cache_meta.get("compressed_size"))
-
-        logger.debug(
-            "Found release artifact %r (id=%s, release_id=%s)", filename, releasefile.id, release.id
-        )
-        try:
-            with metrics.timer("sourcemaps.release_file_read"):
-                with ReleaseFile.cache.getfile(releasefile) as fp:
-                    if z_body_size and z_body_size > CACHE_MAX_VALUE_SIZE:
-                        body = fp.read()
-                    else:
-                        z_body, body = compress_file(fp)
-        except Exception:
-            logger.error("sourcemap.compress_read_failed", exc_info=sys.exc_info())
-            result = None
-        else:
-            headers = {k.lower(): v for k, v in releasefile.file.headers.items()}
-            encoding = get_encoding_from_headers(headers)
-            result = http.UrlResult(filename, headers, body, 200, encoding)
-
-            # If we don't have the compressed body for caching because the
-            # cached metadata said it is too large payload for the cache
-            # backend, do not attempt to cache.
-            if z_body:
-                # This will implicitly skip too large payloads. Those will be cached
-                # on the file system by `ReleaseFile.cache`, instead.
-                cache.set(cache_key, (headers, z_body, 200, encoding), 3600)
-
-                # In case the previous call to cache implicitly fails, we use
-                # the meta data to avoid pointless compression which is done
-                # only for caching.
-                cache.set(cache_key_meta, {"compressed_size": len(z_body)}, 3600)
+        # If we don't have the compressed body for caching because the
+        # cached metadata said it is too large payload for the cache
+        # backend, do not attempt to cache.
+        if z_body:
+            # This will implicitly skip too large payloads. Those will be cached
+            # on the file system by `ReleaseFile.cache`, instead.
+            cache.set(cache_key, (result.headers, z_body, 200, result.encoding), 3600)
 
     # in the cache as an unsuccessful attempt
     elif result == -1:
@@ -478,13 +584,71 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             url, project=project, release=release, dist=dist, allow_scraping=allow_scraping
         )
         body = result.body
+
+    return parse_sourcemap(body, url, release=release, dist=dist)
+
+
+def parse_sourcemap(body, url, release=None, dist=None):
+    """
+    Parses the JSON of a source map into a ``SourceMapView``.
+
+    Parsed source maps are kept in ``get_parsed_sourcemaps()`` by release
+    artifact and checksum, so that every event of a release does not parse them
+    again.
+    """
+    parsed_sourcemaps = get_parsed_sourcemaps()
+    if parsed_sourcemaps is not None:
+        cache_key = (
+            release.id if release else None,
+            dist.name if dist else None,
+            None if is_data_uri(url) else url,
+            sha1_text(body).hexdigest(),
+        )
+        cached = parsed_sourcemaps.get(cache_key)
+        metrics.incr("sourcemaps.parse_cache", tags={"result": "hit" if cached else "miss"})
+        if cached is not None:
+            return cached[0]
+
     try:
-        return SourceMapView.from_json_bytes(body)
+        with metrics.timer("sourcemaps.parse"):
+            sourcemap_view = SourceMapView.from_json_bytes(body)
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(six.text_type(exc), exc_info=True)
         raise UnparseableSourcemap({"url": http.expose_url(url)})
 
+    if parsed_sourcemaps is not None:
+        parsed_sourcemaps.set(cache_key, (sourcemap_view, len(body)))
+    return sourcemap_view
+
+
+def fetch_concurrently(fetch, urls, concurrency):
+    """
+    Calls ``fetch`` for every url on a pool of up to ``concurrency`` threads,
+    running at most ``MAX_CONCURRENT_FETCHES_PER_HOST`` calls for the same host
+    at a time, and returns a dictionary of the results by url.
+    """
+    if not urls:
+        return {}
+
+    semaphores = {}
+    for url in urls:
+        host = urlsplit(url).netloc
+        if host not in semaphores:
+            semaphores[host] = threading.BoundedSemaphore(MAX_CONCURRENT_FETCHES_PER_HOST)
+
+    def _fetch(url):
+        try:
+            with semaphores[urlsplit(url).netloc]:
+                return fetch(url)
+        finally:
+            # Database connections are per thread, and the threads of this
+            # pool do not outlive the fetch.
+            db.connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(urls))) as executor:
+        return dict(zip(urls, executor.map(_fetch, urls)))
+
 
 def is_data_uri(url):
     return url[:BASE64_PREAMBLE_LENGTH] == BASE64_SOURCEMAP_PREAMBLE
@@ -854,80 +1018,137 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         Look for and (if found) cache a source file and its associated source
         map (if any).
         """
+        if not self._count_fetch(filename):
+            return
 
-        sourcemaps = self.sourcemaps
-        cache = self.cache
+        # TODO: respect cache-control/max-age headers to some extent
+        logger.debug("Attempting to cache source %r", filename)
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
+        ) as span:
+            span.set_data("filename", filename)
+            result, exc = self._fetch_file(filename)
+
+        sourcemap_url = self._add_file(filename, result, exc)
+        if not sourcemap_url or sourcemap_url in self.sourcemaps:
+            return
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
+        ) as span:
+            span.set_data("sourcemap_url", sourcemap_url)
+            sourcemap_view, exc = self._fetch_sourcemap(sourcemap_url)
+
+        self._add_sourcemap([filename], sourcemap_url, sourcemap_view, exc)
 
+    def cache_sources_concurrently(self, filenames, concurrency):
+        """
+        Like ``cache_source`` for many files, but fetches all files and then
+        all of their source maps on a pool of ``concurrency`` threads.
+        """
+        filenames = [filename for filename in filenames if self._count_fetch(filename)]
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_sources_concurrently.fetch_files"
+        ):
+            results = fetch_concurrently(self._fetch_file, filenames, concurrency)
+
+        # Multiple files can share the same source map.
+        sourcemap_files = {}
+        for filename in filenames:
+            sourcemap_url = self._add_file(filename, *results[filename])
+            if sourcemap_url and sourcemap_url not in self.sourcemaps:
+                sourcemap_files.setdefault(sourcemap_url, []).append(filename)
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_sources_concurrently.fetch_sourcemaps"
+        ):
+            results = fetch_concurrently(self._fetch_sourcemap, list(sourcemap_files), concurrency)
+
+        for sourcemap_url, files in six.iteritems(sourcemap_files):
+            self._add_sourcemap(files, sourcemap_url, *results[sourcemap_url])
+
+    def _count_fetch(self, filename):
         self.fetch_count += 1
 
         if self.fetch_count > self.max_fetches:
-            cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
-            return
+            self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            return False
+        return True
 
-        # TODO: respect cache-control/max-age headers to some extent
-        logger.debug("Attempting to cache source %r", filename)
+    def _fetch_file(self, filename):
         try:
             # this both looks in the database and tries to scrape the internet
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
-            ) as span:
-                span.set_data("filename", filename)
-                result = fetch_file(
-                    filename,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
+            result = fetch_file(
+                filename,
+                project=self.project,
+                release=self.release,
+                dist=self.dist,
+                allow_scraping=self.allow_scraping,
+            )
         except http.BadSource as exc:
+            return None, exc
+        return result, None
+
+    def _fetch_sourcemap(self, sourcemap_url):
+        try:
+            sourcemap_view = fetch_sourcemap(
+                sourcemap_url,
+                project=self.project,
+                release=self.release,
+                dist=self.dist,
+                allow_scraping=self.allow_scraping,
+            )
+        except http.BadSource as exc:
+            return None, exc
+        return sourcemap_view, None
+
+    def _add_file(self, filename, result, exc):
+        """
+        Caches the result of fetching a source file, and returns the URL of
+        its source map (if any).
+        """
+        if exc is not None:
             # most people don't upload release artifacts for their third-party libraries,
             # so ignore missing node_modules files
             if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
                 pass
             else:
-                cache.add_error(filename, exc.data)
+                self.cache.add_error(filename, exc.data)
 
             # either way, there's no more for us to do here, since we don't have
             # a valid file to cache
-            return
-        cache.add(filename, result.body, result.encoding)
-        cache.alias(result.url, filename)
+            return None
+
+        self.cache.add(filename, result.body, result.encoding)
+        self.cache.alias(result.url, filename)
 
         sourcemap_url = discover_sourcemap(result)
         if not sourcemap_url:
-            return
+            return None
 
         logger.debug(
             "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
         )
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
-            return
+        self.sourcemaps.link(filename, sourcemap_url)
+        return sourcemap_url
 
-        # pull down sourcemap
-        try:
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
-            ) as span:
-                span.set_data("sourcemap_url", sourcemap_url)
-                sourcemap_view = fetch_sourcemap(
-                    sourcemap_url,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
-        except http.BadSource as exc:
+    def _add_sourcemap(self, filenames, sourcemap_url, sourcemap_view, exc):
+        """
+        Caches the result of fetching the source map of ``filenames``.
+        """
+        if exc is not None:
             # we don't perform the same check here as above, because if someone has
             # uploaded a node_modules file, which has a sourceMappingURL, they
             # presumably would like it mapped (and would like to know why it's not
             # working, if that's the case). If they're not looking for it to be
             # mapped, then they shouldn't be uploading the source file in the
             # first place.
-            cache.add_error(filename, exc.data)
+            for filename in filenames:
+                self.cache.add_error(filename, exc.data)
             return
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
 
         # cache any inlined sources
         for src_id, source_name in sourcemap_view.iter_sources():
@@ -956,12 +1177,24 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f["abs_path"])
 
-        for idx, filename in enumerate(pending_file_list):
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
-            ) as span:
-                span.set_data("filename", filename)
-                self.cache_source(filename=filename)
+        metrics.timing("sourcemaps.fetch.files", len(pending_file_list))
+        metrics.timing(
+            "sourcemaps.fetch.hosts",
+            len(set(urlsplit(filename).netloc for filename in pending_file_list)),
+        )
+
+        concurrency = options.get("sourcemaps.fetch-concurrency")
+        if concurrency > 1 and len(pending_file_list) > 1:
+            self.cache_sources_concurrently(pending_file_list, concurrency)
+        else:
+            for filename in pending_file_list:
+                with sentry_sdk.start_span(
+                    op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
+                ) as span:
+                    span.set_data("filename", filename)
+                    self.cache_source(filename=filename)
+
+        metrics.timing("sourcemaps.fetch.sourcemaps", len(self.sourcemaps))
 
     def close(self):
         StacktraceProcessor.close(self)
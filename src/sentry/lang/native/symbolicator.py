@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import bisect
 import sys
 import jsonschema
 import logging
@@ -7,6 +8,7 @@ import six
 import time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 
 from requests.exceptions import RequestException
@@ -18,12 +20,14 @@ from sentry import features, options
 from sentry.auth.system import get_system_token
 from sentry.cache import default_cache
 from sentry.utils import json, metrics
+from sentry.utils.compat import zip
 from sentry.net.http import Session
 from sentry.tasks.store import RetrySymbolication
 from sentry.models import Organization
 
 MAX_ATTEMPTS = 3
 REQUEST_CACHE_TIMEOUT = 3600
+FRAME_CACHE_VERSION = 1
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +105,228 @@ def _task_id_cache_key_for_event(project_id, event_id):
     return u"symbolicator:{1}:{0}".format(project_id, event_id)
 
 
+def _parse_addr(addr):
+    if isinstance(addr, six.integer_types):
+        return addr
+    if isinstance(addr, six.string_types):
+        try:
+            if addr[:2].lower() == "0x":
+                return int(addr, 16)
+            return int(addr)
+        except ValueError:
+            pass
+    return None
+
+
+def _relocate_frame(frame, offset):
+    frame = dict(frame)
+    for key in ("instruction_addr", "symbol_addr"):
+        addr = _parse_addr(frame.get(key))
+        if addr is not None:
+            frame[key] = "0x%x" % (addr + offset,)
+    return frame
+
+
+class FrameCache(object):
+    """
+    Remembers the symbolicated frames of a project by the debug id of their
+    module and their module-relative instruction address.  Events that only
+    consist of frames seen within the last ``ttl`` seconds are symbolicated
+    without a request to symbolicator.
+
+    Only frames that were symbolicated with a debug file that was found are
+    cached, so that uploading a missing debug file takes effect immediately.
+    """
+
+    def __init__(self, project_id, ttl):
+        self.project_id = project_id
+        self.ttl = ttl
+
+    def _get_module_key(self, debug_id):
+        return u"symbolicator:module:{}:{}:{}".format(
+            FRAME_CACHE_VERSION, self.project_id, debug_id
+        )
+
+    def _get_frame_keys(self, stacktraces, modules, signal):
+        """
+        Returns a list of ``(cache_key, module_index, image_addr)`` for every
+        frame of every stacktrace, or ``None`` for frames that cannot be
+        attributed to a module.
+        """
+        ranges = []
+        for idx, module in enumerate(modules):
+            image_addr = _parse_addr(module.get("image_addr"))
+            image_size = _parse_addr(module.get("image_size"))
+            if image_addr is not None and image_size:
+                ranges.append((image_addr, image_addr + image_size, idx))
+        ranges.sort()
+        starts = [start for start, _, _ in ranges]
+
+        rv = []
+        for stacktrace in stacktraces:
+            frame_keys = []
+            for frame_idx, frame in enumerate(stacktrace["frames"]):
+                addr = _parse_addr(frame.get("instruction_addr"))
+                addr_mode = frame.get("addr_mode")
+                module_idx = image_addr = None
+
+                if addr is None:
+                    pass
+                elif addr_mode is None:
+                    pos = bisect.bisect_right(starts, addr) - 1
+                    if pos >= 0 and addr < ranges[pos][1]:
+                        image_addr, _, module_idx = ranges[pos]
+                elif addr_mode.startswith("rel:") and addr_mode[4:].isdigit():
+                    module_idx = int(addr_mode[4:])
+                    image_addr = 0
+
+                debug_id = (
+                    module_idx is not None
+                    and module_idx < len(modules)
+                    and modules[module_idx].get("debug_id")
+                )
+                if not debug_id:
+                    frame_keys.append(None)
+                    continue
+
+                # Symbolicator looks up the call site of all but the first
+                # frame, which depends on whether the event crashed.
+                kind = "first:%s" % (signal,) if frame_idx == 0 else "caller"
+                key = u"symbolicator:frame:{}:{}:{}:{:x}:{}".format(
+                    FRAME_CACHE_VERSION, self.project_id, debug_id, addr - image_addr, kind
+                )
+                frame_keys.append((key, module_idx, image_addr))
+            rv.append(frame_keys)
+
+        return rv
+
+    def lookup(self, stacktraces, modules, signal=None):
+        """
+        Returns a completed symbolicator response assembled from cached
+        frames, or ``None`` unless all frames were found in the cache.
+
+        Symbolicator treats the first frame of every stacktrace it is sent as
+        the crashing frame, so the frames that are missing from the cache
+        cannot be symbolicated on their own. The metrics record why lookups
+        miss and how many of the frames were cached.
+        """
+        all_frame_keys = self._get_frame_keys(stacktraces, modules, signal)
+        if any(None in frame_keys for frame_keys in all_frame_keys):
+            metrics.incr("symbolicator.frame_cache", tags={"result": "miss", "reason": "no_module"})
+            return None
+
+        module_keys = {}
+        for frame_keys in all_frame_keys:
+            for _, module_idx, _ in frame_keys:
+                module_keys[module_idx] = self._get_module_key(modules[module_idx]["debug_id"])
+
+        keys = set(module_keys.values())
+        keys.update(key for frame_keys in all_frame_keys for key, _, _ in frame_keys)
+        cached = cache.get_many(keys)
+
+        frame_count = sum(len(frame_keys) for frame_keys in all_frame_keys)
+        cached_frame_count = sum(
+            1 for frame_keys in all_frame_keys for key, _, _ in frame_keys if key in cached
+        )
+        metrics.incr(
+            "symbolicator.frame_cache.frames", amount=cached_frame_count, tags={"result": "hit"}
+        )
+        metrics.incr(
+            "symbolicator.frame_cache.frames",
+            amount=frame_count - cached_frame_count,
+            tags={"result": "miss"},
+        )
+
+        if cached_frame_count < frame_count:
+            metrics.incr(
+                "symbolicator.frame_cache", tags={"result": "miss", "reason": "frame_not_cached"}
+            )
+            return None
+        if len(cached) < len(keys):
+            metrics.incr(
+                "symbolicator.frame_cache", tags={"result": "miss", "reason": "module_not_cached"}
+            )
+            return None
+
+        complete_modules = []
+        for idx, module in enumerate(modules):
+            if idx in module_keys:
+                complete_module = dict(cached[module_keys[idx]])
+                complete_module["image_addr"] = module.get("image_addr")
+            else:
+                complete_module = dict(module, debug_status="unused")
+            complete_modules.append(complete_module)
+
+        complete_stacktraces = []
+        for stacktrace, frame_keys in zip(stacktraces, all_frame_keys):
+            complete_frames = []
+            for frame_idx, (frame, (key, _, image_addr)) in enumerate(
+                zip(stacktrace["frames"], frame_keys)
+            ):
+                for complete_frame in cached[key]:
+                    complete_frame = _relocate_frame(complete_frame, image_addr)
+                    complete_frame["original_index"] = frame_idx
+                    complete_frame["addr_mode"] = frame.get("addr_mode")
+                    complete_frames.append(complete_frame)
+            complete_stacktraces.append({"frames": complete_frames})
+
+        metrics.incr("symbolicator.frame_cache", tags={"result": "hit"})
+        return {
+            "status": "completed",
+            "modules": complete_modules,
+            "stacktraces": complete_stacktraces,
+        }
+
+    def store(self, stacktraces, modules, signal, response):
+        """
+        Caches the successfully symbolicated frames and modules of a completed
+        symbolicator response.
+        """
+        if not response or response.get("status") != "completed":
+            return
+        if len(response["modules"]) != len(modules):
+            return
+        if len(response["stacktraces"]) != len(stacktraces):
+            return
+
+        values = {}
+        found = set()
+        for idx, (module, complete_module) in enumerate(zip(modules, response["modules"])):
+            if module.get("debug_id") and complete_module.get("debug_status") == "found":
+                complete_module = dict(complete_module)
+                complete_module.pop("image_addr", None)
+                values[self._get_module_key(module["debug_id"])] = complete_module
+                found.add(idx)
+
+        all_frame_keys = self._get_frame_keys(stacktraces, modules, signal)
+        for frame_keys, complete_stacktrace in zip(all_frame_keys, response["stacktraces"]):
+            complete_frames_by_idx = {}
+            for complete_frame in complete_stacktrace.get("frames") or ():
+                complete_frames_by_idx.setdefault(complete_frame["original_index"], []).append(
+                    complete_frame
+                )
+
+            for frame_idx, frame_key in enumerate(frame_keys):
+                if frame_key is None or frame_key[1] not in found:
+                    continue
+                complete_frames = complete_frames_by_idx.get(frame_idx)
+                if not complete_frames or any(
+                    f.get("status") != "symbolicated" for f in complete_frames
+                ):
+                    continue
+                key, _, image_addr = frame_key
+                values[key] = [
+                    _relocate_frame(
+                        dict((k, v) for k, v in six.iteritems(f) if k != "original_index"),
+                        -image_addr,
+                    )
+                    for f in complete_frames
+                ]
+
+        if values:
+            cache.set_many(values, self.ttl)
+
+
 class Symbolicator(object):
     def __init__(self, project, event_id):
         symbolicator_options = options.get("symbolicator.options")
@@ -125,6 +351,9 @@ class Symbolicator(object):
 
         self.task_id_cache_key = _task_id_cache_key_for_event(project.id, event_id)
 
+        frame_cache_ttl = options.get("symbolicator.frame-cache-ttl")
+        self.frame_cache = FrameCache(project.id, frame_cache_ttl) if frame_cache_ttl else None
+
     def _process(self, create_task):
         task_id = default_cache.get(self.task_id_cache_key)
         json_response = None
@@ -181,12 +410,21 @@ class Symbolicator(object):
         return self._process(lambda: self.sess.upload_applecrashreport(report))
 
     def process_payload(self, stacktraces, modules, signal=None):
-        return self._process(
+        if self.frame_cache is not None:
+            json_response = self.frame_cache.lookup(stacktraces, modules, signal)
+            if json_response is not None:
+                return json_response
+
+        json_response = self._process(
             lambda: self.sess.symbolicate_stacktraces(
                 stacktraces=stacktraces, modules=modules, signal=signal
             )
         )
 
+        if self.frame_cache is not None:
+            self.frame_cache.store(stacktraces, modules, signal, json_response)
+        return json_response
+
 
 class TaskIdNotFound(Exception):
     pass
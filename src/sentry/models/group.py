@@ -335,6 +335,14 @@ class Group(Model):
         return "(%s) %s" % (self.times_seen, self.error())
 
     def save(self, *args, **kwargs):
+        self.set_defaults()
+        super(Group, self).save(*args, **kwargs)
+
+    def set_defaults(self):
+        """
+        Fills in the fields that are derived from the others on save. Groups
+        that are created with ``bulk_create`` need to call this first.
+        """
         if not self.last_seen:
             self.last_seen = timezone.now()
         if not self.first_seen:
@@ -350,7 +358,6 @@ class Group(Model):
         self.score = type(self).calculate_score(
             times_seen=self.times_seen, last_seen=self.last_seen
         )
-        super(Group, self).save(*args, **kwargs)
 
     def get_absolute_url(self, params=None, event_id=None):
         # Built manually in preference to django.core.urlresolvers.reverse,
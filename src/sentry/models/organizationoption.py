@@ -49,6 +49,13 @@ class OrganizationOptionManager(OptionManager):
                 self._option_cache[cache_key] = result
         return self._option_cache.get(cache_key, {})
 
+    def get_all_values_bulk(self, organization_ids):
+        """
+        Like ``get_all_values`` for many organizations at once. Options of
+        organizations missing from the cache are loaded with a single query.
+        """
+        return self._get_all_values_bulk(organization_ids, "organization")
+
     def reload_cache(self, organization_id, update_reason):
         if update_reason != "organizationoption.get_all_values":
             schedule_update_config_cache(
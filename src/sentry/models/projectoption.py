@@ -54,6 +54,13 @@ class ProjectOptionManager(OptionManager):
                 self._option_cache[cache_key] = result
         return self._option_cache.get(cache_key, {})
 
+    def get_all_values_bulk(self, project_ids):
+        """
+        Like ``get_all_values`` for many projects at once. Options of projects
+        missing from the cache are loaded with a single query.
+        """
+        return self._get_all_values_bulk(project_ids, "project")
+
     def reload_cache(self, project_id, update_reason):
         if update_reason != "projectoption.get_all_values":
             schedule_update_config_cache(
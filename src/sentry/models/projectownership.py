@@ -10,13 +10,18 @@ from django.utils import timezone
 
 from sentry.db.models import Model, sane_repr
 from sentry.db.models.fields import FlexibleForeignKey, JSONField
-from sentry.ownership.grammar import load_schema
+from sentry.ownership.grammar import RulesMatcher, load_schema
 from sentry.utils import metrics
 from sentry.utils.cache import cache
+from sentry.utils.lru import LRUCache
 from functools import reduce
 
 READ_CACHE_DURATION = 3600
 
+# Compiled rules of the most recently used ownerships, keyed by project and
+# revision.
+_rules_matchers = LRUCache(1000)
+
 
 class ProjectOwnership(Model):
     __core__ = True
@@ -136,15 +141,31 @@ class ProjectOwnership(Model):
 
             return ownership.auto_assignment, actors[0].resolve_many(actors)
 
+    @classmethod
+    def get_rules_matcher(cls, ownership):
+        """
+        Returns a ``RulesMatcher`` for the schema of ``ownership``.
+
+        Matchers are compiled once per revision (``last_updated``) of the
+        ownership of a project and kept in-process.
+        """
+        key = (ownership.project_id, ownership.last_updated)
+        cached = _rules_matchers.get(key)
+        # Schemas can change without bumping ``last_updated`` (e.g. through
+        # ``update()``), so compare them before using a cached matcher.
+        if cached is not None and cached[0] == ownership.schema:
+            return cached[1]
+
+        matcher = RulesMatcher(load_schema(ownership.schema))
+        _rules_matchers.set(key, (ownership.schema, matcher))
+        return matcher
+
     @classmethod
     def _matching_ownership_rules(cls, ownership, project_id, data):
-        rules = []
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
+        if ownership.schema is None:
+            return []
 
-        return rules
+        return cls.get_rules_matcher(ownership).get_matching_rules(data)
 
 
 def resolve_actors(owners, project_id):
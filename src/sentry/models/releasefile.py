@@ -4,15 +4,29 @@ import os
 import errno
 import six
 
+from django.conf import settings
 from django.core.files.base import File as FileObj
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from six.moves.urllib.parse import urlsplit, urlunsplit
 
 from sentry import options
 from sentry.db.models import BoundedPositiveIntegerField, FlexibleForeignKey, Model, sane_repr
 from sentry.models import clear_cached_files
 from sentry.utils import metrics
+from sentry.utils.cache import cache
+from sentry.utils.compat import pickle
 from sentry.utils.hashlib import sha1_text
+from sentry.utils.lru import LRUCache
+
+# Releases with more artifacts than this are not indexed, their artifacts are
+# looked up one by one instead.
+MAX_INDEXED_RELEASE_FILES = 10000
+INDEX_CACHE_DURATION = 300
+
+# Indexes are also kept in-process for a short time, bounded by the total
+# number of artifacts.
+_local_indexes = LRUCache(50000, ttl=60, sizeof=lambda index: len(index or ()) + 1)
 
 
 class ReleaseFile(Model):
@@ -62,6 +76,54 @@ class ReleaseFile(Model):
             return sha1_text(name + "\x00\x00" + dist).hexdigest()
         return sha1_text(name).hexdigest()
 
+    @classmethod
+    def get_index_cache_key(cls, release_id):
+        return u"releasefile:index:v1:%s" % (release_id,)
+
+    @classmethod
+    def get_index(cls, release_id):
+        """
+        Returns a ``(releasefile_id, file_id, dist_id, checksum)`` tuple for
+        every artifact of a release by ident, or ``None`` if the release has
+        too many artifacts to be indexed.
+
+        The index is loaded with a single query and cached, both in the
+        default cache and in-process. Saving or deleting an artifact clears
+        the cached index of its release.
+        """
+        index = _local_indexes.get(release_id)
+        if index is None:
+            cache_key = cls.get_index_cache_key(release_id)
+            index = cache.get(cache_key)
+            if index is None:
+                index = cls._build_index(release_id)
+                cache.set(cache_key, index, INDEX_CACHE_DURATION)
+            _local_indexes.set(release_id, index)
+
+        if index is False:
+            return None
+        return index
+
+    @classmethod
+    def _build_index(cls, release_id):
+        rows = list(
+            cls.objects.filter(release_id=release_id).values_list(
+                "ident", "id", "file_id", "dist_id", "file__checksum"
+            )[: MAX_INDEXED_RELEASE_FILES + 1]
+        )
+        if len(rows) > MAX_INDEXED_RELEASE_FILES:
+            return False
+
+        index = {row[0]: row[1:] for row in rows}
+
+        # Indexes that do not fit into the cache would be rebuilt on every
+        # lookup, so those releases are not indexed either.
+        max_size = settings.SENTRY_CACHE_MAX_VALUE_SIZE
+        if max_size and len(pickle.dumps(index, pickle.HIGHEST_PROTOCOL)) > max_size:
+            return False
+
+        return index
+
     @classmethod
     def normalize(cls, url):
         """Transforms a full absolute url into 2 or 4 generalized options
@@ -121,3 +183,12 @@ class ReleaseFileCache(object):
 
 
 ReleaseFile.cache = ReleaseFileCache()
+
+
+def clear_release_file_index(instance, **kwargs):
+    _local_indexes.delete(instance.release_id)
+    cache.delete(ReleaseFile.get_index_cache_key(instance.release_id))
+
+
+post_save.connect(clear_release_file_index, sender=ReleaseFile, weak=False)
+post_delete.connect(clear_release_file_index, sender=ReleaseFile, weak=False)
@@ -3,14 +3,40 @@ from __future__ import absolute_import
 import six
 
 from base64 import b64encode
-from threading import local
+from threading import Lock, local
 from uuid import uuid4
 
+from django.conf import settings
 from django.core.cache import caches, InvalidCacheBackendError
 
+from sentry.utils import json, metrics
 from sentry.utils.cache import memoize
+from sentry.utils.lru import LRUCache
 from sentry.utils.services import Service
 
+_local_cache = None
+_local_cache_lock = Lock()
+
+
+def get_local_cache():
+    """
+    Returns the process-wide in-memory node cache, or ``None`` if it has been
+    disabled through ``SENTRY_NODESTORE_LOCAL_CACHE_SIZE``.
+
+    Node data is held JSON-encoded so that it is accounted for in bytes and
+    callers never share (and mutate) the same dictionary.
+    """
+    global _local_cache
+    if _local_cache is None and settings.SENTRY_NODESTORE_LOCAL_CACHE_SIZE:
+        with _local_cache_lock:
+            if _local_cache is None:
+                _local_cache = LRUCache(
+                    max_size=settings.SENTRY_NODESTORE_LOCAL_CACHE_SIZE,
+                    ttl=settings.SENTRY_NODESTORE_LOCAL_CACHE_TTL,
+                    sizeof=len,
+                )
+    return _local_cache
+
 
 class NodeStorage(local, Service):
     __all__ = (
@@ -99,31 +125,67 @@ class NodeStorage(local, Service):
         raise NotImplementedError
 
     def _get_cache_item(self, id):
+        if self.local_cache is not None:
+            value = self.local_cache.get(id)
+            metrics.incr("nodestore.local_cache", tags={"result": "hit" if value else "miss"})
+            if value:
+                return json.loads(value)
+
         if self.cache:
-            return self.cache.get(id)
+            data = self.cache.get(id)
+            if data and self.local_cache is not None:
+                self.local_cache.set(id, json.dumps(data))
+            return data
 
     def _get_cache_items(self, id_list):
+        rv = {}
+        if self.local_cache is not None:
+            rv = {k: json.loads(v) for k, v in six.iteritems(self.local_cache.get_many(id_list))}
+            for result, amount in (("hit", len(rv)), ("miss", len(id_list) - len(rv))):
+                if amount:
+                    metrics.incr("nodestore.local_cache", amount=amount, tags={"result": result})
+            if len(rv) == len(id_list):
+                return rv
+            id_list = [id for id in id_list if id not in rv]
+
         if self.cache:
-            return self.cache.get_many(id_list)
-        return {}
+            items = self.cache.get_many(id_list)
+            if self.local_cache is not None:
+                self.local_cache.set_many({k: json.dumps(v) for k, v in six.iteritems(items) if v})
+            rv.update(items)
+        return rv
 
     def _set_cache_item(self, id, data):
-        if self.cache and data:
+        if not data:
+            return
+        if self.local_cache is not None:
+            self.local_cache.set(id, json.dumps(data))
+        if self.cache:
             self.cache.set(id, data)
 
     def _set_cache_items(self, items):
         cacheable_items = {k: v for k, v in six.iteritems(items) if v}
+        if self.local_cache is not None:
+            self.local_cache.set_many({k: json.dumps(v) for k, v in six.iteritems(cacheable_items)})
         if self.cache:
             self.cache.set_many(cacheable_items)
 
     def _delete_cache_item(self, id):
+        if self.local_cache is not None:
+            self.local_cache.delete(id)
         if self.cache:
             self.cache.delete(id)
 
     def _delete_cache_items(self, id_list):
+        if self.local_cache is not None:
+            self.local_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many(id_list)
 
+    @property
+    def local_cache(self):
+        return get_local_cache()
+
     @memoize
     def cache(self):
         try:
@@ -3,14 +3,17 @@ from __future__ import absolute_import, print_function
 import os
 import struct
 from threading import Lock
-from zlib import compress as zlib_compress, decompress as zlib_decompress
 
 from google.cloud import bigtable
 from google.cloud.bigtable.row_set import RowSet
+from google.rpc import code_pb2
 from django.utils import timezone
 
 from sentry.utils import json
+from sentry.utils.cache import memoize
+from sentry.utils.compat import zip
 from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.codecs import ZlibCodec, ZstdCodec, load_dictionary
 
 
 # Cache an instance of the encoder we want to use
@@ -28,6 +31,10 @@ json_dumps = json.JSONEncoder(
 json_loads = json._default_decoder.decode
 
 
+class BigtableError(Exception):
+    pass
+
+
 _connection_lock = Lock()
 _connection_cache = {}
 
@@ -63,6 +70,11 @@ class BigtableNodeStorage(NodeStorage):
     ...     default_ttl=timedelta(days=30),
     ...     compression=True,
     ... )
+
+    ``compression`` is either ``True`` (or ``"zlib"``) or ``"zstd"``. With
+    zstd, ``compression_dictionaries`` lists paths to trained dictionaries, the
+    last of which is used for writing. Rows written with any other codec stay
+    readable.
     """
 
     max_size = 1024 * 1024 * 10
@@ -73,6 +85,7 @@ class BigtableNodeStorage(NodeStorage):
     data_column = b"0"
 
     _FLAG_COMPRESSED = 1 << 0
+    _FLAG_ZSTD = 1 << 1
 
     def __init__(
         self,
@@ -82,6 +95,7 @@ class BigtableNodeStorage(NodeStorage):
         automatic_expiry=False,
         default_ttl=None,
         compression=False,
+        compression_dictionaries=(),
         thread_pool_size=5,  # TODO(mattrobenolt): Remove this
         **kwargs
     ):
@@ -92,12 +106,23 @@ class BigtableNodeStorage(NodeStorage):
         self.automatic_expiry = automatic_expiry
         self.default_ttl = default_ttl
         self.compression = compression
+        self.compression_dictionaries = compression_dictionaries
         self.skip_deletes = automatic_expiry and "_SENTRY_CLEANUP" in os.environ
 
     @property
     def connection(self):
         return get_connection(self.project, self.instance, self.table, self.options)
 
+    @memoize
+    def zlib_codec(self):
+        return ZlibCodec()
+
+    @memoize
+    def zstd_codec(self):
+        return ZstdCodec(
+            dictionaries=[load_dictionary(path) for path in self.compression_dictionaries]
+        )
+
     def get(self, id):
         item_from_cache = self._get_cache_item(id)
         if item_from_cache:
@@ -162,8 +187,10 @@ class BigtableNodeStorage(NodeStorage):
 
         # Check for a compression flag on, if so
         # decompress the data.
-        if flags & self._FLAG_COMPRESSED:
-            data = zlib_decompress(data)
+        if flags & self._FLAG_ZSTD:
+            data = self.zstd_codec.decode(data)
+        elif flags & self._FLAG_COMPRESSED:
+            data = self.zlib_codec.decode(data)
 
         return json_loads(data)
 
@@ -172,6 +199,23 @@ class BigtableNodeStorage(NodeStorage):
         row.commit()
         self._set_cache_item(id, data)
 
+    def set_multi(self, values):
+        if len(values) == 1:
+            self.set(*next(iter(values.items())))
+            return
+
+        rows = [self.encode_row(id, data) for id, data in values.items()]
+        # Unlike `row.commit()`, `mutate_rows` does not raise if some of the
+        # rows could not be written, but returns a status for every row.
+        errors = [
+            u"{}: {}".format(row.row_key, status.message)
+            for row, status in zip(rows, self.connection.mutate_rows(rows))
+            if status.code != code_pb2.OK
+        ]
+        if errors:
+            raise BigtableError(u"Failed to write rows: {}".format(u", ".join(errors)))
+        self._set_cache_items(values)
+
     def encode_row(self, id, data, ttl=None):
         data = json_dumps(data).encode("utf-8")
 
@@ -206,12 +250,15 @@ class BigtableNodeStorage(NodeStorage):
             )
 
         # Track flags for metadata about this row.
-        # This only flag we're tracking now is whether compression
-        # is on or not for the data column.
+        # The only flags we're tracking now are whether compression
+        # is on or not for the data column, and with which codec.
         flags = 0
-        if self.compression:
+        if self.compression == "zstd":
+            flags |= self._FLAG_ZSTD
+            data = self.zstd_codec.encode(data)
+        elif self.compression:
             flags |= self._FLAG_COMPRESSED
-            data = zlib_compress(data)
+            data = self.zlib_codec.encode(data)
 
         # Only need to write the column at all if any flags
         # are enabled. And if so, pack it into a single byte.
@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+
+import zlib
+
+from threading import Lock
+
+
+class Codec(object):
+    """
+    Compresses the serialized (JSON) representation of a node.
+    """
+
+    def encode(self, value):
+        raise NotImplementedError
+
+    def decode(self, value):
+        raise NotImplementedError
+
+
+class ZlibCodec(Codec):
+    def encode(self, value):
+        return zlib.compress(value)
+
+    def decode(self, value):
+        return zlib.decompress(value)
+
+
+class ZstdCodec(Codec):
+    """
+    Zstandard compression, optionally with trained dictionaries.
+
+    Payloads are compressed with the last of ``dictionaries``. Every zstd frame
+    records the ID of the dictionary it was compressed with, so older payloads
+    stay readable as long as their dictionary remains in the list.
+
+    >>> ZstdCodec(dictionaries=[load_dictionary('/path/to/nodestore-v1.dict')])
+    """
+
+    def __init__(self, level=3, dictionaries=()):
+        import zstandard
+
+        self._zstd = zstandard
+        self.level = level
+        self.dictionaries = {}
+        dictionary = None
+        for data in dictionaries:
+            dictionary = zstandard.ZstdCompressionDict(data)
+            self.dictionaries[dictionary.dict_id()] = dictionary
+
+        self.compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+
+        self.decompressors = {0: zstandard.ZstdDecompressor()}
+        for dict_id, dictionary in self.dictionaries.items():
+            self.decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def encode(self, value):
+        return self.compressor.compress(value)
+
+    def decode(self, value):
+        dict_id = self._zstd.get_frame_parameters(value).dict_id
+        try:
+            decompressor = self.decompressors[dict_id]
+        except KeyError:
+            raise ValueError("Unknown zstd dictionary: %d" % (dict_id,))
+        return decompressor.decompress(value)
+
+
+def train_zstd_dictionary(samples, size=112640):
+    """
+    Trains a zstd dictionary from a list of serialized nodes and returns its
+    raw bytes, suitable for ``ZstdCodec(dictionaries=...)``.
+    """
+    import zstandard
+
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+_dictionary_cache = {}
+_dictionary_cache_lock = Lock()
+
+
+def load_dictionary(path):
+    with _dictionary_cache_lock:
+        try:
+            return _dictionary_cache[path]
+        except KeyError:
+            with open(path, "rb") as f:
+                rv = _dictionary_cache[path] = f.read()
+            return rv
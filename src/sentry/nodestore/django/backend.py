@@ -52,6 +52,8 @@ class DjangoNodeStorage(NodeStorage):
         days = math.floor(total_seconds / 86400)
 
         BulkDeleteQuery(model=Node, dtfield="timestamp", days=days).execute()
+        if self.local_cache is not None:
+            self.local_cache.clear()
         if self.cache:
             self.cache.clear()
 
@@ -111,6 +111,8 @@ register(
     default={"url": "http://localhost:3021"},
     flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK,
 )
+# Seconds for which symbolicated frames are remembered per project (0 disables)
+register("symbolicator.frame-cache-ttl", default=0, flags=FLAG_PRIORITIZE_DISK)
 
 # Analytics
 register("analytics.backend", default="noop", flags=FLAG_NOSTORE)
@@ -184,6 +186,10 @@ register("snuba.search.chunk-growth-rate", default=1.5)
 register("snuba.search.max-chunk-size", default=2000)
 register("snuba.search.max-total-chunk-time-seconds", default=30.0)
 register("snuba.search.hits-sample-size", default=100)
+# Number of seconds the ranked groups of an issue search are cached for, so
+# that following pages are served from the cache. 0 disables the cache.
+register("snuba.search.ranking-cache-ttl", default=0)
+register("snuba.search.ranking-cache-size", default=1000)
 register("snuba.track-outcomes-sample-rate", default=0.0)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
@@ -263,6 +269,23 @@ register("discover2.max_tags_to_combine", default=3, flags=FLAG_PRIORITIZE_DISK)
 # Enables setting a sampling rate when producing the tag facet.
 register("discover2.tags_facet_enable_sampling", default=True, flags=FLAG_PRIORITIZE_DISK)
 
+# Number of source files and source maps that are fetched concurrently while
+# processing a JavaScript event. With 1 they are fetched one after the other.
+register("sourcemaps.fetch-concurrency", default=1, flags=FLAG_PRIORITIZE_DISK)
+
+# Number of Snuba batch fragments that are fetched concurrently by a data
+# export task, and whether new exports are stored as gzipped CSV files.
+register("dataexport.fetch-concurrency", default=1, flags=FLAG_PRIORITIZE_DISK)
+register("dataexport.compress", default=False, flags=FLAG_PRIORITIZE_DISK)
+
+# Maximum number of records of each group that are decoded and included in a
+# digest, starting with the most recent one. With 0 all records are included.
+register("digests.max-records-per-group", default=0, flags=FLAG_PRIORITIZE_DISK)
+
+# Number of seconds the results of coalesced tagstore queries are cached for.
+# With 0 results are only shared within a request.
+register("tagstore.coalescer.cache-ttl", default=0, flags=FLAG_PRIORITIZE_DISK)
+
 # Killswitch for datascrubbing after stacktrace processing. Set to False to
 # disable datascrubbers.
 register("processing.can-use-scrubbers", default=True)
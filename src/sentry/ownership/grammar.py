@@ -1,15 +1,24 @@
 from __future__ import absolute_import
 
+import six
+
 from collections import namedtuple
 from parsimonious.grammar import Grammar, NodeVisitor
 from parsimonious.exceptions import ParseError  # noqa
 from sentry.utils.safe import get_path
 from sentry.utils.glob import glob_match
+from sentry.utils.lru import LRUCache
 
-__all__ = ("parse_rules", "dump_schema", "load_schema")
+__all__ = ("parse_rules", "dump_schema", "load_schema", "RulesMatcher")
 
 VERSION = 1
 
+# Characters with a special meaning in glob patterns. Everything in front of
+# the first one of those has to match literally. Backslashes are not special
+# in path patterns, as those are normalized to forward slashes.
+GLOB_SPECIAL_CHARS = frozenset("*?[]{}\\!")
+PATH_GLOB_SPECIAL_CHARS = GLOB_SPECIAL_CHARS - frozenset("\\")
+
 # Grammar is defined in EBNF syntax.
 ownership_grammar = Grammar(
     r"""
@@ -96,20 +105,12 @@ class Matcher(namedtuple("Matcher", "type pattern")):
         return False
 
     def test_url(self, data):
-        try:
-            url = data["request"]["url"]
-        except KeyError:
-            return False
-        return url and glob_match(url, self.pattern, ignorecase=True)
+        url = _get_url(data)
+        return url and self.match_url(url)
 
     def test_path(self, data):
-        for frame in _iter_frames(data):
-            filename = frame.get("filename") or frame.get("abs_path")
-
-            if not filename:
-                continue
-
-            if glob_match(filename, self.pattern, ignorecase=True, path_normalize=True):
+        for filename in _iter_filenames(data):
+            if self.match_path(filename):
                 return True
 
         return False
@@ -117,10 +118,19 @@ class Matcher(namedtuple("Matcher", "type pattern")):
     def test_tag(self, data):
         tag = self.type[5:]
         for k, v in get_path(data, "tags", filter=True) or ():
-            if k == tag and glob_match(v, self.pattern):
+            if k == tag and self.match_tag(v):
                 return True
         return False
 
+    def match_url(self, url):
+        return glob_match(url, self.pattern, ignorecase=True)
+
+    def match_path(self, filename):
+        return glob_match(filename, self.pattern, ignorecase=True, path_normalize=True)
+
+    def match_tag(self, value):
+        return glob_match(value, self.pattern)
+
 
 class Owner(namedtuple("Owner", "type identifier")):
     """
@@ -197,6 +207,174 @@ class OwnershipVisitor(NodeVisitor):
         return children or node
 
 
+class RulesMatcher(object):
+    """
+    Finds the rules matching an event, with the same results as testing every
+    rule in order, but without globbing every pattern against every frame:
+
+    - path and url rules are indexed in a trie by the literal prefix of their
+      pattern, so only rules whose prefix matches are globbed
+    - tag rules are looked up by tag key, and by value for literal patterns
+    - the path and url rules matching a value are cached, as the same files
+      show up in most events of a project
+    """
+
+    def __init__(self, rules, cache_size=1000):
+        self.rules = rules
+        self._paths = _PrefixTrie()
+        self._urls = _PrefixTrie()
+        self._tags = {}
+        self._path_cache = LRUCache(cache_size)
+        self._url_cache = LRUCache(cache_size)
+
+        for idx, rule in enumerate(rules):
+            matcher = rule.matcher
+            if matcher.type == "path":
+                self._paths.add(_get_literal_prefix(matcher.pattern, path_normalize=True), idx)
+            elif matcher.type == "url":
+                self._urls.add(_get_literal_prefix(matcher.pattern), idx)
+            elif matcher.type.startswith("tags."):
+                literals, patterns = self._tags.setdefault(matcher.type[5:], ({}, []))
+                if _get_literal_prefix(matcher.pattern, ignorecase=False) == matcher.pattern:
+                    literals.setdefault(matcher.pattern, []).append(idx)
+                else:
+                    patterns.append(idx)
+
+    def get_matching_rules(self, data):
+        """Returns the rules matching ``data`` in the order they are defined."""
+        matches = set()
+
+        if self._paths:
+            for filename in _iter_filenames(data):
+                matches.update(self._match_paths(filename))
+
+        if self._urls:
+            url = _get_url(data)
+            if url:
+                matches.update(self._match_urls(url))
+
+        if self._tags:
+            for k, v in get_path(data, "tags", filter=True) or ():
+                try:
+                    literals, patterns = self._tags[k]
+                except (KeyError, TypeError):
+                    continue
+                matches.update(literals.get(v, ()))
+                matches.update(idx for idx in patterns if self.rules[idx].matcher.match_tag(v))
+
+        return [self.rules[idx] for idx in sorted(matches)]
+
+    def test(self, data):
+        return bool(self.get_matching_rules(data))
+
+    def _match_paths(self, filename):
+        rv = self._path_cache.get(filename)
+        if rv is None:
+            rv = frozenset(
+                idx
+                for idx in self._paths.iter_candidates(filename.replace("\\", "/"))
+                if self.rules[idx].matcher.match_path(filename)
+            )
+            self._path_cache.set(filename, rv)
+        return rv
+
+    def _match_urls(self, url):
+        rv = self._url_cache.get(url)
+        if rv is None:
+            rv = frozenset(
+                idx
+                for idx in self._urls.iter_candidates(url)
+                if self.rules[idx].matcher.match_url(url)
+            )
+            self._url_cache.set(url, rv)
+        return rv
+
+
+class _PrefixTrie(object):
+    """A character trie of lowercase literal prefixes."""
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, prefix, item):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(item)
+        self.size += 1
+
+    def iter_candidates(self, value):
+        """Yields the items of all prefixes of ``value``."""
+        node = self.root
+        if not _is_ascii(value):
+            # Case insensitive matching of non-ASCII characters does not
+            # always agree with ``lower()``, so do not rule anything out.
+            for item in self._iter_all(node):
+                yield item
+            return
+
+        for item in node.get(None, ()):
+            yield item
+        for char in value.lower():
+            node = node.get(char)
+            if node is None:
+                return
+            for item in node.get(None, ()):
+                yield item
+
+    def _iter_all(self, node):
+        for char, child in six.iteritems(node):
+            if char is None:
+                for item in child:
+                    yield item
+            else:
+                for item in self._iter_all(child):
+                    yield item
+
+
+def _is_ascii(value):
+    try:
+        value.encode("ascii")
+    except (UnicodeError, AttributeError):
+        return False
+    return True
+
+
+def _get_literal_prefix(pattern, ignorecase=True, path_normalize=False):
+    if path_normalize:
+        pattern = pattern.replace("\\", "/")
+        special_chars = PATH_GLOB_SPECIAL_CHARS
+    else:
+        special_chars = GLOB_SPECIAL_CHARS
+
+    for idx, char in enumerate(pattern):
+        if char in special_chars or (ignorecase and ord(char) > 127):
+            pattern = pattern[:idx]
+            break
+
+    if ignorecase:
+        return pattern.lower()
+    return pattern
+
+
+def _get_url(data):
+    try:
+        return data["request"]["url"]
+    except KeyError:
+        return None
+
+
+def _iter_filenames(data):
+    for frame in _iter_frames(data):
+        filename = frame.get("filename") or frame.get("abs_path")
+        if filename:
+            yield filename
+
+
 def _iter_frames(data):
     try:
         for frame in get_path(data, "stacktrace", "frames", filter=True) or ():
@@ -5,8 +5,11 @@ import six
 
 from time import time
 
+from sentry import options
 from sentry.constants import DataCategory
 from sentry.quotas.base import NotRateLimited, Quota, QuotaConfig, QuotaScope, RateLimited
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
 from sentry.utils.redis import (
     get_dynamic_cluster_from_options,
     validate_dynamic_cluster,
@@ -19,12 +22,34 @@ is_rate_limited = load_script("quotas/is_rate_limited.lua")
 
 
 class RedisQuota(Quota):
+    """
+    Enforces quotas with counters in Redis.
+
+    If ``deny_cache_size`` is set, quotas that were found to be exceeded are
+    remembered in-process until the end of their window, and further events
+    are rejected without a round trip to Redis.
+
+    If ``quota_cache_size`` is set, the quotas of a project key are kept
+    in-process for up to ``quota_cache_ttl`` seconds. They are looked up by
+    the rate limit options they are derived from, so that changes to these
+    options take effect immediately.
+    """
+
     #: The ``grace`` period allows accommodating for clock drift in TTL
     #: calculation since the clock on the Redis instance used to store quota
     #: metrics may not be in sync with the computer running this code.
     grace = 60
 
     def __init__(self, **options):
+        deny_cache_size = options.pop("deny_cache_size", 0)
+        self.deny_cache = LRUCache(deny_cache_size) if deny_cache_size else None
+
+        quota_cache_size = options.pop("quota_cache_size", 0)
+        quota_cache_ttl = options.pop("quota_cache_ttl", 60)
+        self.quota_cache = (
+            LRUCache(quota_cache_size, ttl=quota_cache_ttl) if quota_cache_size else None
+        )
+
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_QUOTA_OPTIONS", options
         )
@@ -60,6 +85,27 @@ class RedisQuota(Quota):
         interval = quota.window
         return u"{}:{}:{}".format(self.namespace, local_key, int((timestamp - shift) // interval))
 
+    def __get_cached_quotas(self, project, key=None):
+        if self.quota_cache is None:
+            return self.get_quotas(project, key=key)
+
+        from sentry.models import OrganizationOption
+
+        organization_options = OrganizationOption.objects.get_all_values(project.organization_id)
+        cache_key = (
+            project.id,
+            key.id if key else None,
+            key.rate_limit if key else None,
+            organization_options.get("sentry:account-rate-limit"),
+            organization_options.get("sentry:project-rate-limit"),
+            options.get("system.rate-limit"),
+        )
+        quotas = self.quota_cache.get(cache_key)
+        if quotas is None:
+            quotas = self.get_quotas(project, key=key)
+            self.quota_cache.set(cache_key, quotas)
+        return quotas
+
     def get_quotas(self, project, key=None, keys=None):
         if key:
             key.project = project
@@ -168,7 +214,7 @@ class RedisQuota(Quota):
         # but such quotas are invalid with counters.
         quotas = [
             quota
-            for quota in self.get_quotas(project, key=key)
+            for quota in self.__get_cached_quotas(project, key=key)
             if quota.should_track and category in quota.categories
         ]
 
@@ -210,7 +256,7 @@ class RedisQuota(Quota):
         # affects all data, and (2) quotas that specify `error` events.
         quotas = [
             q
-            for q in self.get_quotas(project, key=key)
+            for q in self.__get_cached_quotas(project, key=key)
             if not q.categories or DataCategory.ERROR in q.categories
         ]
 
@@ -220,6 +266,7 @@ class RedisQuota(Quota):
 
         keys = []
         args = []
+        denied_quotas = []
         for quota in quotas:
             if quota.limit == 0:
                 # A zero-sized quota is the absolute worst-case. Do not call
@@ -242,6 +289,15 @@ class RedisQuota(Quota):
             lua_quota = quota.limit if quota.limit is not None else -1
             args.extend((lua_quota, int(expiry)))
 
+            # The key is specific to the current window of the quota, so
+            # rejections are remembered until the end of the window.
+            if self.deny_cache is not None and self.deny_cache.get((key, lua_quota)):
+                denied_quotas.append(quota)
+
+        if denied_quotas:
+            metrics.incr("quotas.deny_cache.hit")
+            return self.__get_rate_limit(project, denied_quotas, timestamp)
+
         if not keys or not args:
             return NotRateLimited()
 
@@ -251,11 +307,20 @@ class RedisQuota(Quota):
         if not any(rejections):
             return NotRateLimited()
 
-        worst_case = (0, None)
-        for quota, rejected in zip(quotas, rejections):
+        rejected_quotas = []
+        for idx, (quota, rejected) in enumerate(zip(quotas, rejections)):
             if not rejected:
                 continue
 
+            rejected_quotas.append(quota)
+            if self.deny_cache is not None:
+                self.deny_cache.set((keys[idx * 2], args[idx * 2]), True)
+
+        return self.__get_rate_limit(project, rejected_quotas, timestamp)
+
+    def __get_rate_limit(self, project, quotas, timestamp):
+        worst_case = (0, None)
+        for quota in quotas:
             shift = project.organization_id % quota.window
             delay = self.get_next_period_start(quota.window, shift, timestamp) - timestamp
             if delay > worst_case[0]:
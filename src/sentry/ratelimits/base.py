@@ -4,9 +4,16 @@ from sentry.utils.services import Service
 
 
 class RateLimiter(Service):
-    __all__ = ("is_limited", "validate")
+    __all__ = ("is_limited", "is_limited_many", "validate")
 
     window = 60
 
     def is_limited(self, key, limit, project=None, window=None):
         return False
+
+    def is_limited_many(self, keys, limit, project=None, window=None):
+        """
+        Checks several keys against the same limit, returning a list with
+        whether each key is limited.
+        """
+        return [self.is_limited(key, limit, project=project, window=window) for key in keys]
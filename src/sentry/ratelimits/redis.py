@@ -2,19 +2,52 @@ from __future__ import absolute_import
 
 import six
 
+from collections import defaultdict
 from time import time
 
 from sentry.exceptions import InvalidConfiguration
 from sentry.ratelimits.base import RateLimiter
+from sentry.utils import metrics
+from sentry.utils.compat import zip
 from sentry.utils.hashlib import md5_text
-from sentry.utils.redis import get_cluster_from_options
+from sentry.utils.lru import LRUCache
+from sentry.utils.redis import get_cluster_from_options, load_script
+
+gcra = load_script("ratelimits/gcra.lua")
+sliding_window = load_script("ratelimits/sliding_window.lua")
 
 
 class RedisRateLimiter(RateLimiter):
+    """
+    Rate limits keys using one of the following strategies:
+
+    ``fixed``
+        Counts requests in fixed windows. This is cheap, but allows up to
+        twice the limit around window boundaries.
+    ``sliding``
+        Approximates a sliding window by weighting the counter of the
+        previous fixed window.
+    ``gcra``
+        A token bucket (generic cell rate algorithm) that allows bursts of up
+        to ``limit`` requests and refills at ``limit`` requests per window.
+
+    The ``sliding`` and ``gcra`` strategies check all keys that are located
+    on the same Redis host with a single script call.
+
+    If ``deny_cache_size`` is set, keys that were found to be limited are
+    remembered in-process until they would be accepted again, and are
+    rejected without a round trip to Redis.
+    """
+
     window = 60
+    strategies = ("fixed", "sliding", "gcra")
 
-    def __init__(self, **options):
+    def __init__(self, strategy="fixed", deny_cache_size=0, **options):
         self.cluster, options = get_cluster_from_options("SENTRY_RATELIMITER_OPTIONS", options)
+        if strategy not in self.strategies:
+            raise InvalidConfiguration(u"Unknown rate limit strategy: {!r}".format(strategy))
+        self.strategy = strategy
+        self.deny_cache = LRUCache(deny_cache_size) if deny_cache_size else None
 
     def validate(self):
         try:
@@ -24,19 +57,87 @@ class RedisRateLimiter(RateLimiter):
             raise InvalidConfiguration(six.text_type(e))
 
     def is_limited(self, key, limit, project=None, window=None):
+        return self.is_limited_many([key], limit, project=project, window=window)[0]
+
+    def is_limited_many(self, keys, limit, project=None, window=None):
         if window is None:
             window = self.window
 
+        now = time()
+        results = [True] * len(keys)
+        pending = []
+        for idx, key in enumerate(keys):
+            key = self._get_key(key, project)
+            if self.deny_cache is not None:
+                deadline = self.deny_cache.get((key, limit, window))
+                if deadline is not None and deadline > now:
+                    continue
+            pending.append((idx, key))
+
+        if len(pending) < len(keys):
+            metrics.incr(
+                "ratelimits.deny_cache.hit",
+                amount=len(keys) - len(pending),
+                tags={"strategy": self.strategy},
+            )
+        if not pending:
+            return results
+
+        retry_afters = getattr(self, "_check_%s" % (self.strategy,))(
+            [key for _, key in pending], limit, window, now
+        )
+        for (idx, key), retry_after in zip(pending, retry_afters):
+            results[idx] = bool(retry_after)
+            if retry_after and self.deny_cache is not None:
+                self.deny_cache.set((key, limit, window), now + retry_after)
+
+        return results
+
+    def _get_key(self, key, project):
         key_hex = md5_text(key).hexdigest()
-        bucket = int(time() / window)
+        prefix = "rl" if self.strategy == "fixed" else "rl:%s" % (self.strategy,)
 
         if project:
-            key = "rl:%s:%s:%s" % (key_hex, project.id, bucket)
-        else:
-            key = "rl:%s:%s" % (key_hex, bucket)
+            return "%s:%s:%s" % (prefix, key_hex, project.id)
+        return "%s:%s" % (prefix, key_hex)
+
+    def _check_fixed(self, keys, limit, window, now):
+        bucket = int(now / window)
+        retry_after = (bucket + 1) * window - now
 
         with self.cluster.map() as client:
-            result = client.incr(key)
-            client.expire(key, window)
+            results = []
+            for key in keys:
+                key = "%s:%s" % (key, bucket)
+                results.append(client.incr(key))
+                client.expire(key, window)
+
+        return [retry_after if result.value > limit else 0 for result in results]
+
+    def _check_sliding(self, keys, limit, window, now):
+        return self._call_script(sliding_window, keys, limit, window, now)
+
+    def _check_gcra(self, keys, limit, window, now):
+        return self._call_script(gcra, keys, limit, window, now)
+
+    def _call_script(self, script, keys, limit, window, now):
+        """
+        Calls a rate limit script once per host for all keys located on that
+        host, and returns the time until each key would be accepted again in
+        seconds (0 if the key was not limited.)
+        """
+        router = self.cluster.get_router()
+        keys_by_host = defaultdict(list)
+        for idx, key in enumerate(keys):
+            keys_by_host[router.get_host_for_key(key)].append((idx, key))
+
+        args = [int(now * 1000), limit, int(window * 1000)]
+        results = [0] * len(keys)
+        for host, items in six.iteritems(keys_by_host):
+            client = self.cluster.get_local_client(host)
+            for (idx, _), retry_after in zip(
+                items, script(client, [key for _, key in items], args)
+            ):
+                results[idx] = int(retry_after) / 1000.0
 
-        return result.value > limit
+        return results
@@ -11,6 +11,8 @@ from pytz import utc
 from sentry import quotas, utils, features
 from sentry.constants import ObjectStatus
 from sentry.grouping.api import get_grouping_config_dict_for_project
+from sentry.grouping.enhancer import ENHANCEMENT_BASES
+from sentry.grouping.strategies.configurations import CONFIGURATIONS
 from sentry.interfaces.security import DEFAULT_DISALLOWED_SOURCES
 from sentry.ingest.inbound_filters import (
     get_all_filter_specs,
@@ -18,12 +20,20 @@ from sentry.ingest.inbound_filters import (
     FilterStatKeys,
     get_filter_key,
 )
+from sentry.utils import json, metrics
+from sentry.utils.cache import cache
+from sentry.utils.hashlib import md5_text
 from sentry.utils.http import get_origins
 from sentry.utils.sdk import configure_scope
 from sentry.relay.utils import to_camel_case_name
 from sentry.datascrubbing import get_pii_config, get_datascrubbing_settings
 from sentry.models.projectkey import ProjectKeyStatus
 
+#: Bump this to invalidate all cached config fragments, e.g. when the format
+#: of a section changes.
+CONFIG_FRAGMENT_VERSION = 1
+CONFIG_FRAGMENT_CACHE_TIMEOUT = 3600  # 1 hr
+
 
 def get_project_key_config(project_key):
     """Returns a dict containing the information for a specific project key"""
@@ -85,7 +95,95 @@ def get_quotas(project, keys=None):
     return [quota.to_json() for quota in quotas.get_quotas(project, keys=keys)]
 
 
-def get_project_config(project, full_config=True, project_keys=None):
+def _get_filter_settings_inputs(project):
+    inputs = [project.get_option(u"filters:{}".format(flt.id)) for flt in get_all_filter_specs()]
+    if features.has("projects:custom-inbound-filters", project):
+        inputs.append(project.get_option(u"sentry:{}".format(FilterTypes.RELEASES)))
+        inputs.append(project.get_option(u"sentry:{}".format(FilterTypes.ERROR_MESSAGES)))
+    inputs.append(project.get_option("sentry:blacklisted_ips"))
+    inputs.append(project.get_option("sentry:csp_ignored_sources_defaults", True))
+    inputs.append(project.get_option("sentry:csp_ignored_sources", []))
+    return inputs
+
+
+def _get_pii_config_inputs(project):
+    return [
+        project.organization.get_option("sentry:relay_pii_config"),
+        project.get_option("sentry:relay_pii_config"),
+    ]
+
+
+def _get_grouping_config_inputs(project):
+    return [
+        project.get_option("sentry:grouping_config", validate=lambda x: x in CONFIGURATIONS),
+        project.get_option("sentry:grouping_enhancements"),
+        project.get_option(
+            "sentry:grouping_enhancements_base", validate=lambda x: x in ENHANCEMENT_BASES
+        ),
+    ]
+
+
+#: Sections of the project config that only depend on project and
+#: organization options. Each section maps to a function returning the
+#: options it is generated from, and the function generating it.
+CONFIG_FRAGMENTS = {
+    "filterSettings": (_get_filter_settings_inputs, get_filter_settings),
+    "piiConfig": (_get_pii_config_inputs, get_pii_config),
+    "groupingConfig": (_get_grouping_config_inputs, get_grouping_config_dict_for_project),
+}
+
+
+def get_config_fragments(project, sections, fragments=None):
+    """
+    Returns the given sections of the project config, see ``CONFIG_FRAGMENTS``.
+
+    Sections are cached by a version stamp computed from the options they are
+    generated from, so a section is only regenerated after one of its options
+    changed. Since the stamp does not include the project, projects with the
+    same settings share cached sections.
+
+    :param fragments: A dictionary used to memoize sections across calls,
+        e.g. when generating the configs of many projects and keys at once.
+    """
+    if fragments is None:
+        fragments = {}
+
+    rv = {}
+    cache_keys = {}
+    for section in sections:
+        get_inputs, _ = CONFIG_FRAGMENTS[section]
+        stamp = md5_text(
+            json.dumps([CONFIG_FRAGMENT_VERSION, get_inputs(project)], sort_keys=True)
+        ).hexdigest()
+        cache_key = u"relayconfig-fragment:{}:{}".format(section, stamp)
+        if cache_key in fragments:
+            rv[section] = fragments[cache_key]
+        else:
+            cache_keys[section] = cache_key
+
+    if not cache_keys:
+        return rv
+
+    cached = cache.get_many(list(cache_keys.values()))
+    missing = {}
+    for section, cache_key in six.iteritems(cache_keys):
+        if cache_key in cached:
+            value = cached[cache_key]
+        else:
+            _, generate = CONFIG_FRAGMENTS[section]
+            with Hub.current.start_span(op=u"get_config_fragment.{}".format(section)):
+                value = missing[cache_key] = generate(project)
+        rv[section] = fragments[cache_key] = value
+
+    metrics.incr("relay.config_fragments.hit", amount=len(cache_keys) - len(missing))
+    metrics.incr("relay.config_fragments.miss", amount=len(missing))
+    if missing:
+        cache.set_many(missing, CONFIG_FRAGMENT_CACHE_TIMEOUT)
+
+    return rv
+
+
+def get_project_config(project, full_config=True, project_keys=None, fragments=None):
     """
     Constructs the ProjectConfig information.
 
@@ -99,6 +197,8 @@ def get_project_config(project, full_config=True, project_keys=None):
         no project keys are provided it is assumed that the config does not
         need to contain auth information (this is the case when used in
         python's StoreView)
+    :param fragments: A dictionary used to memoize config sections that can
+        be shared between projects and keys, see ``get_config_fragments``.
 
     :return: a ProjectConfig object for the given project
     """
@@ -110,6 +210,14 @@ def get_project_config(project, full_config=True, project_keys=None):
 
     public_keys = get_public_key_configs(project, full_config, project_keys=project_keys)
 
+    if full_config:
+        sections = ("piiConfig", "filterSettings", "groupingConfig")
+    else:
+        sections = ("piiConfig",)
+
+    with Hub.current.start_span(op="get_config_fragments"):
+        config_fragments = get_config_fragments(project, sections, fragments=fragments)
+
     with Hub.current.start_span(op="get_public_config"):
         now = datetime.utcnow().replace(tzinfo=utc)
         cfg = {
@@ -126,7 +234,7 @@ def get_project_config(project, full_config=True, project_keys=None):
                     for r in project.organization.get_option("sentry:trusted-relays", [])
                     if r
                 ],
-                "piiConfig": get_pii_config(project),
+                "piiConfig": config_fragments["piiConfig"],
                 "datascrubbingSettings": get_datascrubbing_settings(project),
             },
             "organizationId": project.organization_id,
@@ -137,10 +245,8 @@ def get_project_config(project, full_config=True, project_keys=None):
         # This is all we need for external Relay processors
         return ProjectConfig(project, **cfg)
 
-    with Hub.current.start_span(op="get_filter_settings"):
-        cfg["config"]["filterSettings"] = get_filter_settings(project)
-    with Hub.current.start_span(op="get_grouping_config_dict_for_project"):
-        cfg["config"]["groupingConfig"] = get_grouping_config_dict_for_project(project)
+    cfg["config"]["filterSettings"] = config_fragments["filterSettings"]
+    cfg["config"]["groupingConfig"] = config_fragments["groupingConfig"]
     with Hub.current.start_span(op="get_event_retention"):
         cfg["config"]["eventRetention"] = quotas.get_event_retention(project.organization)
     with Hub.current.start_span(op="get_all_quotas"):
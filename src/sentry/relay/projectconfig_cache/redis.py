@@ -2,13 +2,29 @@ from __future__ import absolute_import
 
 import six
 
+from django.utils.encoding import force_text
+
 from sentry.relay.projectconfig_cache.base import ProjectConfigCache
-from sentry.utils import json
+from sentry.utils import json, metrics
+from sentry.utils.compat import zip
+from sentry.utils.hashlib import md5_text
 from sentry.utils.redis import get_dynamic_cluster_from_options, validate_dynamic_cluster
 
 
 REDIS_CACHE_TIMEOUT = 3600  # 1 hr
 
+# Fields that change whenever a config is generated, without a change to the
+# config itself. They are not considered when diffing configs.
+VOLATILE_FIELDS = frozenset(["lastFetch", "lastChange", "rev"])
+
+
+def get_config_hash(config):
+    return md5_text(
+        json.dumps(
+            {k: v for k, v in six.iteritems(config) if k not in VOLATILE_FIELDS}, sort_keys=True
+        )
+    ).hexdigest()
+
 
 class RedisProjectConfigCache(ProjectConfigCache):
     def __init__(self, **options):
@@ -23,35 +39,111 @@ class RedisProjectConfigCache(ProjectConfigCache):
     def __get_redis_key(self, project_id):
         return "relayconfig:%s" % (project_id,)
 
+    def __get_redis_hash_key(self, project_id):
+        return "relayconfig-hash:%s" % (project_id,)
+
     def __get_redis_client(self, routing_key):
         if self.is_redis_cluster:
             return self.cluster
         else:
             return self.cluster.get_local_client_for_key(routing_key)
 
+    def __execute_many(self, commands):
+        """
+        Executes ``(routing_key, command, args)`` tuples in one batch per
+        host and returns their results in order.
+
+        We cannot route by org, because Relay does not know the org when
+        fetching, so every config may live on a different host.
+        """
+        if not commands:
+            return []
+
+        if self.is_redis_cluster:
+            pipe = self.cluster.pipeline()
+            for _, command, args in commands:
+                getattr(pipe, command)(*args)
+            return pipe.execute()
+
+        with self.cluster.fanout() as client:
+            promises = [
+                getattr(client.target_key(routing_key), command)(*args)
+                for routing_key, command, args in commands
+            ]
+        return [promise.value for promise in promises]
+
     def set_many(self, configs):
-        for project_id, config in six.iteritems(configs):
-            # XXX(markus): Figure out how to do pipelining here. We may have
-            # multiple routing keys (-> multiple clients).
-            #
-            # We cannot route by org, because Relay does not know the org when
-            # fetching.
+        configs = [
+            (self.__get_redis_key(project_id), self.__get_redis_hash_key(project_id), config)
+            for project_id, config in six.iteritems(configs)
+        ]
 
-            key = self.__get_redis_key(project_id)
-            client = self.__get_redis_client(key)
-            client.setex(key, REDIS_CACHE_TIMEOUT, json.dumps(config))
+        # Hashes are always routed along with their config.
+        old_hashes = self.__execute_many(
+            [(key, "get", (hash_key,)) for key, hash_key, _ in configs]
+        )
+
+        # Skip writing configs that did not change, but keep them from
+        # expiring. If the config is gone, `expire` returns False and the
+        # config is written after all.
+        writes = []
+        unchanged = []
+        for (key, hash_key, config), old_hash in zip(configs, old_hashes):
+            config_hash = get_config_hash(config)
+            if old_hash is not None and force_text(old_hash) == config_hash:
+                unchanged.append((key, hash_key, config, config_hash))
+            else:
+                writes.append((key, hash_key, config, config_hash))
+
+        commands = []
+        for key, hash_key, _, _ in unchanged:
+            commands.append((key, "expire", (key, REDIS_CACHE_TIMEOUT)))
+            commands.append((key, "expire", (hash_key, REDIS_CACHE_TIMEOUT)))
+        for key, hash_key, config, config_hash in writes:
+            commands.append((key, "setex", (key, REDIS_CACHE_TIMEOUT, json.dumps(config))))
+            commands.append((key, "setex", (hash_key, REDIS_CACHE_TIMEOUT, config_hash)))
+        results = self.__execute_many(commands)
+
+        expired = []
+        for entry, refreshed in zip(unchanged, results[::2]):
+            if not refreshed:
+                key, hash_key, config, config_hash = entry
+                expired.append((key, "setex", (key, REDIS_CACHE_TIMEOUT, json.dumps(config))))
+                expired.append((key, "setex", (hash_key, REDIS_CACHE_TIMEOUT, config_hash)))
+        self.__execute_many(expired)
+
+        metrics.incr(
+            "relay.projectconfig_cache.write",
+            amount=len(unchanged) - len(expired) // 2,
+            tags={"result": "unchanged"},
+        )
+        metrics.incr(
+            "relay.projectconfig_cache.write",
+            amount=len(writes) + len(expired) // 2,
+            tags={"result": "changed"},
+        )
 
     def delete_many(self, project_ids):
+        commands = []
         for project_id in project_ids:
-            # XXX(markus): Figure out how to do pipelining here. We may have
-            # multiple routing keys (-> multiple clients).
-            #
-            # We cannot route by org, because Relay does not know the org when
-            # fetching.
-
             key = self.__get_redis_key(project_id)
-            client = self.__get_redis_client(key)
-            client.delete(key)
+            commands.append((key, "delete", (key,)))
+            commands.append((key, "delete", (self.__get_redis_hash_key(project_id),)))
+        self.__execute_many(commands)
+
+    def get_many(self, project_ids):
+        project_ids = list(project_ids)
+        results = self.__execute_many(
+            [
+                (self.__get_redis_key(project_id), "get", (self.__get_redis_key(project_id),))
+                for project_id in project_ids
+            ]
+        )
+        return {
+            project_id: json.loads(rv)
+            for project_id, rv in zip(project_ids, results)
+            if rv is not None
+        }
 
     def get(self, project_id):
         key = self.__get_redis_key(project_id)
@@ -355,6 +355,12 @@ def post_process_forwarder(**options):
     type=int,
     help="How many messages to process before committing offsets.",
 )
+@click.option(
+    "--batch-size",
+    default=None,
+    type=int,
+    help="Process up to this many messages at once, committing offsets after every batch.",
+)
 @click.option(
     "--initial-offset-reset",
     default="latest",
@@ -376,6 +382,7 @@ def query_subscription_consumer(**options):
         group_id=options["group"],
         topic=options["topic"],
         commit_batch_size=options["commit_batch_size"],
+        batch_size=options["batch_size"],
         initial_offset_reset=options["initial_offset_reset"],
         force_offset_reset=options["force_offset_reset"],
     )
@@ -454,7 +461,7 @@ def batching_kafka_options(group):
     "--concurrency",
     type=int,
     default=None,
-    help="(Deprecated) Ingest consumers no longer use multiple processing threads.",
+    help="Number of threads flushing batches of different partitions concurrently.",
 )
 @configuration
 def ingest_consumer(consumer_types, all_consumer_types, **options):
@@ -478,10 +485,6 @@ def ingest_consumer(consumer_types, all_consumer_types, **options):
     if not all_consumer_types and not consumer_types:
         raise click.ClickException("Need to specify --all-consumer-types or --consumer-type")
 
-    concurrency = options.pop("concurrency", None)
-    if concurrency is not None:
-        click.echo("Warning: `concurrency` argument is deprecated and will be removed.", err=True)
-
     with metrics.global_tags(
         ingest_consumer_types=",".join(sorted(consumer_types)), _all_threads=True
     ):
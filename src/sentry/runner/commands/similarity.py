@@ -0,0 +1,75 @@
+from __future__ import absolute_import, print_function
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def similarity():
+    """Manage the similarity index."""
+
+
+@similarity.command()
+@click.argument("project_id", type=int)
+@click.option("--days", default=30, show_default=True, help="Index events of this many days.")
+@click.option(
+    "--batch-size",
+    default=500,
+    show_default=True,
+    help="How many events to fetch from Snuba and record at once.",
+)
+@configuration
+def backfill(project_id, days, batch_size):
+    """
+    Re-index the events of a project.
+
+    Events are fetched from Snuba in batches, and the features of all events
+    in a batch are recorded with a single call to the index.
+    """
+    import time
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from sentry import eventstore, similarity as similarity_index
+    from sentry.models import Project
+
+    try:
+        project = Project.objects.get_from_cache(id=project_id)
+    except Project.DoesNotExist:
+        raise click.ClickException(u"Project {} does not exist".format(project_id))
+
+    end = timezone.now()
+    snuba_filter = eventstore.Filter(
+        project_ids=[project.id], start=end - timedelta(days=days), end=end
+    )
+
+    started = time.time()
+    count = 0
+    while True:
+        events = eventstore.get_events(
+            filter=snuba_filter,
+            orderby=["-timestamp", "-event_id"],
+            limit=batch_size,
+            offset=count,
+            referrer="similarity.backfill",
+        )
+        if not events:
+            break
+
+        for event in events:
+            event.project = project
+        similarity_index.bulk_record(project, events)
+
+        count += len(events)
+        click.echo(
+            u"Indexed {} events ({:.1f} events/s)".format(
+                count, count / max(time.time() - started, 0.001)
+            )
+        )
+
+        if len(events) < batch_size:
+            break
+
+    click.echo(u"Done, indexed {} events in {:.1f}s".format(count, time.time() - started))
@@ -0,0 +1,39 @@
+-- Check a collection of rate limits using the generic cell rate algorithm
+-- (GCRA), a token bucket that stores a single timestamp per key: the
+-- "theoretical arrival time" (TAT) at which the bucket would be full again.
+--
+-- Values provided as ``KEYS`` are the keys of the rate limits to check.
+-- ``ARGV`` provides the current time, the limit and the window (both times
+-- in milliseconds), which are shared by all keys:
+--
+--   KEYS = {"rl:gcra:foo", "rl:gcra:bar"}
+--   ARGV = {1577836800000, 10, 60000}
+--
+-- Each key allows bursts of up to ``limit`` requests and refills at a rate
+-- of ``limit`` requests per ``window``. Keys that are not limited are
+-- updated, limited keys are left untouched. The result is a Lua table/array
+-- (Redis multi bulk reply) that contains the number of milliseconds until
+-- the next request would be accepted for every limited key, and 0 for every
+-- accepted key.
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local interval = limit > 0 and window / limit or window
+
+local results = {}
+for i=1, #KEYS do
+    local tat = math.max(tonumber(redis.call('GET', KEYS[i]) or now), now)
+    local new_tat = tat + interval
+    local retry_after = new_tat - window - now
+    if limit <= 0 then
+        -- A limit of 0 rejects everything.
+        results[i] = window
+    elseif retry_after > 0 then
+        results[i] = math.ceil(retry_after)
+    else
+        redis.call('SET', KEYS[i], math.ceil(new_tat), 'PX', math.ceil(new_tat - now))
+        results[i] = 0
+    end
+end
+
+return results
@@ -0,0 +1,44 @@
+-- Check a collection of rate limits using a sliding window counter. Every
+-- key is a hash of per-window counters, and the number of requests in the
+-- sliding window is approximated by weighting the counter of the previous
+-- window by how much of it still overlaps with the sliding window.
+--
+-- Values provided as ``KEYS`` are the keys of the rate limits to check.
+-- ``ARGV`` provides the current time, the limit and the window (both times
+-- in milliseconds), which are shared by all keys:
+--
+--   KEYS = {"rl:sw:foo", "rl:sw:bar"}
+--   ARGV = {1577836800000, 10, 60000}
+--
+-- Accepted requests are counted, limited requests are not. The result is a
+-- Lua table/array (Redis multi bulk reply) that contains the number of
+-- milliseconds until the current window ends for every limited key, and 0
+-- for every accepted key.
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+
+local current = math.floor(now / window)
+local previous = current - 1
+local elapsed = (now % window) / window
+
+local results = {}
+for i=1, #KEYS do
+    local counts = redis.call('HMGET', KEYS[i], current, previous)
+    local count = (tonumber(counts[1]) or 0) + (tonumber(counts[2]) or 0) * (1 - elapsed)
+    if count + 1 > limit then
+        results[i] = math.max(window - now % window, 1)
+    else
+        redis.call('HINCRBY', KEYS[i], current, 1)
+        -- Drop counters of windows that no longer overlap.
+        for _, field in ipairs(redis.call('HKEYS', KEYS[i])) do
+            if tonumber(field) < previous then
+                redis.call('HDEL', KEYS[i], field)
+            end
+        end
+        redis.call('PEXPIRE', KEYS[i], window * 2)
+        results[i] = 0
+    end
+end
+
+return results
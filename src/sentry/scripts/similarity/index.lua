@@ -438,9 +438,14 @@ local function get_frequencies(configuration, index, item)
     return frequencies
 end
 
+local function get_frequencies_expiration(configuration)
+    return configuration.timestamp + configuration.interval * configuration.retention
+end
+
 local function set_frequencies(configuration, index, item, frequencies, expiration)
+    -- An expiration of `false` leaves setting the expiration to the caller.
     if expiration == nil then
-        expiration = configuration.timestamp + configuration.interval * configuration.retention
+        expiration = get_frequencies_expiration(configuration)
     end
 
     local key = get_frequency_key(configuration, index, item)
@@ -452,7 +457,9 @@ local function set_frequencies(configuration, index, item, frequencies, expirati
         end
     end
 
-    redis.call('EXPIREAT', key, expiration)
+    if expiration then
+        redis.call('EXPIREAT', key, expiration)
+    end
 end
 
 local function merge_frequencies(configuration, index, source, destination)
@@ -604,31 +611,74 @@ local function search(configuration, parameters, limit)
 end
 
 
+local function record(configuration, key, signatures, expiration)
+    return table.imap(
+        signatures,
+        function (signature)
+            set_frequencies(configuration, signature.index, key, signature.frequencies, expiration)
+            for band, buckets in ipairs(signature.frequencies) do
+                for bucket in pairs(buckets) do
+                    get_bucket_membership_set(configuration, signature.index, band, bucket):add(key)
+                end
+            end
+        end
+    )
+end
+
+
 -- Command Parsing
 
+local function signature_argument_parser(configuration)
+    return object_argument_parser({
+        {"index", argument_parser(validate_value)},
+        {"frequencies", frequencies_argument_parser(configuration)},
+    })
+end
+
 local commands = {
     RECORD = function (configuration, cursor, arguments)
         local cursor, key, signatures = multiple_argument_parser(
             argument_parser(validate_value),
-            variadic_argument_parser(
-                object_argument_parser({
-                    {"index", argument_parser(validate_value)},
-                    {"frequencies", frequencies_argument_parser(configuration)},
-                })
-            )
+            variadic_argument_parser(signature_argument_parser(configuration))
         )(cursor, arguments)
 
-        return table.imap(
-            signatures,
-            function (signature)
-                set_frequencies(configuration, signature.index, key, signature.frequencies)
-                for band, buckets in ipairs(signature.frequencies) do
-                    for bucket in pairs(buckets) do
-                        get_bucket_membership_set(configuration, signature.index, band, bucket):add(key)
-                    end
+        return record(configuration, key, signatures)
+    end,
+    RECORD_MANY = function (configuration, cursor, arguments)
+        -- Records signatures for multiple keys, each with its own timestamp
+        -- (which overrides the timestamp of the configuration.)
+        local cursor, records = variadic_argument_parser(
+            object_argument_parser({
+                {"timestamp", argument_parser(validate_number)},
+                {"key", argument_parser(validate_value)},
+                {"signatures", repeated_argument_parser(signature_argument_parser(configuration))},
+            })
+        )(cursor, arguments)
+
+        -- The frequencies of a key are shared by all of its records, so they
+        -- expire relative to the most recent record, whatever the order of
+        -- the records is.
+        local expirations = {}
+        for _, item in ipairs(records) do
+            local item_configuration = setmetatable(
+                {timestamp = item.timestamp},
+                {__index = configuration}
+            )
+            record(item_configuration, item.key, item.signatures, false)
+
+            local expiration = get_frequencies_expiration(item_configuration)
+            for _, signature in ipairs(item.signatures) do
+                local frequency_key = get_frequency_key(configuration, signature.index, item.key)
+                if expirations[frequency_key] == nil or expirations[frequency_key] < expiration then
+                    expirations[frequency_key] = expiration
                 end
             end
-        )
+        end
+
+        for frequency_key, expiration in pairs(expirations) do
+            redis.call('EXPIREAT', frequency_key, expiration)
+        end
+        return #records
     end,
     CLASSIFY = function (configuration, cursor, arguments)
         local cursor, limit, parameters = multiple_argument_parser(
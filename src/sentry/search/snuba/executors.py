@@ -6,9 +6,10 @@ import logging
 import time
 import six
 import sentry_sdk
-from datetime import timedelta
+from datetime import datetime, timedelta
 from hashlib import md5
 
+from django.db.models import Model
 from django.utils import timezone
 
 from sentry import options
@@ -17,6 +18,8 @@ from sentry.api.paginator import DateTimePaginator, SequencePaginator, Paginator
 from sentry.constants import ALLOWED_FUTURE_DELTA
 from sentry.models import Group
 from sentry.utils import json, metrics, snuba
+from sentry.utils.cache import cache
+from sentry.utils.dates import to_timestamp
 
 
 def get_search_filter(search_filters, name, operator):
@@ -42,6 +45,22 @@ def get_search_filter(search_filters, name, operator):
     return found_val
 
 
+def get_search_filter_value_key(value):
+    """
+    Returns a JSON serializable representation of a search filter value, which
+    identifies models (e.g. users or releases) by their primary key.
+    """
+    if isinstance(value, (list, tuple)):
+        return [get_search_filter_value_key(v) for v in value]
+    if isinstance(value, Model):
+        return [type(value).__name__, value.pk]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (six.string_types, six.integer_types, float)):
+        return value
+    return six.text_type(value)
+
+
 @six.add_metaclass(ABCMeta)
 class AbstractQueryExecutor:
     """This class serves as a template for Query Executors.
@@ -331,6 +350,71 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             # is invalid.
             return self.empty_result
 
+        ranking_cache_ttl = options.get("snuba.search.ranking-cache-ttl")
+        if ranking_cache_ttl:
+            paginator_results = self._query_ranking_cache(
+                projects,
+                retention_window_start,
+                group_queryset,
+                environments,
+                sort_by,
+                limit,
+                cursor,
+                count_hits,
+                paginator_options,
+                search_filters,
+                date_from,
+                date_to,
+                start,
+                end,
+                ranking_cache_ttl,
+            )
+            if paginator_results is not None:
+                return paginator_results
+
+        search_results = self._search_groups(
+            projects,
+            retention_window_start,
+            group_queryset,
+            environments,
+            sort_by,
+            limit,
+            cursor,
+            count_hits,
+            paginator_options,
+            search_filters,
+            start,
+            end,
+        )
+        if search_results is None:
+            return self.empty_result
+
+        paginator_results, _, _, more_results = search_results
+        return self._get_page(paginator_results, limit, cursor, more_results)
+
+    def _search_groups(
+        self,
+        projects,
+        retention_window_start,
+        group_queryset,
+        environments,
+        sort_by,
+        limit,
+        cursor,
+        count_hits,
+        paginator_options,
+        search_filters,
+        start,
+        end,
+    ):
+        """
+        Finds the groups matching the query in Snuba and Postgres, in chunks
+        until there are enough results for a page of ``limit`` groups.
+
+        Returns a tuple of the paginator results, the list of found
+        ``(group_id, score)`` tuples, the number of hits (if calculated) and
+        whether there are more results, or ``None`` if nothing matches.
+        """
         # Here we check if all the django filters reduce the set of groups down
         # to something that we can send down to Snuba in a `group_id IN (...)`
         # clause.
@@ -346,7 +430,7 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         if not group_ids:
             # no matches could possibly be found from this point on
             metrics.incr("snuba.search.no_candidates", skip_internal=False)
-            return self.empty_result
+            return None
         elif len(group_ids) > max_candidates:
             # If the pre-filter query didn't include anything to significantly
             # filter down the number of results (from 'first_release', 'query',
@@ -385,7 +469,7 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             end,
         )
         if count_hits and hits == 0:
-            return self.empty_result
+            return None
 
         paginator_results = self.empty_result
         result_groups = []
@@ -472,6 +556,102 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             if group_ids or len(paginator_results.results) >= limit or not more_results:
                 break
 
+        metrics.timing("snuba.search.num_chunks", num_chunks)
+
+        return paginator_results, result_groups, hits, more_results
+
+    def _query_ranking_cache(
+        self,
+        projects,
+        retention_window_start,
+        group_queryset,
+        environments,
+        sort_by,
+        limit,
+        cursor,
+        count_hits,
+        paginator_options,
+        search_filters,
+        date_from,
+        date_to,
+        start,
+        end,
+        ttl,
+    ):
+        """
+        Serves a page from the ranked list of the groups matching the query,
+        which is cached for ``ttl`` seconds. On a cache miss, the first
+        ``snuba.search.ranking-cache-size`` groups are ranked at once, so the
+        following pages only need a cache read.
+
+        Returns ``None`` if the page reaches past the end of a truncated
+        ranking.
+        """
+        cache_key = self._get_ranking_cache_key(
+            projects, environments, sort_by, search_filters, date_from, date_to, ttl
+        )
+        ranking = cache.get(cache_key)
+        if ranking is None:
+            metrics.incr("snuba.search.ranking_cache", tags={"result": "miss"}, skip_internal=False)
+            ranking_size = options.get("snuba.search.ranking-cache-size")
+            search_results = self._search_groups(
+                projects,
+                retention_window_start,
+                group_queryset,
+                environments,
+                sort_by,
+                ranking_size,
+                None,
+                True,
+                {"max_limit": ranking_size},
+                search_filters,
+                start,
+                end,
+            )
+            if search_results is None:
+                ranking = {"groups": [], "hits": 0, "more_results": False}
+            else:
+                _, result_groups, hits, more_results = search_results
+                ranking = {"groups": result_groups, "hits": hits, "more_results": more_results}
+            cache.set(cache_key, ranking, ttl)
+        else:
+            metrics.incr("snuba.search.ranking_cache", tags={"result": "hit"}, skip_internal=False)
+
+        if not ranking["groups"] and not ranking["more_results"]:
+            return self.empty_result
+
+        paginator_results = SequencePaginator(
+            [(score, id) for (id, score) in ranking["groups"]], reverse=True, **paginator_options
+        ).get_result(limit, cursor, known_hits=ranking["hits"] if count_hits else None)
+        if ranking["more_results"] and len(paginator_results.results) < limit:
+            return None
+
+        return self._get_page(paginator_results, limit, cursor, ranking["more_results"])
+
+    def _get_ranking_cache_key(
+        self, projects, environments, sort_by, search_filters, date_from, date_to, ttl
+    ):
+        # Relative date ranges (e.g. the last 14 days) move with every request,
+        # so they are rounded down to the TTL bucket to let them share a key.
+        def round_date(value):
+            return value and int(to_timestamp(value) // ttl)
+
+        query = [
+            sorted(p.id for p in projects),
+            environments and sorted(environment.id for environment in environments),
+            sort_by,
+            [
+                [sf.key.name, sf.operator, get_search_filter_value_key(sf.value.raw_value)]
+                for sf in search_filters
+            ],
+            round_date(date_from),
+            round_date(date_to),
+        ]
+        query_hash = md5(json.dumps(query).encode("utf-8")).hexdigest()
+        # The ranking is reused for queries in the same time bucket.
+        return u"search:ranking:{}:{}".format(query_hash, int(time.time() // ttl))
+
+    def _get_page(self, paginator_results, limit, cursor, more_results):
         # HACK: We're using the SequencePaginator to mask the complexities of going
         # back and forth between two databases. This causes a problem with pagination
         # because we're 'lying' to the SequencePaginator (it thinks it has the entire
@@ -491,8 +671,6 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             # more results.
             paginator_results.prev.has_results = True
 
-        metrics.timing("snuba.search.num_chunks", num_chunks)
-
         groups = Group.objects.in_bulk(paginator_results.results)
         paginator_results.results = [groups[k] for k in paginator_results.results if k in groups]
 
@@ -75,7 +75,13 @@ def _make_index_backend(cluster, namespace="sim:1"):
 
     return MetricsWrapper(
         RedisScriptMinHashIndexBackend(
-            cluster, namespace, MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+            cluster,
+            namespace,
+            MinHashSignatureBuilder(16, 0xFFFF, cache_size=10000),
+            8,
+            60 * 60 * 24 * 30,
+            3,
+            5000,
         ),
         scope_tag_name=None,
     )
@@ -142,4 +148,5 @@ def _build_dispatcher(methodname):
 
 merge = _build_dispatcher("merge")
 record = _build_dispatcher("record")
+bulk_record = _build_dispatcher("bulk_record")
 delete = _build_dispatcher("delete")
@@ -19,6 +19,10 @@ class AbstractIndexBackend(object):
     def record(self, scope, key, items, timestamp=None):
         pass
 
+    @abstractmethod
+    def record_many(self, scope, records, timestamp=None):
+        pass
+
     @abstractmethod
     def merge(self, scope, destination, items, timestamp=None):
         pass
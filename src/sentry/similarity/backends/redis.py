@@ -147,6 +147,43 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
 
         return self.__index(scope, arguments)
 
+    def record_many(self, scope, records, timestamp=None):
+        """
+        Records items for multiple keys with a single script call. ``records``
+        is a sequence of ``(key, items, timestamp)`` tuples, where a
+        timestamp of ``None`` defaults to ``timestamp`` (or the current time.)
+        """
+        if timestamp is None:
+            timestamp = int(time.time())
+
+        record_arguments = []
+        for key, items, record_timestamp in records:
+            if not items:
+                continue
+
+            record_arguments.extend(
+                [record_timestamp if record_timestamp is not None else timestamp, key, len(items)]
+            )
+            for idx, features in items:
+                record_arguments.append(idx)
+                record_arguments.extend(self._build_signature_arguments(features))
+
+        if not record_arguments:
+            return  # nothing to do
+
+        arguments = [
+            "RECORD_MANY",
+            timestamp,
+            self.namespace,
+            self.bands,
+            self.interval,
+            self.retention,
+            self.candidate_set_limit,
+            scope,
+        ]
+
+        return self.__index(scope, arguments + record_arguments)
+
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
             timestamp = int(time.time())
@@ -1,18 +1,36 @@
 from __future__ import absolute_import
 
 import mmh3
-from sentry.utils.compat import map
+from sentry.utils.compat import map, zip
+from sentry.utils.lru import LRUCache
 
 
 class MinHashSignatureBuilder(object):
-    def __init__(self, columns, rows):
+    """
+    Builds MinHash signatures of ``columns`` values in ``[0, rows)``.
+
+    If ``cache_size`` is set, the hashes of up to that many features are
+    remembered, since the same features (e.g. frames) tend to appear in many
+    events of a project.
+    """
+
+    def __init__(self, columns, rows, cache_size=0):
         self.columns = columns
         self.rows = rows
+        self.cache = LRUCache(cache_size) if cache_size else None
+
+    def _get_hashes(self, feature):
+        if self.cache is not None:
+            hashes = self.cache.get(feature)
+            if hashes is not None:
+                return hashes
+
+        hashes = [mmh3.hash(feature, column) % self.rows for column in range(self.columns)]
+        if self.cache is not None:
+            self.cache.set(feature, hashes)
+        return hashes
 
     def __call__(self, features):
-        return map(
-            lambda column: min(
-                map(lambda feature: mmh3.hash(feature, column) % self.rows, features)
-            ),
-            range(self.columns),
-        )
+        # Hash every distinct feature once for all columns, then take the
+        # minimum of each column.
+        return map(min, zip(*map(self._get_hashes, set(features))))
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 import logging
+from collections import OrderedDict
 
 import jsonschema
 import pytz
@@ -32,6 +33,26 @@ def register_subscriber(subscriber_key):
     return inner
 
 
+batch_subscriber_registry = {}
+
+
+def register_batch_subscriber(subscriber_key):
+    """
+    Registers a callback that receives all updates of a batch for subscriptions of the
+    given type at once, as a list of `(subscription_update, subscription)` tuples. When
+    the consumer runs in batch mode, it is used instead of the callback registered via
+    `register_subscriber`.
+    """
+
+    def inner(func):
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -57,6 +78,7 @@ class QuerySubscriptionConsumer(object):
         group_id,
         topic=None,
         commit_batch_size=100,
+        batch_size=None,
         initial_offset_reset="earliest",
         force_offset_reset=None,
     ):
@@ -66,6 +88,7 @@ class QuerySubscriptionConsumer(object):
         self.topic = topic
         cluster_name = settings.KAFKA_TOPICS[topic]["cluster"]
         self.commit_batch_size = commit_batch_size
+        self.batch_size = batch_size
         self.initial_offset_reset = initial_offset_reset
         self.offsets = {}
         self.consumer = None
@@ -151,6 +174,10 @@ class QuerySubscriptionConsumer(object):
         try:
             i = 0
             while True:
+                if self.batch_size:
+                    self.consume_batch()
+                    continue
+
                 message = self.consumer.poll(0.1)
                 if message is None:
                     continue
@@ -179,6 +206,29 @@ class QuerySubscriptionConsumer(object):
 
         self.shutdown()
 
+    def consume_batch(self):
+        """
+        Consumes up to `batch_size` messages, handles them together and commits the
+        offsets of the batch.
+        """
+        messages = self.consumer.consume(self.batch_size, 0.1)
+        if not messages:
+            return
+
+        for message in messages:
+            error = message.error()
+            if error is not None:
+                raise KafkaException(error)
+
+        with sentry_sdk.start_transaction(
+            op="handle_messages", name="query_subscription_consumer_process_messages", sampled=True,
+        ), metrics.timer("snuba_query_subscriber.handle_messages"):
+            self.handle_messages(messages)
+
+        for message in messages:
+            self.offsets[message.partition()] = message.offset() + 1
+        self.commit_offsets()
+
     def commit_offsets(self, partitions=None):
         logger.info(
             "query-subscription-consumer.commit_offsets",
@@ -234,37 +284,10 @@ class QuerySubscriptionConsumer(object):
                     subscription = QuerySubscription.objects.get_from_cache(
                         subscription_id=contents["subscription_id"]
                     )
-                    if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                        metrics.incr("snuba_query_subscriber.subscription_inactive")
-                        return
             except QuerySubscription.DoesNotExist:
-                metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
-                logger.error(
-                    "Received subscription update, but subscription does not exist",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                try:
-                    _delete_from_snuba(
-                        self.topic_to_dataset[message.topic()], contents["subscription_id"]
-                    )
-                except Exception:
-                    logger.exception("Failed to delete unused subscription from snuba.")
-                return
+                subscription = None
 
-            if subscription.type not in subscriber_registry:
-                metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
-                logger.error(
-                    "Received subscription update, but no subscription handler registered",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            if not self.should_handle_update(message, contents, subscription):
                 return
 
             logger.info(
@@ -291,6 +314,115 @@ class QuerySubscriptionConsumer(object):
                 span.set_data("payload", contents)
                 callback(contents, subscription)
 
+    def handle_messages(self, messages):
+        """
+        Handles a batch of messages like `handle_message`, but fetches the subscriptions
+        of all messages at once. Updates for subscription types that have a batch
+        subscriber registered are passed to it together.
+        :param messages: A list of Kafka messages
+        """
+        updates = []
+        for message in messages:
+            try:
+                with metrics.timer("snuba_query_subscriber.parse_message_value"):
+                    contents = self.parse_message_value(message.value())
+            except InvalidMessageError:
+                logger.exception(
+                    "Subscription update could not be parsed",
+                    extra={
+                        "offset": message.offset(),
+                        "partition": message.partition(),
+                        "value": message.value(),
+                    },
+                )
+                continue
+            updates.append((message, contents))
+
+        with metrics.timer("snuba_query_subscriber.fetch_subscriptions"):
+            subscriptions = {
+                subscription.subscription_id: subscription
+                for subscription in QuerySubscription.objects.get_many_from_cache(
+                    set(contents["subscription_id"] for _, contents in updates),
+                    key="subscription_id",
+                )
+            }
+
+        updates_by_type = OrderedDict()
+        for message, contents in updates:
+            subscription = subscriptions.get(contents["subscription_id"])
+            if self.should_handle_update(message, contents, subscription):
+                updates_by_type.setdefault(subscription.type, []).append((contents, subscription))
+
+        logger.info(
+            "query-subscription-consumer.handle_messages",
+            extra={
+                "messages": len(messages),
+                "updates": sum(len(type_updates) for type_updates in updates_by_type.values()),
+            },
+        )
+
+        for subscription_type, type_updates in six.iteritems(updates_by_type):
+            batch_callback = batch_subscriber_registry.get(subscription_type)
+            if batch_callback is not None:
+                with metrics.timer(
+                    "snuba_query_subscriber.batch_callback.duration", instance=subscription_type
+                ):
+                    batch_callback(type_updates)
+                continue
+
+            callback = subscriber_registry[subscription_type]
+            for contents, subscription in type_updates:
+                with sentry_sdk.push_scope() as scope, metrics.timer(
+                    "snuba_query_subscriber.callback.duration", instance=subscription_type
+                ):
+                    scope.set_tag("query_subscription_id", contents["subscription_id"])
+                    callback(contents, subscription)
+
+    def should_handle_update(self, message, contents, subscription):
+        """
+        Checks whether an update should be passed to a subscriber. Records metrics and
+        errors for updates of missing or inactive subscriptions, and deletes missing
+        subscriptions from Snuba.
+        :param subscription: The `QuerySubscription` of the update, or None if it doesn't
+        exist
+        :return: True if the update should be handled, otherwise False
+        """
+        if subscription is None:
+            metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
+            logger.error(
+                "Received subscription update, but subscription does not exist",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            try:
+                _delete_from_snuba(
+                    self.topic_to_dataset[message.topic()], contents["subscription_id"]
+                )
+            except Exception:
+                logger.exception("Failed to delete unused subscription from snuba.")
+            return False
+
+        if subscription.status != QuerySubscription.Status.ACTIVE.value:
+            metrics.incr("snuba_query_subscriber.subscription_inactive")
+            return False
+
+        if subscription.type not in subscriber_registry:
+            metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
+            logger.error(
+                "Received subscription update, but no subscription handler registered",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return False
+
+        return True
+
     def parse_message_value(self, value):
         """
         Parses the value received via the Kafka consumer and verifies that it
@@ -21,6 +21,7 @@ from sentry.tagstore.exceptions import (
     TagKeyNotFound,
     TagValueNotFound,
 )
+from sentry.tagstore.snuba.coalescer import get_current_coalescer
 from sentry.tagstore.types import TagKey, TagValue, GroupTagKey, GroupTagValue
 from sentry.utils import snuba, metrics
 from sentry.utils.hashlib import md5_text
@@ -43,6 +44,9 @@ tag_value_data_transformers = {"first_seen": parse_datetime, "last_seen": parse_
 
 
 def fix_tag_value_data(data):
+    # Results can be shared between the callers of a coalesced query, so they
+    # are not modified in place.
+    data = dict(data)
     for key, transformer in tag_value_data_transformers.items():
         if key in data:
             data[key] = transformer(data[key]).replace(tzinfo=UTC)
@@ -54,6 +58,14 @@ def get_project_list(project_id):
 
 
 class SnubaTagStorage(TagStorage):
+    def __query(self, transform, **kwargs):
+        # Goes through the coalescer of the current request, if there is one,
+        # so that the query can be merged with other queries of the request.
+        coalescer = get_current_coalescer()
+        if coalescer is None:
+            return transform(snuba.query(**kwargs))
+        return coalescer.query(transform=transform, **kwargs)
+
     def __get_tag_key(self, project_id, group_id, environment_id, key):
         tag = u"tags[{}]".format(key)
         filters = {"project_id": get_project_list(project_id)}
@@ -100,22 +112,11 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        result, totals = snuba.query(
-            start=kwargs.get("start"),
-            end=kwargs.get("end"),
-            groupby=[tag],
-            conditions=conditions,
-            filter_keys=filters,
-            aggregations=aggregations,
-            orderby="-count",
-            limit=limit,
-            totals=True,
-            referrer="tagstore.__get_tag_key_and_top_values",
-        )
+        def get_tag_key(query_result):
+            result, totals = query_result
+            if raise_on_empty and (not result or totals.get("count", 0) == 0):
+                raise TagKeyNotFound if group_id is None else GroupTagKeyNotFound
 
-        if raise_on_empty and (not result or totals.get("count", 0) == 0):
-            raise TagKeyNotFound if group_id is None else GroupTagKeyNotFound
-        else:
             if group_id is None:
                 key_ctor = TagKey
                 value_ctor = TagValue
@@ -141,6 +142,20 @@ class SnubaTagStorage(TagStorage):
                 top_values=top_values,
             )
 
+        return self.__query(
+            get_tag_key,
+            start=kwargs.get("start"),
+            end=kwargs.get("end"),
+            groupby=[tag],
+            conditions=conditions,
+            filter_keys=filters,
+            aggregations=aggregations,
+            orderby="-count",
+            limit=limit,
+            totals=True,
+            referrer="tagstore.__get_tag_key_and_top_values",
+        )
+
     def __get_tag_keys(
         self,
         project_id,
@@ -384,7 +399,13 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        result = snuba.query(
+        return self.__query(
+            lambda result: {
+                issue: GroupTagValue(
+                    group_id=issue, key=key, value=value, **fix_tag_value_data(data)
+                )
+                for issue, data in six.iteritems(result)
+            },
             groupby=["group_id"],
             conditions=conditions,
             filter_keys=filters,
@@ -392,11 +413,6 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.get_group_list_tag_value",
         )
 
-        return {
-            issue: GroupTagValue(group_id=issue, key=key, value=value, **fix_tag_value_data(data))
-            for issue, data in six.iteritems(result)
-        }
-
     def get_group_seen_values_for_environments(
         self, project_ids, group_id_list, environment_ids, start=None, end=None
     ):
@@ -411,7 +427,10 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        result = snuba.query(
+        return self.__query(
+            lambda result: {
+                issue: fix_tag_value_data(data) for issue, data in six.iteritems(result)
+            },
             start=start,
             end=end,
             groupby=["group_id"],
@@ -421,8 +440,6 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.get_group_seen_values_for_environments",
         )
 
-        return {issue: fix_tag_value_data(data) for issue, data in six.iteritems(result)}
-
     def get_group_tag_value_count(self, project_id, group_id, environment_id, key):
         tag = u"tags[{}]".format(key)
         filters = {"project_id": get_project_list(project_id), "group_id": [group_id]}
@@ -478,7 +495,30 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        values_by_key = snuba.query(
+        # Then supplement the key objects with the top values for each.
+        if group_id is None:
+            value_ctor = TagValue
+        else:
+            value_ctor = functools.partial(GroupTagValue, group_id=group_id)
+
+        def add_top_values(values_by_key):
+            for keyobj in keys_with_counts:
+                key = keyobj.key
+                values = values_by_key.get(key, [])
+                keyobj.top_values = [
+                    value_ctor(
+                        key=keyobj.key,
+                        value=value,
+                        times_seen=data["count"],
+                        first_seen=parse_datetime(data["first_seen"]),
+                        last_seen=parse_datetime(data["last_seen"]),
+                    )
+                    for value, data in six.iteritems(values)
+                ]
+            return keys_with_counts
+
+        return self.__query(
+            add_top_values,
             start=kwargs.get("start"),
             end=kwargs.get("end"),
             groupby=["tags_key", "tags_value"],
@@ -490,28 +530,6 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.__get_tag_keys_and_top_values",
         )
 
-        # Then supplement the key objects with the top values for each.
-        if group_id is None:
-            value_ctor = TagValue
-        else:
-            value_ctor = functools.partial(GroupTagValue, group_id=group_id)
-
-        for keyobj in keys_with_counts:
-            key = keyobj.key
-            values = values_by_key.get(key, [])
-            keyobj.top_values = [
-                value_ctor(
-                    key=keyobj.key,
-                    value=value,
-                    times_seen=data["count"],
-                    first_seen=parse_datetime(data["first_seen"]),
-                    last_seen=parse_datetime(data["last_seen"]),
-                )
-                for value, data in six.iteritems(values)
-            ]
-
-        return keys_with_counts
-
     def __get_release(self, project_id, group_id, first=True):
         filters = {"project_id": get_project_list(project_id)}
         conditions = [["tags[sentry:release]", "IS NOT NULL", None]]
@@ -626,7 +644,8 @@ class SnubaTagStorage(TagStorage):
             filters["environment"] = environment_ids
         aggregations = [["uniq", "tags[sentry:user]", "count"]]
 
-        result = snuba.query(
+        return self.__query(
+            lambda result: defaultdict(int, {k: v for k, v in result.items() if v}),
             start=start,
             end=end,
             groupby=["group_id"],
@@ -636,8 +655,6 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.get_groups_user_counts",
         )
 
-        return defaultdict(int, {k: v for k, v in result.items() if v})
-
     def get_tag_value_paginator(
         self,
         project_id,
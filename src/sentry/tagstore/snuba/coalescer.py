@@ -0,0 +1,288 @@
+from __future__ import absolute_import
+
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import six
+from django.core.cache import cache
+
+from sentry import options
+from sentry.utils import json, metrics, snuba
+from sentry.utils.hashlib import md5_text
+
+_local = threading.local()
+
+# Keyword arguments of ``snuba.query`` that are not part of the compatibility
+# key: queries that only differ in these can be merged into one.
+MERGED_ARGUMENTS = frozenset(["aggregations", "referrer"])
+
+# Keyword arguments of ``snuba.query`` that change the shape of the result.
+# Queries using them are still deduplicated and cached, but never merged.
+UNMERGEABLE_ARGUMENTS = frozenset(["totals", "selected_columns"])
+
+
+def get_current_coalescer():
+    """
+    Returns the coalescer of the innermost ``coalesce_queries`` block of the
+    current thread, or ``None``.
+    """
+    return getattr(_local, "coalescer", None)
+
+
+@contextmanager
+def coalesce_queries(cache_ttl=None):
+    """
+    Routes the tagstore queries issued within the block through a
+    ``QueryCoalescer``. Nested blocks share the outermost coalescer.
+    """
+    coalescer = get_current_coalescer()
+    if coalescer is not None:
+        yield coalescer
+        return
+
+    coalescer = _local.coalescer = QueryCoalescer(cache_ttl=cache_ttl)
+    try:
+        yield coalescer
+        coalescer.flush()
+    finally:
+        _local.coalescer = None
+        coalescer.report()
+
+
+def get_query_key(query):
+    return md5_text(json.dumps(query, sort_keys=True)).hexdigest()
+
+
+def project_result(result, depth, merged_aliases, aliases):
+    """
+    Extracts the values of ``aliases`` from the nested result of a query
+    with the aggregations ``merged_aliases``, in the shape ``snuba.query``
+    would have returned for a query with only ``aliases``.
+    """
+    if depth:
+        return OrderedDict(
+            (group, project_result(value, depth - 1, merged_aliases, aliases))
+            for group, value in six.iteritems(result)
+        )
+
+    if result is None:
+        return None
+    if len(merged_aliases) == 1:
+        result = {merged_aliases[0]: result}
+    if len(aliases) == 1:
+        return result[aliases[0]]
+    return {alias: result[alias] for alias in aliases}
+
+
+class CoalescedQuery(object):
+    """
+    A handle for the result of a query that was deferred on a coalescer.
+    """
+
+    def __init__(self, coalescer, entry, transform=None):
+        self.coalescer = coalescer
+        self.entry = entry
+        self.transform = transform
+
+    def result(self):
+        if not self.entry.done:
+            self.coalescer.flush()
+        if self.entry.exc_info is not None:
+            six.reraise(*self.entry.exc_info)
+        if self.transform is None:
+            return self.entry.result
+        return self.transform(self.entry.result)
+
+
+class ResolvedQuery(object):
+    """
+    A handle for a value that was computed without deferring a query.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+class _Entry(object):
+    def __init__(self, key, query, cache_key=None):
+        self.key = key
+        self.query = query
+        self.cache_key = cache_key
+        self.done = False
+        self.result = None
+        self.exc_info = None
+
+    def resolve(self, result):
+        self.done = True
+        self.result = result
+
+    def fail(self, exc_info):
+        self.done = True
+        self.exc_info = exc_info
+
+
+class QueryCoalescer(object):
+    """
+    Reduces the number of Snuba queries issued while serving a single
+    request:
+
+    - Queries that are deferred together and only differ in their
+      aggregations are merged into a single query.
+    - Identical queries are only executed once.
+    - If ``cache_ttl`` (or the ``tagstore.coalescer.cache-ttl`` option) is
+      set, results are cached for that many seconds, keyed by the full query
+      (projects, groups, environments, conditions and time window.)
+
+    Queries are deferred with ``defer`` and executed as soon as the result of
+    any pending query is needed, or when the coalescer is flushed.
+    """
+
+    def __init__(self, cache_ttl=None):
+        if cache_ttl is None:
+            cache_ttl = options.get("tagstore.coalescer.cache-ttl")
+        self.cache_ttl = cache_ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.pending = []
+        self.deferring = False
+        self.requested = 0
+        self.executed = 0
+
+    @property
+    def saved(self):
+        return self.requested - self.executed
+
+    def defer(self, func, *args, **kwargs):
+        """
+        Calls a tagstore method and returns a handle for its result. Queries
+        of methods that support it are deferred, so that they can be merged
+        with the queries of other deferred calls.
+        """
+        self.deferring = True
+        try:
+            rv = func(*args, **kwargs)
+        finally:
+            self.deferring = False
+        if isinstance(rv, (CoalescedQuery, ResolvedQuery)):
+            return rv
+        return ResolvedQuery(rv)
+
+    def query(self, transform=None, **query):
+        """
+        Queues a ``snuba.query`` call. Returns a handle if called from
+        ``defer``, and the (transformed) result of the query otherwise.
+        """
+        key = get_query_key(query)
+        with self.lock:
+            self.requested += 1
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = self._get_entry(key, query)
+        handle = CoalescedQuery(self, entry, transform)
+        return handle if self.deferring else handle.result()
+
+    def _get_entry(self, key, query):
+        cache_key = None
+        if self.cache_ttl:
+            cache_key = u"tagstore.coalescer:{}".format(key)
+            result = cache.get(cache_key)
+            if result is not None:
+                entry = _Entry(key, query)
+                entry.resolve(result)
+                metrics.incr("tagstore.coalescer.cache", tags={"result": "hit"})
+                return entry
+            metrics.incr("tagstore.coalescer.cache", tags={"result": "miss"})
+
+        entry = _Entry(key, query, cache_key)
+        self.pending.append(entry)
+        return entry
+
+    def flush(self):
+        """
+        Executes all pending queries, merging them where possible.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+
+        for entries in self._get_batches(pending):
+            try:
+                self._execute(entries)
+            except Exception:
+                exc_info = sys.exc_info()
+                for entry in entries:
+                    entry.fail(exc_info)
+
+    def _get_batches(self, entries):
+        # Entries with the same compatibility key are merged, unless they
+        # use the same alias for different aggregations.
+        batches = OrderedDict()
+        for entry in entries:
+            if UNMERGEABLE_ARGUMENTS.intersection(entry.query):
+                batches[u"unmergeable:{}".format(entry.key)] = [[entry]]
+                continue
+            compat_key = get_query_key(
+                {k: v for k, v in six.iteritems(entry.query) if k not in MERGED_ARGUMENTS}
+            )
+            candidates = batches.setdefault(compat_key, [])
+            for batch in candidates:
+                if self._can_merge(batch, entry):
+                    batch.append(entry)
+                    break
+            else:
+                candidates.append([entry])
+
+        for candidates in six.itervalues(batches):
+            for batch in candidates:
+                yield batch
+
+    def _can_merge(self, batch, entry):
+        aggregations = {}
+        for other in batch:
+            for aggregation in other.query["aggregations"]:
+                aggregations[aggregation[2]] = aggregation
+        return all(
+            aggregations.get(aggregation[2], aggregation) == aggregation
+            for aggregation in entry.query["aggregations"]
+        )
+
+    def _execute(self, entries):
+        query = dict(entries[0].query)
+        aggregations = []
+        for entry in entries:
+            for aggregation in entry.query["aggregations"]:
+                if aggregation not in aggregations:
+                    aggregations.append(aggregation)
+        query["aggregations"] = aggregations
+
+        referrers = set(entry.query.get("referrer") for entry in entries)
+        if len(referrers) > 1:
+            query["referrer"] = "tagstore.coalesced"
+
+        with self.lock:
+            self.executed += 1
+        result = snuba.query(**query)
+
+        depth = len(query.get("groupby") or ())
+        merged_aliases = [aggregation[2] for aggregation in aggregations]
+        for entry in entries:
+            if len(entries) > 1:
+                entry_result = project_result(
+                    result,
+                    depth,
+                    merged_aliases,
+                    [aggregation[2] for aggregation in entry.query["aggregations"]],
+                )
+            else:
+                entry_result = result
+            entry.resolve(entry_result)
+            if entry.cache_key is not None:
+                cache.set(entry.cache_key, entry_result, self.cache_ttl)
+
+    def report(self):
+        metrics.incr("tagstore.coalescer.requested", amount=self.requested)
+        metrics.incr("tagstore.coalescer.saved", amount=self.saved)
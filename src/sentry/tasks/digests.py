@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import logging
 import time
 
+from sentry import options
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
 from sentry.digests.notifications import build_digest, split_key
@@ -53,7 +54,11 @@ def deliver_digest(key, schedule_timestamp=None):
     with snuba.options_override({"consistent": True}):
         try:
             with digests.digest(key, minimum_delay=minimum_delay) as records:
-                digest = build_digest(project, records)
+                digest = build_digest(
+                    project,
+                    records,
+                    max_records_per_group=options.get("digests.max-records-per-group"),
+                )
         except InvalidState as error:
             logger.info("Skipped digest delivery: %s", error, exc_info=True)
             return
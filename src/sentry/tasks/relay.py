@@ -29,7 +29,7 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
         invalidated.
     """
 
-    from sentry.models import Project, ProjectKey, ProjectKeyStatus
+    from sentry.models import Organization, Project, ProjectKey, ProjectKeyStatus
     from sentry.relay import projectconfig_cache
     from sentry.relay.config import get_project_config
 
@@ -57,7 +57,13 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
     elif organization_id:
         # XXX(markus): I feel like we should be able to cache this but I don't
         # want to add another method to src/sentry/db/models/manager.py
-        projects = Project.objects.filter(organization_id=organization_id)
+        projects = list(Project.objects.filter(organization_id=organization_id))
+        if generate and projects:
+            # Prevent the organization from being fetched for every project.
+            organization = Organization.objects.get_from_cache(id=organization_id)
+            for project in projects:
+                project.organization = organization
+                project._organization_cache = organization
 
     project_keys = {}
     for key in ProjectKey.objects.filter(project_id__in=[project.id for project in projects]):
@@ -65,9 +71,15 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
 
     if generate:
         config_cache = {}
+        # Config sections that only depend on options are shared between all
+        # configs generated here, see `get_config_fragments`.
+        fragments = {}
         for project in projects:
             project_config = get_project_config(
-                project, project_keys=project_keys.get(project.id, []), full_config=True
+                project,
+                project_keys=project_keys.get(project.id, []),
+                full_config=True,
+                fragments=fragments,
             )
             config_cache[project.id] = project_config.to_dict()
 
@@ -78,7 +90,9 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
                 if key.status != ProjectKeyStatus.ACTIVE:
                     continue
 
-                project_config = get_project_config(project, project_keys=[key], full_config=True)
+                project_config = get_project_config(
+                    project, project_keys=[key], full_config=True, fragments=fragments
+                )
                 config_cache[key.public_key] = project_config.to_dict()
 
         projectconfig_cache.set_many(config_cache)
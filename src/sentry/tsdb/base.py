@@ -99,6 +99,26 @@ class TSDBModel(Enum):
     sentry_app_component_interacted = 801
 
 
+class TSDBRequest(
+    collections.namedtuple("TSDBRequest", "method model keys start end rollup environment_ids")
+):
+    """
+    A read request that can be passed to ``BaseTSDB.get_many``. ``method`` is
+    the name of the read method to execute (e.g. ``"get_range"``), and the
+    remaining attributes are passed as the corresponding arguments. ``keys``
+    is the mapping of keys to members for the frequency methods.
+
+    All read methods other than ``get_range`` accept at most one environment.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, method, model, keys, start, end=None, rollup=None, environment_ids=None):
+        return super(TSDBRequest, cls).__new__(
+            cls, method, model, keys, start, end, rollup, environment_ids
+        )
+
+
 class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
@@ -135,6 +155,7 @@ class BaseTSDB(Service):
         frozenset(
             [
                 "get_earliest_timestamp",
+                "get_many",
                 "get_optimal_rollup",
                 "get_optimal_rollup_series",
                 "get_rollups",
@@ -362,6 +383,42 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_many(self, requests):
+        """
+        Execute several read requests (``TSDBRequest`` instances) at once,
+        possibly for different models and methods. Returns a list of results
+        in the same order as the requests.
+
+        Backends that can batch requests to their storage override this;
+        by default the requests are executed one after another.
+        """
+        return [self.execute_request(request) for request in requests]
+
+    def execute_request(self, request):
+        if request.method not in self.__read_methods__:
+            raise ValueError(u"Unknown read method: {!r}".format(request.method))
+
+        if request.method == "get_range":
+            environment_kwargs = {"environment_ids": request.environment_ids}
+        else:
+            environment_kwargs = {"environment_id": self.get_request_environment_id(request)}
+
+        return getattr(self, request.method)(
+            request.model,
+            request.keys,
+            request.start,
+            request.end,
+            rollup=request.rollup,
+            **environment_kwargs
+        )
+
+    def get_request_environment_id(self, request):
+        if not request.environment_ids:
+            return None
+        if len(request.environment_ids) > 1:
+            raise NotImplementedError
+        return request.environment_ids[0]
+
     def get_sums(self, model, keys, start, end, rollup=None, environment_id=None):
         range_set = self.get_range(
             model,
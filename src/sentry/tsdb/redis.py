@@ -314,6 +314,189 @@ class RedisTSDB(BaseTSDB):
             results_by_key[key] = sorted(points.items())
         return dict(results_by_key)
 
+    def get_many(self, requests):
+        """
+        Execute several read requests with a single (pipelined) fan-out per
+        Redis host.
+
+        Requests for methods that can't be batched are executed one after
+        another after the batched requests.
+        """
+        results = [None] * len(requests)
+        commands_by_cluster = defaultdict(lambda: defaultdict(list))
+        pending = []
+        for idx, request in enumerate(requests):
+            prepare = self.batched_read_methods.get(request.method)
+            if prepare is None:
+                continue
+
+            cluster, _ = self.get_cluster(self.get_request_environment_id(request))
+            commands, callback = prepare(self, request)
+
+            # Remember where the response to every command will be found.
+            mapping = commands_by_cluster[cluster]
+            positions = []
+            for routing_key, command in commands:
+                positions.append((routing_key, len(mapping[routing_key])))
+                mapping[routing_key].append(command)
+            pending.append((idx, cluster, positions, callback))
+
+        responses = {
+            cluster: cluster.execute_commands(mapping)
+            for cluster, mapping in six.iteritems(commands_by_cluster)
+        }
+
+        for idx, cluster, positions, callback in pending:
+            results[idx] = callback(
+                [responses[cluster][routing_key][i].value for routing_key, i in positions]
+            )
+
+        for idx, request in enumerate(requests):
+            if request.method not in self.batched_read_methods:
+                results[idx] = self.execute_request(request)
+
+        return results
+
+    def _prepare_get_range(self, request):
+        model = request.model
+        environment_id = self.get_request_environment_id(request)
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(request.start, request.end, request.rollup)
+        series = map(to_datetime, series)
+
+        commands = []
+        points = []
+        for key in request.keys:
+            for timestamp in series:
+                hash_key, hash_field = self.make_counter_key(
+                    model, rollup, timestamp, key, environment_id
+                )
+                commands.append((hash_key, ("HGET", hash_key, hash_field)))
+                points.append((to_timestamp(timestamp), key))
+
+        def callback(values):
+            results_by_key = defaultdict(dict)
+            for (epoch, key), count in zip(points, values):
+                results_by_key[key][epoch] = int(count or 0)
+
+            for key, points_by_epoch in six.iteritems(results_by_key):
+                results_by_key[key] = sorted(points_by_epoch.items())
+            return dict(results_by_key)
+
+        return commands, callback
+
+    def _prepare_get_sums(self, request):
+        commands, get_range = self._prepare_get_range(request)
+
+        def callback(values):
+            return {
+                key: sum(p for _, p in points) for key, points in six.iteritems(get_range(values))
+            }
+
+        return commands, callback
+
+    def _prepare_get_distinct_counts_series(self, request):
+        model = request.model
+        environment_id = self.get_request_environment_id(request)
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(request.start, request.end, request.rollup)
+
+        commands = []
+        for key in request.keys:
+            for timestamp in series:
+                commands.append(
+                    (key, ("PFCOUNT", self.make_key(model, rollup, timestamp, key, environment_id)))
+                )
+
+        def callback(values):
+            values = iter(values)
+            return {
+                key: [(timestamp, next(values)) for timestamp in series] for key in request.keys
+            }
+
+        return commands, callback
+
+    def _prepare_get_distinct_counts_totals(self, request):
+        model = request.model
+        environment_id = self.get_request_environment_id(request)
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(request.start, request.end, request.rollup)
+
+        commands = []
+        for key in request.keys:
+            ks = [
+                self.make_key(model, rollup, timestamp, key, environment_id) for timestamp in series
+            ]
+            commands.append((key, ("PFCOUNT",) + tuple(ks)))
+
+        def callback(values):
+            return dict(zip(request.keys, values))
+
+        return commands, callback
+
+    def _prepare_get_frequency_series(self, request):
+        model = request.model
+        environment_id = self.get_request_environment_id(request)
+        self.validate_arguments([model], [environment_id])
+
+        if not self.enable_frequency_sketches:
+            raise NotImplementedError("Frequency sketches are disabled.")
+
+        rollup, series = self.get_optimal_rollup_series(request.start, request.end, request.rollup)
+
+        # Freeze the ordering of the members, see ``get_frequency_series``.
+        items = [(key, list(members)) for key, members in request.keys.items()]
+
+        commands = []
+        arguments = ["ESTIMATE"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+        for key, members in items:
+            ks = []
+            for timestamp in series:
+                ks.extend(
+                    self.make_frequency_table_keys(model, rollup, timestamp, key, environment_id)
+                )
+            commands.append((key, (CountMinScript, ks, arguments + members)))
+
+        def callback(values):
+            results = {}
+            for (key, members), value in zip(items, values):
+                results[key] = [
+                    (timestamp, dict(zip(members, map(float, scores))))
+                    for timestamp, scores in zip(series, value)
+                ]
+            return results
+
+        return commands, callback
+
+    def _prepare_get_frequency_totals(self, request):
+        commands, get_frequency_series = self._prepare_get_frequency_series(request)
+
+        def callback(values):
+            responses = {}
+            for key, series in six.iteritems(get_frequency_series(values)):
+                response = responses[key] = {}
+                for timestamp, results in series:
+                    for member, value in results.items():
+                        response[member] = response.get(member, 0.0) + value
+            return responses
+
+        return commands, callback
+
+    #: Read methods that ``get_many`` batches, mapped to a function returning
+    #: the ``(routing key, command)`` pairs for a request and a callback that
+    #: builds the result from the command responses.
+    batched_read_methods = {
+        "get_range": _prepare_get_range,
+        "get_sums": _prepare_get_sums,
+        "get_distinct_counts_series": _prepare_get_distinct_counts_series,
+        "get_distinct_counts_totals": _prepare_get_distinct_counts_totals,
+        "get_frequency_series": _prepare_get_frequency_series,
+        "get_frequency_totals": _prepare_get_frequency_totals,
+    }
+
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
             [None]
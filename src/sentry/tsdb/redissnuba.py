@@ -4,10 +4,13 @@ import time
 import inspect
 import six
 
+from collections import defaultdict
+
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
 from sentry.tsdb.redis import RedisTSDB
 from sentry.tsdb.snuba import SnubaTSDB
+from sentry.utils.compat import zip
 
 
 READ = 0
@@ -126,3 +129,24 @@ class RedisSnubaTSDB(BaseTSDB):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super(RedisSnubaTSDB, self).__init__(**options)
+
+    def get_many(self, requests):
+        """
+        Split the requests by the backend that serves them, so that every
+        backend can batch its share of the requests.
+        """
+        requests_by_backend = defaultdict(list)
+        for idx, request in enumerate(requests):
+            backend = selector_func(
+                request.method, {"model": request.model}, self.switchover_timestamp
+            )
+            requests_by_backend[backend].append((idx, request))
+
+        results = [None] * len(requests)
+        for backend, items in six.iteritems(requests_by_backend):
+            for (idx, _), result in zip(
+                items, self.backends[backend].get_many([request for _, request in items])
+            ):
+                results[idx] = result
+
+        return results
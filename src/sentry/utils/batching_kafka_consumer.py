@@ -1,10 +1,12 @@
 from __future__ import absolute_import
 
 import abc
+import functools
 import logging
 import six
 import time
 
+from concurrent import futures
 from confluent_kafka import (
     Consumer,
     KafkaError,
@@ -13,10 +15,12 @@ from confluent_kafka import (
     OFFSET_END,
     OFFSET_STORED,
     OFFSET_INVALID,
+    TopicPartition,
 )
 from confluent_kafka.admin import AdminClient
 
 from sentry.utils import kafka_config
+from sentry.utils.concurrent import ThreadedExecutor
 
 from django.conf import settings
 
@@ -199,7 +203,7 @@ class BatchingKafkaConsumer(object):
         self.commit_log_topic = commit_log_topic
         self.dead_letter_topic = dead_letter_topic
 
-    def __record_timing(self, metric, value, tags=None):
+    def _record_timing(self, metric, value, tags=None):
         if self.__metrics is None:
             return
 
@@ -242,12 +246,10 @@ class BatchingKafkaConsumer(object):
         consumer = Consumer(consumer_config)
 
         def on_partitions_assigned(consumer, partitions):
-            logger.info("New partitions assigned: %r", partitions)
+            self._on_partitions_assigned(partitions)
 
         def on_partitions_revoked(consumer, partitions):
-            "Reset the current in-memory batch, letting the next consumer take over where we left off."
-            logger.info("Partitions revoked: %r", partitions)
-            self._flush(force=True)
+            self._on_partitions_revoked(partitions)
 
         consumer.subscribe(
             topics, on_assign=on_partitions_assigned, on_revoke=on_partitions_revoked
@@ -255,6 +257,14 @@ class BatchingKafkaConsumer(object):
 
         return consumer
 
+    def _on_partitions_assigned(self, partitions):
+        logger.info("New partitions assigned: %r", partitions)
+
+    def _on_partitions_revoked(self, partitions):
+        "Reset the current in-memory batch, letting the next consumer take over where we left off."
+        logger.info("Partitions revoked: %r", partitions)
+        self._flush(force=True)
+
     def run(self):
         """
         The main run loop, see class docstring for more information.
@@ -299,31 +309,14 @@ class BatchingKafkaConsumer(object):
             self.__batch_deadline = self.max_batch_time / 1000.0 + start
 
         try:
-            result = self.worker.process_message(msg)
-        except Exception:
-            if self.dead_letter_topic:
-                logger.exception("Error handling message, sending to dead letter topic.")
-                self.producer.produce(
-                    self.dead_letter_topic,
-                    key=msg.key(),
-                    value=msg.value(),
-                    headers={
-                        "partition": six.text_type(msg.partition()) if msg.partition() else None,
-                        "offset": six.text_type(msg.offset()) if msg.offset() else None,
-                        "topic": msg.topic(),
-                    },
-                    on_delivery=self._commit_message_delivery_callback,
-                )
-            else:
-                raise
-        else:
+            result = self._process_message(msg)
             if result is not None:
                 self.__batch_results.append(result)
         finally:
             duration = (time.time() - start) * 1000
             self.__batch_messages_processed_count += 1
             self.__batch_processing_time_ms += duration
-            self.__record_timing("process_message", duration)
+            self._record_timing("process_message", duration)
 
             topic_partition_key = (msg.topic(), msg.partition())
             if topic_partition_key in self.__batch_offsets:
@@ -331,6 +324,28 @@ class BatchingKafkaConsumer(object):
             else:
                 self.__batch_offsets[topic_partition_key] = [msg.offset(), msg.offset()]
 
+    def _process_message(self, msg):
+        """Processes a message with the worker. If that fails and a dead letter
+        topic is configured, the message is sent there and `None` is returned."""
+        try:
+            return self.worker.process_message(msg)
+        except Exception:
+            if not self.dead_letter_topic:
+                raise
+
+            logger.exception("Error handling message, sending to dead letter topic.")
+            self.producer.produce(
+                self.dead_letter_topic,
+                key=msg.key(),
+                value=msg.value(),
+                headers={
+                    "partition": six.text_type(msg.partition()) if msg.partition() else None,
+                    "offset": six.text_type(msg.offset()) if msg.offset() else None,
+                    "topic": msg.topic(),
+                },
+                on_delivery=self._commit_message_delivery_callback,
+            )
+
     def _shutdown(self):
         logger.debug("Stopping")
 
@@ -373,21 +388,21 @@ class BatchingKafkaConsumer(object):
             batch_by_time,
         )
 
-        self.__record_timing(
+        self._record_timing(
             "process_message.normalized",
             self.__batch_processing_time_ms / self.__batch_messages_processed_count,
         )
 
         batch_results_length = len(self.__batch_results)
-        self.__record_timing("batching_consumer.batch.size", batch_results_length)
+        self._record_timing("batching_consumer.batch.size", batch_results_length)
         if batch_results_length > 0:
             logger.debug("Flushing batch via worker")
             flush_start = time.time()
             self.worker.flush_batch(self.__batch_results)
             flush_duration = (time.time() - flush_start) * 1000
             logger.info("Worker flush took %dms", flush_duration)
-            self.__record_timing("batching_consumer.batch.flush", flush_duration)
-            self.__record_timing(
+            self._record_timing("batching_consumer.batch.flush", flush_duration)
+            self._record_timing(
                 "batching_consumer.batch.flush.normalized", flush_duration / batch_results_length
             )
 
@@ -403,11 +418,14 @@ class BatchingKafkaConsumer(object):
         if error is not None:
             raise Exception(error.str())
 
-    def _commit(self):
+    def _commit(self, offsets=None):
+        """Commits the given offsets (a list of `TopicPartition`), or the offsets
+        of the last consumed messages if none are given."""
+        commit_kwargs = {"offsets": offsets} if offsets is not None else {}
         retries = 3
         while True:
             try:
-                offsets = self.consumer.commit(asynchronous=False)
+                offsets = self.consumer.commit(asynchronous=False, **commit_kwargs)
                 logger.debug("Committed offsets: %s", offsets)
                 break  # success
             except KafkaException as e:
@@ -451,3 +469,225 @@ class BatchingKafkaConsumer(object):
                     value="{}".format(item.offset).encode("utf-8"),
                     on_delivery=self._commit_message_delivery_callback,
                 )
+
+
+class ParallelBatchingKafkaConsumer(BatchingKafkaConsumer):
+    """A `BatchingKafkaConsumer` that flushes batches on a pool of worker
+    threads while it keeps consuming.
+
+    * Every partition has its own batch, and at most one batch per partition
+      is flushed at any time, so the messages of a partition are still flushed
+      in order. Batches of different partitions are flushed concurrently by up
+      to `concurrency` threads.
+    * Offsets are only committed up to the last message of the most recently
+      flushed batch of every partition, never past messages that are still
+      waiting to be flushed or being flushed.
+    * Partitions with more than `max_pending_messages` messages that have not
+      been flushed yet are paused until their backlog has been worked off.
+    * Worker exceptions are raised from the consumer thread once the batch
+      is done, without committing its offsets.
+    """
+
+    def __init__(
+        self,
+        topics,
+        worker,
+        max_batch_size,
+        max_batch_time,
+        cluster_name,
+        group_id,
+        concurrency,
+        max_pending_messages=None,
+        **kwargs
+    ):
+        super(ParallelBatchingKafkaConsumer, self).__init__(
+            topics, worker, max_batch_size, max_batch_time, cluster_name, group_id, **kwargs
+        )
+
+        self.executor = ThreadedExecutor(worker_count=concurrency)
+        self.max_pending_messages = (
+            max_pending_messages if max_pending_messages is not None else max_batch_size * 2
+        )
+
+        # (topic, partition) -> [(result, offset, received), ...]
+        self.__batches = {}
+        self.__batch_deadlines = {}
+        # (topic, partition) -> (future, batch)
+        self.__inflight = {}
+        # (topic, partition) -> last flushed offset that has not been committed
+        self.__flushed_offsets = {}
+        self.__paused = set()
+        self.__commit_deadline = None
+
+    def _run_once(self):
+        self._flush()
+
+        if self.producer:
+            self.producer.poll(0.0)
+
+        # Don't block for long when batches are in flight, so that their
+        # offsets are committed (and their partitions resumed) promptly.
+        msg = self.consumer.poll(timeout=0.1 if self.__inflight else 1.0)
+
+        if msg is None:
+            return
+        if msg.error():
+            if msg.error().code() in self.RECOVERABLE_ERRORS:
+                return
+            else:
+                raise Exception(msg.error())
+
+        self._handle_message(msg)
+
+    def _handle_message(self, msg):
+        start = time.time()
+        key = (msg.topic(), msg.partition())
+
+        try:
+            result = self._process_message(msg)
+        finally:
+            self._record_timing("process_message", (time.time() - start) * 1000)
+
+        if key not in self.__batches:
+            self.__batches[key] = []
+            self.__batch_deadlines[key] = self.max_batch_time / 1000.0 + start
+        self.__batches[key].append((result, msg.offset(), start))
+
+    def _on_partitions_assigned(self, partitions):
+        super(ParallelBatchingKafkaConsumer, self)._on_partitions_assigned(partitions)
+        # Partitions always start out resumed when they are assigned, including
+        # those that were paused before the rebalance.
+        self.__paused.difference_update(
+            (partition.topic, partition.partition) for partition in partitions
+        )
+
+    def _on_partitions_revoked(self, partitions):
+        # Revoked partitions must not be resumed (or paused) once they are no
+        # longer owned by this consumer.
+        self.__paused.difference_update(
+            (partition.topic, partition.partition) for partition in partitions
+        )
+        super(ParallelBatchingKafkaConsumer, self)._on_partitions_revoked(partitions)
+
+    def _get_pending_count(self, key):
+        count = len(self.__batches.get(key, ()))
+        if key in self.__inflight:
+            count += len(self.__inflight[key][1])
+        return count
+
+    def _flush_partition_batch(self, batch):
+        results = [result for result, _, _ in batch if result is not None]
+        if results:
+            flush_start = time.time()
+            self.worker.flush_batch(results)
+            flush_duration = (time.time() - flush_start) * 1000
+            self._record_timing("batching_consumer.batch.size", len(results))
+            self._record_timing("batching_consumer.batch.flush", flush_duration)
+            self._record_timing(
+                "batching_consumer.batch.flush.normalized", flush_duration / len(results)
+            )
+
+        # The latency of every message, from being received to being flushed.
+        end = time.time()
+        for _, _, received in batch:
+            self._record_timing("batching_consumer.message.latency", (end - received) * 1000)
+
+    def _collect_inflight(self):
+        for key, (future, batch) in list(self.__inflight.items()):
+            if not future.done():
+                continue
+
+            del self.__inflight[key]
+            # Raises the exception of a failed flush, in which case the
+            # offsets of the batch are not committed.
+            future.result()
+            self.__flushed_offsets[key] = batch[-1][1]
+
+    def _submit_batches(self, force=False):
+        now = time.time()
+        for key, batch in list(self.__batches.items()):
+            if key in self.__inflight:
+                continue
+            if force or len(batch) >= self.max_batch_size or now > self.__batch_deadlines[key]:
+                del self.__batches[key]
+                del self.__batch_deadlines[key]
+                self.__inflight[key] = (
+                    self.executor.submit(functools.partial(self._flush_partition_batch, batch)),
+                    batch,
+                )
+
+    def _update_paused_partitions(self):
+        pause = []
+        resume = []
+        for key in set(self.__batches) | set(self.__inflight) | self.__paused:
+            pending = self._get_pending_count(key)
+            self._record_timing(
+                "batching_consumer.backlog", pending, tags={"partition": six.text_type(key[1])}
+            )
+            if pending > self.max_pending_messages and key not in self.__paused:
+                pause.append(key)
+            elif pending <= self.max_pending_messages and key in self.__paused:
+                resume.append(key)
+
+        if pause:
+            logger.info("Pausing partitions with a backlog: %r", pause)
+            self.consumer.pause([TopicPartition(topic, partition) for topic, partition in pause])
+            self.__paused.update(pause)
+        if resume:
+            logger.info("Resuming partitions: %r", resume)
+            self.consumer.resume([TopicPartition(topic, partition) for topic, partition in resume])
+            self.__paused.difference_update(resume)
+
+    def _flush(self, force=False):
+        """Submits partition batches that are full or past their deadline to
+        the executor (all of them and waits for them if `force` is set), and
+        commits the offsets of the batches that have been flushed since the
+        last commit."""
+        self._collect_inflight()
+        self._submit_batches(force=force)
+
+        while force and (self.__inflight or self.__batches):
+            futures.wait(
+                [future for future, _ in self.__inflight.values()],
+                return_when=futures.FIRST_COMPLETED,
+            )
+            self._collect_inflight()
+            self._submit_batches(force=True)
+
+        self._update_paused_partitions()
+
+        if not self.__flushed_offsets:
+            return
+
+        now = time.time()
+        if self.__commit_deadline is None:
+            self.__commit_deadline = self.max_batch_time / 1000.0 + now
+        if not (force or now > self.__commit_deadline):
+            return
+
+        offsets = [
+            TopicPartition(topic, partition, offset + 1)
+            for (topic, partition), offset in six.iteritems(self.__flushed_offsets)
+        ]
+        logger.debug("Committing Kafka offsets: %r", offsets)
+        commit_start = time.time()
+        self._commit(offsets)
+        logger.debug("Kafka offset commit took %dms", (time.time() - commit_start) * 1000)
+
+        self.__flushed_offsets = {}
+        self.__commit_deadline = None
+
+    def _shutdown(self):
+        logger.debug("Stopping")
+
+        # drop messages that have not been submitted, but let the in-flight
+        # batches finish so their offsets can be committed
+        self.__batches = {}
+        self.__batch_deadlines = {}
+        self._flush(force=True)
+
+        logger.debug("Stopping worker")
+        self.worker.shutdown()
+        logger.debug("Stopping consumer")
+        self.consumer.close()
+        logger.debug("Stopped")
@@ -1,10 +1,14 @@
 from __future__ import absolute_import
 
 import atexit
+import functools
 import logging
 import signal
 
-from sentry.utils.batching_kafka_consumer import BatchingKafkaConsumer
+from sentry.utils.batching_kafka_consumer import (
+    BatchingKafkaConsumer,
+    ParallelBatchingKafkaConsumer,
+)
 from sentry.utils import metrics
 
 from django.conf import settings
@@ -55,7 +59,7 @@ class ProducerManager(object):
 producers = ProducerManager()
 
 
-def create_batching_kafka_consumer(topic_names, worker, **options):
+def create_batching_kafka_consumer(topic_names, worker, concurrency=None, **options):
     cluster_names = set(settings.KAFKA_TOPICS[topic_name]["cluster"] for topic_name in topic_names)
     if len(cluster_names) > 1:
         raise ValueError(
@@ -66,7 +70,12 @@ def create_batching_kafka_consumer(topic_names, worker, **options):
 
     (cluster_name,) = cluster_names
 
-    consumer = BatchingKafkaConsumer(
+    if concurrency is not None and concurrency > 1:
+        consumer_cls = functools.partial(ParallelBatchingKafkaConsumer, concurrency=concurrency)
+    else:
+        consumer_cls = BatchingKafkaConsumer
+
+    consumer = consumer_cls(
         topics=topic_names,
         cluster_name=cluster_name,
         worker=worker,
@@ -0,0 +1,119 @@
+from __future__ import absolute_import
+
+import threading
+
+from collections import OrderedDict
+from time import time
+
+
+class LRUCache(object):
+    """
+    A thread-safe, in-process least recently used cache.
+
+    The cache is bounded by the sum of the sizes of its values, as computed by
+    ``sizeof`` (defaulting to one per item, which bounds it by number of
+    items). Items optionally expire after ``ttl`` seconds.
+
+    >>> cache = LRUCache(max_size=1024 * 1024, ttl=60, sizeof=len)
+    >>> cache.set('key', b'value')
+    >>> cache.get('key')
+    b'value'
+    """
+
+    def __init__(self, max_size, ttl=None, sizeof=None):
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        # An empty cache is still a cache.
+        return True
+
+    __nonzero__ = __bool__
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, size, expires = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires < time():
+                self.size -= size
+                self.misses += 1
+                return default
+
+            # Re-insert to mark this as the most recently used item.
+            self._items[key] = (value, size, expires)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys):
+        rv = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                rv[key] = value
+        return rv
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        expires = time() + self.ttl if self.ttl else None
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+
+            # Values larger than the whole cache would only evict everything
+            # else without ever being read back.
+            if size > self.max_size:
+                return
+
+            self._items[key] = (value, size, expires)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted_size, _) = self._items.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def set_many(self, items):
+        for key, value in items.items():
+            self.set(key, value)
+
+    def delete(self, key):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def get_stats(self):
+        return {
+            "items": len(self._items),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
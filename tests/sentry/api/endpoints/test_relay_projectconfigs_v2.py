@@ -353,3 +353,24 @@ def test_relay_disabled_key(
     assert http_cfg == {"disabled": True}
 
     assert projectconfig_cache_set == [{six.text_type(default_projectkey.public_key): http_cfg}]
+
+
+@pytest.mark.django_db
+def test_relay_projectconfig_cache_hit(
+    call_endpoint, default_projectkey, projectconfig_cache_set, monkeypatch, task_runner
+):
+    public_key = six.text_type(default_projectkey.public_key)
+    wrong_public_key = ProjectKey.generate_api_key()
+    cached = {public_key: {"disabled": False, "cached": True}}
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.get_many", lambda keys: cached)
+
+    with task_runner():
+        result, status_code = call_endpoint(
+            full_config=True, public_keys=[public_key, wrong_public_key]
+        )
+        assert status_code < 400
+
+    assert result == {
+        "configs": {public_key: cached[public_key], wrong_public_key: {"disabled": True}}
+    }
+    assert projectconfig_cache_set == [{wrong_public_key: {"disabled": True}}]
@@ -992,6 +992,23 @@ class ParseSearchQueryTest(unittest.TestCase):
         # Empty quotations become a dropped term
         assert parse_search_query("") == []
 
+    def test_cached_query(self):
+        result = parse_search_query("user.email:foo@example.com hello")
+        result.append("modified")
+        assert parse_search_query("user.email:foo@example.com hello") == [
+            self._build_search_filter("user.email", "=", "foo@example.com"),
+            self._build_search_filter("message", "=", "hello"),
+        ]
+
+    def test_rel_time_filter_not_cached(self):
+        now = timezone.now()
+        with freeze_time(now):
+            result = parse_search_query("first_seen:-2w")
+        with freeze_time(now + timedelta(days=1)):
+            assert parse_search_query("first_seen:-2w") == [
+                result[0]._replace(value=SearchValue(now - timedelta(days=13)))
+            ]
+
 
 # Helper functions to make reading the expected output from the boolean tests easier to read. #
 # a:b
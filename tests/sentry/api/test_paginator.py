@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import six
+
 from datetime import timedelta
 from django.utils import timezone
 from unittest import TestCase as SimpleTestCase
@@ -8,12 +10,15 @@ from sentry.api.paginator import (
     BadPaginationError,
     Paginator,
     DateTimePaginator,
+    KeysetPaginator,
+    MAX_HITS_LIMIT,
     OffsetPaginator,
     SequencePaginator,
     GenericOffsetPaginator,
     ChainPaginator,
     CombinedQuerysetIntermediary,
     CombinedQuerysetPaginator,
+    estimate_hits,
     reverse_bisect_left,
 )
 from sentry.models import User, Rule
@@ -360,6 +365,99 @@ class DateTimePaginatorTest(TestCase):
         assert result7[0] == res4
 
 
+class KeysetPaginatorTest(TestCase):
+    def test_ascending_with_ties(self):
+        joined = timezone.now()
+
+        res1 = self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined)
+        res3 = self.create_user("baz@example.com", date_joined=joined)
+        res4 = self.create_user("qux@example.com", date_joined=joined + timedelta(microseconds=1))
+
+        queryset = User.objects.all()
+
+        paginator = KeysetPaginator(queryset, "date_joined")
+        result1 = paginator.get_result(limit=2, cursor=None)
+        assert list(result1) == [res1, res2]
+        assert result1.next
+        assert not result1.prev
+
+        result2 = paginator.get_result(limit=2, cursor=result1.next)
+        assert list(result2) == [res3, res4]
+        assert not result2.next
+        assert result2.prev
+
+        result3 = paginator.get_result(limit=1, cursor=result2.prev)
+        assert list(result3) == [res2]
+        assert result3.next
+        assert result3.prev
+
+        result4 = paginator.get_result(limit=10, cursor=result3.prev)
+        assert list(result4) == [res1]
+        assert result4.next
+        assert not result4.prev
+
+    def test_descending(self):
+        res1 = self.create_user("foo@example.com")
+        res2 = self.create_user("bar@example.com")
+        res3 = self.create_user("baz@example.com")
+
+        queryset = User.objects.all()
+
+        paginator = KeysetPaginator(queryset, "-id")
+        result1 = paginator.get_result(limit=1, cursor=None)
+        assert list(result1) == [res3]
+        assert result1.next
+
+        result2 = paginator.get_result(limit=2, cursor=result1.next)
+        assert list(result2) == [res2, res1]
+        assert not result2.next
+
+        result3 = paginator.get_result(limit=2, cursor=result2.prev)
+        assert list(result3) == [res3]
+        assert not result3.prev
+
+    def test_cursor_roundtrip(self):
+        joined = timezone.now()
+        self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined)
+
+        paginator = KeysetPaginator(User.objects.all(), "-date_joined")
+        result1 = paginator.get_result(limit=1, cursor=None)
+        cursor = Cursor.from_string(six.text_type(result1.next))
+
+        result2 = paginator.get_result(limit=1, cursor=cursor)
+        assert list(result2) == [res2]
+
+    def test_prev_with_new(self):
+        res1 = self.create_user("foo@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "-id")
+        result1 = paginator.get_result(limit=10, cursor=None)
+        assert list(result1) == [res1]
+
+        res2 = self.create_user("bar@example.com")
+
+        result2 = paginator.get_result(limit=10, cursor=result1.prev)
+        assert list(result2) == [res2]
+
+    def test_estimated_hits(self):
+        self.create_user("foo@example.com")
+        self.create_user("bar@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        result = paginator.get_result(limit=1, count_hits=True)
+        assert result.hits >= 0
+        assert result.max_hits == MAX_HITS_LIMIT
+
+        # The estimate is cached for the same query.
+        with self.assertNumQueries(0):
+            assert estimate_hits(User.objects.all()) == result.hits
+
+        assert estimate_hits(User.objects.none()) == 0
+        assert estimate_hits(User.objects.all(), max_hits=1) <= 1
+
+
 def test_reverse_bisect_left():
     assert reverse_bisect_left([], 0) == 0
 
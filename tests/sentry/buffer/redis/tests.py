@@ -90,6 +90,43 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(Group, columns, filters, extra, signal_only)
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_flush(self, process_batch):
+        self.buf.batch_flush = True
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo", {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"}
+        )
+        client.hmset(
+            "bar", {"f": '{"pk": ["i","2"]}', "i+times_seen": "3", "m": "sentry.models.Group"}
+        )
+        client.zadd("b:p", {"foo": 1, "bar": 2})
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+        process_batch.assert_called_once_with(
+            [
+                (Group, {"times_seen": 2}, {"pk": 1}, {}, None),
+                (Group, {"times_seen": 3}, {"pk": 2}, {}, None),
+            ]
+        )
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists("foo")
+        assert not client.exists("l:foo")
+
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_flush_skips_locked(self, process_batch):
+        self.buf.batch_flush = True
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo", {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"}
+        )
+        client.hmset(
+            "bar", {"f": '{"pk": ["i","2"]}', "i+times_seen": "3", "m": "sentry.models.Group"}
+        )
+        client.set("l:bar", "1")
+        self.buf.process(batch_keys=["foo", "bar"])
+        process_batch.assert_called_once_with([(Group, {"times_seen": 2}, {"pk": 1}, {}, None)])
+        assert client.exists("bar")
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
     def test_incr_saves_to_redis(self):
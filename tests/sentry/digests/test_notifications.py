@@ -4,20 +4,24 @@ from collections import OrderedDict, defaultdict
 from exam import fixture
 from six.moves import reduce
 
-from sentry.digests import Record
+from sentry.digests import LazyRecord, Record
+from sentry.digests.codecs import CompressedPickleCodec
 from sentry.digests.notifications import (
     Notification,
     event_to_record,
+    get_record_group_id,
     rewrite_record,
     group_records,
+    select_records,
     sort_group_contents,
     sort_rule_groups,
     split_key,
     unsplit_key,
 )
 from sentry.mail.adapter import ActionTargetType
-from sentry.models import Rule
+from sentry.models import GroupStatus, Rule
 from sentry.testutils import TestCase
+from sentry.utils.compat import mock
 
 
 class RewriteRecordTestCase(TestCase):
@@ -81,6 +85,49 @@ class GroupRecordsTestCase(TestCase):
         }
 
 
+class SelectRecordsTestCase(TestCase):
+    @fixture
+    def rule(self):
+        return self.project.rule_set.all()[0]
+
+    def get_lazy_record(self, event, codec):
+        record = event_to_record(event, (self.rule,))
+        return LazyRecord(record.key, codec.encode(record.value), record.timestamp, codec)
+
+    def test_record_group_id(self):
+        event = self.store_event(data={}, project_id=self.project.id)
+        record = event_to_record(event, (self.rule,))
+        assert get_record_group_id(record) == event.group_id
+
+        # records that are only keyed by event ID
+        record = Record(event.event_id, record.value, record.timestamp)
+        assert get_record_group_id(record) == event.group_id
+
+    def test_success(self):
+        events = [
+            self.store_event(data={"fingerprint": [fingerprint]}, project_id=self.project.id)
+            for fingerprint in ["group-1", "group-1", "group-1", "group-2", "group-3"]
+        ]
+        group_1, group_2 = events[0].group, events[3].group
+        group_2.update(status=GroupStatus.RESOLVED)
+        # the group of the last event is missing
+        groups = {group.id: group for group in (group_1, group_2)}
+
+        codec = mock.Mock(wraps=CompressedPickleCodec())
+        records = [self.get_lazy_record(event, codec) for event in events]
+        assert [record.key for record in select_records(records, groups)] == [
+            record.key for record in records[:3]
+        ]
+        assert [
+            record.key for record in select_records(records, groups, max_records_per_group=2)
+        ] == [record.key for record in records[:2]]
+        assert codec.decode.call_count == 0
+
+        # The values of the selected records are only decoded when accessed.
+        assert records[0].value.event.event_id == events[0].event_id
+        assert codec.decode.call_count == 1
+
+
 class SortRecordsTestCase(TestCase):
     def test_success(self):
         Rule.objects.create(
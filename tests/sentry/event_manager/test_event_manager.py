@@ -21,6 +21,7 @@ from sentry.event_manager import (
     EventManager,
     EventUser,
     has_pending_commit_resolution,
+    save_error_events,
 )
 from sentry.grouping.utils import hash_from_values
 from sentry.models import (
@@ -1493,3 +1494,65 @@ class ReleaseIssueTest(TestCase):
             last_seen=self.timestamp + 100,
             first_seen=self.timestamp + 100,
         )
+
+
+class SaveErrorEventsTest(TestCase):
+    def make_job(self, **kwargs):
+        manager = EventManager(make_event(**kwargs))
+        manager.normalize()
+        return {
+            "data": manager.get_data(),
+            "project_id": self.project.id,
+            "raw": False,
+            "start_time": time(),
+            "cache_key": None,
+        }
+
+    def test_groups_events_in_batch(self):
+        jobs = [
+            self.make_job(message="foo", fingerprint=["a"]),
+            self.make_job(message="foo", fingerprint=["a"]),
+            self.make_job(message="bar", fingerprint=["b"]),
+        ]
+
+        with self.tasks():
+            save_error_events(jobs, {self.project.id: self.project})
+
+        assert jobs[0]["is_new"]
+        assert not jobs[1]["is_new"]
+        assert jobs[2]["is_new"]
+        assert jobs[0]["group"].id == jobs[1]["group"].id
+        assert jobs[0]["group"].id != jobs[2]["group"].id
+        assert Group.objects.filter(project=self.project).count() == 2
+        assert Group.objects.get(id=jobs[0]["group"].id).times_seen == 2
+        assert jobs[2]["group"].short_id == jobs[0]["group"].short_id + 1
+        for job in (jobs[0], jobs[2]):
+            assert GroupHash.objects.filter(group=job["group"]).count() == 1
+
+        for job in jobs:
+            node_id = Event.generate_node_id(self.project.id, job["event"].event_id)
+            assert nodestore.get(node_id)["title"] == job["event"].title
+
+    def test_discarded_events_are_skipped(self):
+        manager = EventManager(make_event(message="foo", fingerprint=["a"]))
+        manager.normalize()
+        group = Group.objects.get(id=manager.save(self.project.id).group_id)
+        tombstone = GroupTombstone.objects.create(
+            project_id=group.project_id,
+            level=group.level,
+            message=group.message,
+            culprit=group.culprit,
+            data=group.data,
+            previous_group_id=group.id,
+        )
+        GroupHash.objects.filter(group=group).update(group=None, group_tombstone_id=tombstone.id)
+
+        jobs = [
+            self.make_job(message="foo", fingerprint=["a"]),
+            self.make_job(message="bar", fingerprint=["b"]),
+        ]
+        save_error_events(jobs, {self.project.id: self.project})
+
+        assert isinstance(jobs[0]["discarded"], HashDiscarded)
+        assert "discarded" not in jobs[1]
+        assert jobs[1]["group"].message == "bar"
@@ -205,3 +205,47 @@ def test_package_matching():
     assert not bool(
         bundled_rule.get_matching_frame_actions({"package": "/usr/lib/linux-gate.so"}, "native")
     )
+
+
+def test_compiled_matcher():
+    enhancement = Enhancements.from_config_string(
+        """
+        family:native function:std::*                  -app
+        family:native package:**/libfoo.so            +app
+        family:native app:yes function:foo_*           -group
+        family:native !function:bar                    ^-group
+        path:**/test.js                                +app
+    """
+    )
+
+    def get_frames():
+        return [
+            {"function": "std::whatever", "package": "/usr/lib/libfoo.so"},
+            {"function": "foo_main", "package": "/usr/lib/libfoo.so"},
+            {"function": "foo_main", "package": "/usr/lib/libbar.so"},
+            {"function": "bar", "abs_path": "/foo/test.js"},
+        ]
+
+    expected = []
+    frames = get_frames()
+    for rule in enhancement.rules:
+        for idx, frame in enumerate(frames):
+            actions = rule.get_matching_frame_actions(frame, "native")
+            for action in actions or ():
+                action.apply_modifications_to_frame(frames, idx)
+                expected.append((rule, idx))
+
+    matched = []
+    compiled_frames = get_frames()
+    for rule, idx in enhancement._matcher.iter_matches(compiled_frames, "native"):
+        for action in rule.actions:
+            action.apply_modifications_to_frame(compiled_frames, idx)
+        matched.append((rule, idx))
+
+    assert matched == expected
+    assert compiled_frames == frames
+    assert [f.get("in_app") for f in frames] == [True, True, None, True]
+
+    # Frames with the same attributes are matched from the cache.
+    list(enhancement._matcher.iter_matches(get_frames(), "native"))
+    assert enhancement._matcher._cache.hits == 4
@@ -29,8 +29,10 @@ from sentry.incidents.subscription_processor import (
     build_alert_rule_trigger_stat_key,
     build_trigger_stat_keys,
     get_alert_rule_stats,
+    get_alert_rule_stats_many,
     get_redis_client,
     partition,
+    process_updates,
     SubscriptionProcessor,
     update_alert_rule_stats,
 )
@@ -782,6 +784,78 @@ class ProcessUpdateTest(TestCase):
         self.assert_trigger_exists_with_status(incident, other_trigger, TriggerStatus.RESOLVED)
         self.assert_actions_resolved_for_incident(incident, [self.action, other_action])
 
+    def test_process_updates(self):
+        rule = self.rule
+        trigger = self.trigger
+        updates = [
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-2)
+                ),
+                self.sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.other_sub,
+                    value=trigger.alert_threshold + 1,
+                    time_delta=timedelta(minutes=-2),
+                ),
+                self.other_sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.sub, value=rule.resolve_threshold - 1, time_delta=timedelta(minutes=-1)
+                ),
+                self.sub,
+            ),
+        ]
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            process_updates(updates)
+
+        # Both updates for `sub` were applied in order, resolving the incident again
+        self.assert_no_active_incident(rule, self.sub)
+        incident = self.assert_active_incident(rule, self.other_sub)
+        self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.ACTIVE)
+
+        last_update, alert_counts, resolve_counts = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == updates[2][0]["timestamp"]
+        assert alert_counts == {trigger.id: 0}
+        assert resolve_counts == 0
+
+    def test_process_updates_failure(self):
+        rule = self.rule
+        trigger = self.trigger
+        broken_update = self.build_subscription_update(
+            self.other_sub, time_delta=timedelta(minutes=-1)
+        )
+        broken_update["values"]["data"] = []
+        updates = [
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-2)
+                ),
+                self.sub,
+            ),
+            (broken_update, self.other_sub),
+        ]
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            with self.assertRaises(IndexError):
+                process_updates(updates)
+
+        # The stats of the committed update are still written, so that it is not
+        # processed again.
+        self.assert_active_incident(rule, self.sub)
+        last_update, alert_counts, _ = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == updates[0][0]["timestamp"]
+        assert alert_counts == {trigger.id: 0}
+
+        last_update, _, _ = get_alert_rule_stats(rule, self.other_sub, [trigger])
+        assert last_update != broken_update["timestamp"]
+
 
 class TestBuildAlertRuleStatKeys(unittest.TestCase):
     def test(self):
@@ -841,6 +915,24 @@ class TestGetAlertRuleStats(TestCase):
         assert alert_counts == {3: 1, 4: 3}
         assert resolve_counts == 20
 
+    def test_many(self):
+        triggers = [AlertRuleTrigger(id=3)]
+        client = get_redis_client()
+        client.set("{alert_rule:1:project:2}:resolve_triggered", 20)
+        client.set("{alert_rule:5:project:2}:trigger:3:alert_triggered", 1)
+
+        items = [
+            (AlertRule(id=1), QuerySubscription(project_id=2), triggers),
+            (AlertRule(id=5), QuerySubscription(project_id=2), triggers),
+        ]
+        assert get_alert_rule_stats_many(items) == [
+            get_alert_rule_stats(alert_rule, sub, triggers) for alert_rule, sub, triggers in items
+        ]
+        assert [stats[1:] for stats in get_alert_rule_stats_many(items)] == [
+            ({3: 0}, 20),
+            ({3: 1}, 0),
+        ]
+
 
 class TestUpdateAlertRuleStats(TestCase):
     def test(self):
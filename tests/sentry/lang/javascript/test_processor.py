@@ -20,6 +20,7 @@ from sentry.lang.javascript.processor import (
     discover_sourcemap,
     fetch_sourcemap,
     fetch_file,
+    parse_sourcemap,
     generate_module,
     trim_line,
     fetch_release_file,
@@ -217,11 +218,94 @@ class FetchReleaseFileTest(TestCase):
 
         assert result == new_result
 
+    def test_release_file_index(self):
+        project = self.project
+        release = Release.objects.create(organization_id=project.organization_id, version="abc")
+        release.add_project(project)
+
+        def create_release_file(name, body):
+            file = File.objects.create(name=name, type="release.file")
+            file.putfile(six.BytesIO(body))
+            return ReleaseFile.objects.create(
+                name=name, release=release, organization_id=project.organization_id, file=file
+            )
+
+        foo = create_release_file("foo.js", b"foo")
+        assert ReleaseFile.get_index(release.id) == {
+            foo.ident: (foo.id, foo.file_id, None, foo.file.checksum)
+        }
+
+        # The index is cached
+        with self.assertNumQueries(0):
+            assert list(ReleaseFile.get_index(release.id)) == [foo.ident]
+
+        # and cleared when artifacts are added.
+        bar = create_release_file("~/bar.js", b"bar")
+        assert sorted(ReleaseFile.get_index(release.id)) == sorted([foo.ident, bar.ident])
+
+        result = fetch_release_file("http://example.com/bar.js", release)
+        assert result.body == b"bar"
+
+        bar.delete()
+        assert list(ReleaseFile.get_index(release.id)) == [foo.ident]
+
+    def test_release_file_index_caching(self):
+        project = self.project
+        release = Release.objects.create(organization_id=project.organization_id, version="abc")
+        release.add_project(project)
+
+        file = File.objects.create(
+            name="~/foo.js",
+            type="release.file",
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+        file.putfile(six.BytesIO(b"foo"))
+        ReleaseFile.objects.create(
+            name="~/foo.js", release=release, organization_id=project.organization_id, file=file
+        )
+        expected = http.UrlResult(
+            "http://example.com/foo.js",
+            {"content-type": "application/json; charset=utf-8"},
+            b"foo",
+            200,
+            "utf-8",
+        )
+        assert fetch_release_file("http://example.com/foo.js", release) == expected
+
+        # Cached artifacts are served by checksum, whatever name they are
+        # requested by.
+        with self.assertNumQueries(0):
+            assert fetch_release_file("http://example.com/foo.js", release) == expected
+            assert fetch_release_file(
+                "http://example.com/foo.js?v=1", release
+            ) == expected._replace(url="http://example.com/foo.js?v=1")
+            assert fetch_release_file("http://example.com/bar.js", release) is None
+
+    def test_release_file_index_too_large(self):
+        project = self.project
+        release = Release.objects.create(organization_id=project.organization_id, version="abc")
+        release.add_project(project)
+
+        file = File.objects.create(name="foo.js", type="release.file")
+        file.putfile(six.BytesIO(b"foo"))
+        ReleaseFile.objects.create(
+            name="foo.js", release=release, organization_id=project.organization_id, file=file
+        )
+
+        # Releases whose index does not fit into the cache fall back to
+        # looking up artifacts one by one.
+        with self.settings(SENTRY_CACHE_MAX_VALUE_SIZE=10):
+            assert ReleaseFile.get_index(release.id) is None
+            result = fetch_release_file("foo.js", release)
+            assert result.body == b"foo"
+
+    @patch.object(ReleaseFile, "get_index", return_value=None)
     @patch("sentry.lang.javascript.processor.compress_file")
-    def test_compression(self, mock_compress_file):
+    def test_compression(self, mock_compress_file, mock_get_index):
         """
         For files larger than max memcached payload size we want to avoid
         pointless compression and  caching attempt since it fails silently.
+        This covers releases without an index, which cache artifacts by name.
 
         Tests scenarios:
 
@@ -701,6 +785,29 @@ class FetchSourcemapTest(TestCase):
         with pytest.raises(UnparseableSourcemap):
             fetch_sourcemap("http://example.com")
 
+    def test_parsed_sourcemap_cache(self):
+        release = self.create_release(project=self.project, version="abc")
+        other_release = self.create_release(project=self.project, version="def")
+        body = b'{"version":3,"sources":["a.js"],"names":[],"mappings":"AAAA"}'
+        url = "http://example.com/cached.js.map"
+
+        with self.settings(SENTRY_SOURCEMAP_CACHE_SIZE=1024), patch(
+            "sentry.lang.javascript.processor._parsed_sourcemaps", None
+        ):
+            smap_view = parse_sourcemap(body, url, release=release)
+            assert parse_sourcemap(body, url, release=release) is smap_view
+            assert parse_sourcemap(body, url, release=other_release) is not smap_view
+            assert parse_sourcemap(body + b" ", url, release=release) is not smap_view
+
+    def test_parsed_sourcemap_cache_disabled(self):
+        body = b'{"version":3,"sources":["a.js"],"names":[],"mappings":"AAAA"}'
+        url = "http://example.com/cached.js.map"
+
+        with self.settings(SENTRY_SOURCEMAP_CACHE_SIZE=0), patch(
+            "sentry.lang.javascript.processor._parsed_sourcemaps", None
+        ):
+            assert parse_sourcemap(body, url) is not parse_sourcemap(body, url)
+
 
 class TrimLineTest(unittest.TestCase):
     long_line = "The public is more familiar with bad design than good design. It is, in effect, conditioned to prefer bad design, because that is what it lives with. The new becomes threatening, the old reassuring."
@@ -1050,3 +1157,53 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+    @responses.activate
+    def test_cache_sources_concurrently(self):
+        responses.add(
+            responses.GET,
+            "http://example.com/a.min.js",
+            body="console.log('a')\n//# sourceMappingURL=app.js.map",
+        )
+        responses.add(
+            responses.GET,
+            "http://example.com/b.min.js",
+            body="console.log('b')\n//# sourceMappingURL=app.js.map",
+        )
+        responses.add(
+            responses.GET,
+            "http://example.com/app.js.map",
+            body='{"version":3,"sources":["a.js","b.js"],"sourcesContent":["a","b"],"names":[],"mappings":"AAAA"}',
+        )
+        responses.add(responses.GET, "http://example.com/c.min.js", status=404)
+
+        project = self.create_project()
+        processor = JavaScriptStacktraceProcessor(data={}, stacktrace_infos=None, project=project)
+
+        processor.cache_sources_concurrently(
+            [
+                "http://example.com/a.min.js",
+                "http://example.com/b.min.js",
+                "http://example.com/c.min.js",
+            ],
+            concurrency=4,
+        )
+
+        # The shared source map is fetched once.
+        assert len(responses.calls) == 4
+        assert processor.fetch_count == 3
+
+        for filename in ("a", "b"):
+            abs_path = "http://example.com/%s.min.js" % filename
+            assert processor.cache.get(abs_path)
+            assert processor.cache.get_errors(abs_path) == []
+            sourcemap_url, sourcemap_view = processor.sourcemaps.get_link(abs_path)
+            assert sourcemap_url == "http://example.com/app.js.map"
+            assert sourcemap_view is not None
+            assert processor.cache.get("http://example.com/%s.js" % filename)
+
+        abs_path = "http://example.com/c.min.js"
+        assert processor.cache.get(abs_path) is None
+        assert processor.cache.get_errors(abs_path) == [
+            {"type": EventError.FETCH_INVALID_HTTP_CODE, "value": 404, "url": abs_path}
+        ]
@@ -1,9 +1,11 @@
 from __future__ import absolute_import
 
 import pytest
+import responses
 
-from sentry.lang.native.symbolicator import get_sources_for_project
-from sentry.testutils.helpers import Feature
+from sentry.lang.native.symbolicator import Symbolicator, get_sources_for_project
+from sentry.testutils.helpers import Feature, override_options
+from sentry.utils import json
 from sentry.utils.compat import map
 
 
@@ -103,3 +105,66 @@ def test_sources_custom_disabled(default_project):
 
     source_ids = map(lambda s: s["id"], sources)
     assert source_ids == ["sentry:project"]
+
+
+def _symbolicate(request):
+    # A stub symbolicator that names functions after their relative address
+    payload = json.loads(request.body)
+    modules = payload["modules"]
+    image_addr = int(modules[0]["image_addr"], 16)
+    stacktraces = [
+        {
+            "frames": [
+                {
+                    "status": "symbolicated",
+                    "original_index": idx,
+                    "instruction_addr": frame["instruction_addr"],
+                    "function": "func_%x" % (int(frame["instruction_addr"], 16) - image_addr),
+                }
+                for idx, frame in enumerate(stacktrace["frames"])
+            ]
+        }
+        for stacktrace in payload["stacktraces"]
+    ]
+    modules = [dict(module, debug_status="found") for module in modules]
+    body = {"status": "completed", "modules": modules, "stacktraces": stacktraces}
+    return 200, {}, json.dumps(body)
+
+
+@pytest.mark.django_db
+@responses.activate
+def test_process_payload_frame_cache(default_project):
+    responses.add_callback(
+        responses.POST, "http://localhost:3021/symbolicate", callback=_symbolicate
+    )
+
+    def process(image_addr, addrs):
+        symbolicator = Symbolicator(project=default_project, event_id="a" * 32)
+        modules = [
+            {
+                "type": "macho",
+                "debug_id": "dfb8e43a-f242-3d73-a453-aeb6a777ef75",
+                "image_addr": "0x%x" % image_addr,
+                "image_size": 0x1000,
+            }
+        ]
+        stacktraces = [{"frames": [{"instruction_addr": "0x%x" % addr} for addr in addrs]}]
+        return symbolicator.process_payload(stacktraces=stacktraces, modules=modules)
+
+    with override_options({"symbolicator.frame-cache-ttl": 60}):
+        process(0x1000, [0x1010, 0x1020])
+        assert len(responses.calls) == 1
+
+        # The same frames in a module loaded at a different address
+        response = process(0x5000, [0x5010, 0x5020])
+        assert len(responses.calls) == 1
+        assert response["modules"][0]["debug_status"] == "found"
+        assert response["modules"][0]["image_addr"] == "0x5000"
+        frames = response["stacktraces"][0]["frames"]
+        assert [f["instruction_addr"] for f in frames] == ["0x5010", "0x5020"]
+        assert [f["function"] for f in frames] == ["func_10", "func_20"]
+        assert [f["original_index"] for f in frames] == [0, 1]
+
+        # The crashing frame is looked up differently than callers
+        process(0x5000, [0x5020, 0x5010])
+        assert len(responses.calls) == 2
@@ -36,3 +36,14 @@ class OrganizationOptionManagerTest(TestCase):
         OrganizationOption.objects.create(organization=self.organization, key="foo", value="bar")
         result = OrganizationOption.objects.get_value_bulk([self.organization], "foo")
         assert result == {self.organization: "bar"}
+
+    def test_get_all_values_bulk(self):
+        organization = self.create_organization()
+        OrganizationOption.objects.create(organization=self.organization, key="foo", value="bar")
+
+        OrganizationOption.objects.clear_local_cache()
+        result = OrganizationOption.objects.get_all_values_bulk(
+            [self.organization.id, organization.id]
+        )
+        assert result == {self.organization.id: {"foo": "bar"}, organization.id: {}}
+        assert OrganizationOption.objects.get_all_values(self.organization) == {"foo": "bar"}
@@ -32,3 +32,13 @@ class ProjectOptionManagerTest(TestCase):
         ProjectOption.objects.create(project=self.project, key="foo", value="bar")
         result = ProjectOption.objects.get_value_bulk([self.project], "foo")
         assert result == {self.project: "bar"}
+
+    def test_get_all_values_bulk(self):
+        project = self.create_project()
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+
+        ProjectOption.objects.clear_local_cache()
+        result = ProjectOption.objects.get_all_values_bulk([self.project.id, project.id])
+        assert result[self.project.id]["foo"] == "bar"
+        assert "foo" not in result[project.id]
+        assert ProjectOption.objects.get_all_values(self.project) == result[self.project.id]
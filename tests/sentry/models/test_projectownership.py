@@ -79,6 +79,22 @@ class ProjectOwnershipTestCase(TestCase):
             ([Actor(self.team.id, Team), Actor(self.user.id, User)], [rule_a, rule_b]),
         )
 
+    def test_get_owners_schema_changed(self):
+        rule_a = Rule(Matcher("path", "*.py"), [Owner("team", self.team.slug)])
+        rule_b = Rule(Matcher("path", "src/*"), [Owner("user", self.user.email)])
+        data = {"stacktrace": {"frames": [{"filename": "src/foo.py"}]}}
+
+        ownership = ProjectOwnership.objects.create(
+            project_id=self.project.id, schema=dump_schema([rule_a])
+        )
+        assert ProjectOwnership.get_owners(self.project.id, data)[1] == [rule_a]
+
+        # The compiled rules are not reused for a different schema, even if
+        # the revision of the ownership stays the same.
+        ownership.schema = dump_schema([rule_b])
+        ownership.save()
+        assert ProjectOwnership.get_owners(self.project.id, data)[1] == [rule_b]
+
 
 class ResolveActorsTestCase(TestCase):
     def test_no_actors(self):
@@ -2,7 +2,7 @@ from __future__ import absolute_import
 
 import pytest
 
-from sentry.nodestore.bigtable.backend import BigtableNodeStorage
+from sentry.nodestore.bigtable.backend import BigtableError, BigtableNodeStorage
 from sentry.testutils import TestCase
 from sentry.utils.compat import mock
 
@@ -56,6 +56,16 @@ class BigtableNodeStorageTest(TestCase):
         self.ns.compression = True
         self.test_get()
 
+    def test_compression_zstd(self):
+        self.ns.compression = "zstd"
+        self.test_get()
+
+        # Rows written with zlib stay readable
+        self.ns.compression = True
+        self.ns.set("node_id", {"foo": "baz"})
+        self.ns.compression = "zstd"
+        assert self.ns.get("node_id") == {"foo": "baz"}
+
     def test_cache(self):
         node_1 = ("a" * 32, {"foo": "a"})
         node_2 = ("b" * 32, {"foo": "b"})
@@ -110,3 +120,20 @@ class BigtableNodeStorageTest(TestCase):
             self.ns.get("node_4")
             self.ns.get("node_4")
             assert mock_read_row.call_count == 2
+
+
+class BigtableNodeStorageSetMultiTest(TestCase):
+    @mock.patch("sentry.nodestore.bigtable.backend.get_connection")
+    def test_set_multi_failure(self, get_connection):
+        get_connection.return_value.mutate_rows.return_value = [
+            mock.Mock(code=0, message=""),
+            mock.Mock(code=14, message="unavailable"),
+        ]
+        ns = BigtableNodeStorage(project="test")
+
+        with mock.patch.object(ns, "_set_cache_items") as set_cache_items:
+            with pytest.raises(BigtableError):
+                ns.set_multi({"a" * 32: {"foo": "a"}, "b" * 32: {"foo": "b"}})
+
+        # Rows that may not have been written are not cached.
+        assert not set_cache_items.called
@@ -9,6 +9,7 @@ from sentry.nodestore.django.models import Node
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.testutils import TestCase
 from sentry.utils.compat import mock
+from sentry.utils.lru import LRUCache
 
 
 class DjangoNodeStorageTest(TestCase):
@@ -131,3 +132,35 @@ class DjangoNodeStorageTest(TestCase):
             self.ns.get("node_4")
             self.ns.get("node_4")
             assert mock_get.call_count == 2
+
+    def test_local_cache(self):
+        local_cache = LRUCache(max_size=1024, sizeof=len)
+        node_1 = ("a" * 32, {"foo": "a"})
+        node_2 = ("b" * 32, {"foo": "b"})
+
+        for node_id, data in [node_1, node_2]:
+            Node.objects.create(id=node_id, data=data)
+
+        with mock.patch(
+            "sentry.nodestore.base.get_local_cache", return_value=local_cache
+        ), mock.patch.object(self.ns, "cache", None):
+            assert self.ns.get(node_1[0]) == node_1[1]
+            assert self.ns.get_multi([node_1[0], node_2[0]]) == {
+                node_1[0]: node_1[1],
+                node_2[0]: node_2[1],
+            }
+            with mock.patch.object(Node.objects, "get") as mock_get:
+                assert self.ns.get(node_2[0]) == node_2[1]
+                assert mock_get.call_count == 0
+
+            # Callers get their own copy of the data
+            self.ns.get(node_1[0])["foo"] = "mutated"
+            assert self.ns.get(node_1[0]) == node_1[1]
+
+            self.ns.set(node_1[0], {"foo": "c"})
+            assert local_cache.get(node_1[0]) is not None
+            assert self.ns.get(node_1[0]) == {"foo": "c"}
+
+            self.ns.delete_multi([node_1[0], node_2[0]])
+            assert local_cache.get_many([node_1[0], node_2[0]]) == {}
+            assert self.ns.get_multi([node_1[0], node_2[0]]) == {}
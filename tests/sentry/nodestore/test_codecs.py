@@ -0,0 +1,62 @@
+from __future__ import absolute_import
+
+import pytest
+
+from sentry.nodestore.codecs import ZlibCodec, ZstdCodec, train_zstd_dictionary
+from sentry.utils import json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+requires_zstd = pytest.mark.skipif(zstandard is None, reason="requires zstandard")
+
+
+def make_payloads(count=500):
+    return [
+        json.dumps(
+            {
+                "event_id": "%032x" % i,
+                "platform": "python",
+                "sdk": {"name": "sentry.python", "version": "0.%d.0" % (i % 20)},
+                "contexts": {"runtime": {"name": "CPython", "version": "3.%d" % (i % 9)}},
+                "message": "Error number %d" % i,
+            }
+        ).encode("utf-8")
+        for i in range(count)
+    ]
+
+
+def test_zlib_roundtrip():
+    codec = ZlibCodec()
+    payload = make_payloads(1)[0]
+    assert codec.decode(codec.encode(payload)) == payload
+
+
+@requires_zstd
+def test_zstd_roundtrip():
+    codec = ZstdCodec()
+    payload = make_payloads(1)[0]
+    assert codec.decode(codec.encode(payload)) == payload
+
+
+@requires_zstd
+def test_zstd_dictionaries():
+    payloads = make_payloads()
+    old = train_zstd_dictionary(payloads[:250], size=2048)
+    new = train_zstd_dictionary(payloads[250:], size=4096)
+
+    old_codec = ZstdCodec(dictionaries=[old])
+    new_codec = ZstdCodec(dictionaries=[old, new])
+
+    # Payloads written with an older dictionary stay readable
+    encoded = old_codec.encode(payloads[0])
+    assert new_codec.decode(encoded) == payloads[0]
+    assert new_codec.decode(ZstdCodec().encode(payloads[0])) == payloads[0]
+
+    encoded = new_codec.encode(payloads[0])
+    assert new_codec.decode(encoded) == payloads[0]
+    with pytest.raises(ValueError):
+        old_codec.decode(encoded)
+    assert len(encoded) < len(ZstdCodec().encode(payloads[0]))
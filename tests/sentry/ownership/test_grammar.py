@@ -2,7 +2,15 @@ from __future__ import absolute_import
 
 import pytest
 
-from sentry.ownership.grammar import Rule, Matcher, Owner, parse_rules, dump_schema, load_schema
+from sentry.ownership.grammar import (
+    Rule,
+    Matcher,
+    Owner,
+    RulesMatcher,
+    parse_rules,
+    dump_schema,
+    load_schema,
+)
 
 fixture_data = """
 # cool stuff comment
@@ -125,3 +133,59 @@ def test_matcher_test_tags():
 def test_matcher_test_tags_without_tag_data(data):
     assert not Matcher("tags.foo", "foo_value").test(data)
     assert not Matcher("tags.bar", "barval").test(data)
+
+
+def test_rules_matcher():
+    rules = parse_rules(
+        """
+*.js                        #frontend
+src/sentry/*                #backend
+SRC\\sentry\\api\\*           #api
+*/tasks/*.py                #tasks
+url:http://google.com/*     #google
+url:*.example.com/*         #example
+tags.foo:bar                #foo
+tags.foo:b?z                #foo
+tags.level:error            #errors
+tags.foo:bar                #other
+"""
+    )
+    matcher = RulesMatcher(rules)
+
+    def naive(data):
+        return [rule for rule in rules if rule.test(data)]
+
+    for data in [
+        {},
+        {"tags": None},
+        {"tags": [None]},
+        {"request": {"url": None}},
+        {"request": {"url": "http://google.com/search"}},
+        {"request": {"url": "HTTP://GOOGLE.COM/"}},
+        {"request": {"url": "https://www.example.com/foo.js"}},
+        {"tags": [["foo", "bar"], ["level", "error"]]},
+        {"tags": [["foo", "baz"], ["level", "warning"]]},
+        {"stacktrace": {"frames": [{"filename": "src/sentry/api/base.py"}]}},
+        {"stacktrace": {"frames": [{"abs_path": "src\\sentry\\api\\base.py"}]}},
+        {"stacktrace": {"frames": [{"filename": u"src/sentry/\xfcber.js"}]}},
+        {"stacktrace": {"frames": [{"filename": u"\u212a/tasks/a.py"}]}},
+        {
+            "exception": {
+                "values": [
+                    {
+                        "stacktrace": {
+                            "frames": [
+                                {"filename": "app.js"},
+                                {"abs_path": "/usr/src/sentry/tasks/post_process.py"},
+                            ]
+                        }
+                    }
+                ]
+            },
+            "tags": [["foo", "bar"]],
+        },
+    ]:
+        # Twice, to also match from the cache.
+        assert matcher.get_matching_rules(data) == naive(data), data
+        assert matcher.get_matching_rules(data) == naive(data), data
+        assert matcher.test(data) == bool(naive(data))
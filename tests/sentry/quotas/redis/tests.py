@@ -168,6 +168,37 @@ class RedisQuotaTest(TestCase):
 
         assert self.quota.is_rate_limited(self.project).is_limited
 
+    @mock.patch("sentry.quotas.redis.is_rate_limited", return_value=(True, False))
+    def test_deny_cache(self, is_rate_limited):
+        self.get_organization_quota.return_value = (100, 60)
+        self.get_project_quota.return_value = (200, 60)
+        quota = RedisQuota(deny_cache_size=10)
+
+        timestamp = 600.0
+        assert quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert quota.is_rate_limited(self.project, timestamp=timestamp + 1).is_limited
+        assert is_rate_limited.call_count == 1
+
+        # The next window is checked in Redis again.
+        is_rate_limited.return_value = (False, False)
+        assert not quota.is_rate_limited(self.project, timestamp=timestamp + 60).is_limited
+        assert is_rate_limited.call_count == 2
+
+    @mock.patch("sentry.quotas.redis.is_rate_limited", return_value=(False, False))
+    def test_quota_cache(self, is_rate_limited):
+        self.get_organization_quota.return_value = (100, 60)
+        self.get_project_quota.return_value = (200, 60)
+        quota = RedisQuota(quota_cache_size=10)
+
+        assert not quota.is_rate_limited(self.project).is_limited
+        assert not quota.is_rate_limited(self.project).is_limited
+        assert self.get_project_quota.call_count == 1
+
+        # Changing the options of the organization invalidates the cached quotas.
+        self.organization.update_option("sentry:project-rate-limit", 50)
+        assert not quota.is_rate_limited(self.project).is_limited
+        assert self.get_project_quota.call_count == 2
+
     def test_get_usage(self):
         timestamp = time.time()
 
@@ -2,8 +2,12 @@
 
 from __future__ import absolute_import
 
+import pytest
+
+from sentry.exceptions import InvalidConfiguration
 from sentry.ratelimits.redis import RedisRateLimiter
 from sentry.testutils import TestCase
+from sentry.utils.compat import mock
 
 
 class RedisRateLimiterTest(TestCase):
@@ -17,3 +21,71 @@ class RedisRateLimiterTest(TestCase):
     def test_simple_key(self):
         assert not self.backend.is_limited("foo", 1)
         assert self.backend.is_limited("foo", 1)
+
+    def test_is_limited_many(self):
+        assert self.backend.is_limited_many(["foo", "bar"], 1) == [False, False]
+        assert self.backend.is_limited_many(["foo", "baz"], 1) == [True, False]
+
+
+class SlidingWindowRateLimiterTest(TestCase):
+    def setUp(self):
+        self.backend = RedisRateLimiter(strategy="sliding")
+
+    def test_limit(self):
+        assert self.backend.is_limited_many(["foo", "bar"], 2, self.project) == [False, False]
+        assert not self.backend.is_limited("foo", 2, self.project)
+        assert self.backend.is_limited("foo", 2, self.project)
+        assert not self.backend.is_limited("bar", 2, self.project)
+
+    def test_previous_window(self):
+        with mock.patch("sentry.ratelimits.redis.time", return_value=600.0):
+            assert not self.backend.is_limited("foo", 2, window=60)
+            assert not self.backend.is_limited("foo", 2, window=60)
+
+        # Half of the previous window still counts.
+        with mock.patch("sentry.ratelimits.redis.time", return_value=690.0):
+            assert not self.backend.is_limited("foo", 2, window=60)
+            assert self.backend.is_limited("foo", 2, window=60)
+
+        with mock.patch("sentry.ratelimits.redis.time", return_value=720.0):
+            assert not self.backend.is_limited("foo", 2, window=60)
+
+
+class GCRARateLimiterTest(TestCase):
+    def setUp(self):
+        self.backend = RedisRateLimiter(strategy="gcra")
+
+    def test_burst_and_refill(self):
+        with mock.patch("sentry.ratelimits.redis.time", return_value=600.0):
+            assert self.backend.is_limited_many(["foo"] * 4, 3, window=60) == [
+                False,
+                False,
+                False,
+                True,
+            ]
+
+        with mock.patch("sentry.ratelimits.redis.time", return_value=620.0):
+            assert not self.backend.is_limited("foo", 3, window=60)
+            assert self.backend.is_limited("foo", 3, window=60)
+
+    def test_zero_limit(self):
+        assert self.backend.is_limited("foo", 0)
+
+
+class DenyCacheTest(TestCase):
+    def test_deny_cache(self):
+        backend = RedisRateLimiter(strategy="gcra", deny_cache_size=10)
+        with mock.patch("sentry.ratelimits.redis.time", return_value=600.0):
+            assert not backend.is_limited("foo", 1, window=60)
+            assert backend.is_limited("foo", 1, window=60)
+
+            with mock.patch.object(backend, "_check_gcra") as check:
+                assert backend.is_limited("foo", 1, window=60)
+                assert not check.called
+
+        with mock.patch("sentry.ratelimits.redis.time", return_value=660.0):
+            assert not backend.is_limited("foo", 1, window=60)
+
+    def test_unknown_strategy(self):
+        with pytest.raises(InvalidConfiguration):
+            RedisRateLimiter(strategy="unknown")
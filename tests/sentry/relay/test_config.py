@@ -2,8 +2,10 @@ from __future__ import absolute_import
 
 import pytest
 
+from sentry.datascrubbing import get_pii_config
 from sentry.models import ProjectKey
-from sentry.relay.config import get_project_config
+from sentry.relay.config import CONFIG_FRAGMENTS, get_project_config
+from sentry.utils.compat.mock import Mock, patch
 from sentry.utils.safe import get_path
 from sentry.testutils.helpers import Feature
 
@@ -73,3 +75,22 @@ def test_project_config_uses_filter_features(default_project, insta_snapshot, ha
         else:
             assert cfg_releases is None
             assert cfg_error_messages is None
+
+
+@pytest.mark.django_db
+def test_project_config_fragments(default_project):
+    get_inputs, generate = CONFIG_FRAGMENTS["piiConfig"]
+    generate = Mock(wraps=generate)
+    fragments = {}
+
+    with patch.dict(CONFIG_FRAGMENTS, {"piiConfig": (get_inputs, generate)}):
+        cfg = get_project_config(default_project, full_config=True, fragments=fragments)
+        assert get_project_config(default_project, fragments=fragments).config == cfg.config
+        assert generate.call_count <= 1
+
+        default_project.update_option("sentry:relay_pii_config", PII_CONFIG)
+        cfg = get_project_config(default_project, full_config=True, fragments=fragments)
+
+    assert generate.call_count >= 1
+    assert cfg.config["piiConfig"] == get_pii_config(default_project)
+    assert cfg.config["piiConfig"]["rules"]
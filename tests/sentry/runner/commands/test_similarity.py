@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+
+import six
+
+from sentry import eventstore
+from sentry.runner.commands.similarity import backfill
+from sentry.testutils import CliTestCase
+from sentry.utils.compat import mock
+
+
+class BackfillTest(CliTestCase):
+    command = backfill
+
+    @mock.patch("sentry.similarity.bulk_record")
+    def test_batches(self, bulk_record):
+        events = [mock.Mock(), mock.Mock(), mock.Mock()]
+        with mock.patch.object(
+            eventstore, "get_events", side_effect=[events[:2], events[2:]]
+        ) as get_events:
+            rv = self.invoke(six.text_type(self.project.id), "--batch-size=2")
+
+        assert rv.exit_code == 0, rv.output
+        assert "Done, indexed 3 events" in rv.output
+        assert [call[1]["offset"] for call in get_events.call_args_list] == [0, 2]
+        assert bulk_record.call_args_list == [
+            mock.call(self.project, events[:2]),
+            mock.call(self.project, events[2:]),
+        ]
+        assert all(event.project == self.project for event in events)
+
+    def test_missing_project(self):
+        rv = self.invoke("0")
+        assert rv.exit_code != 0
+        assert "Project 0 does not exist" in rv.output
@@ -162,6 +162,24 @@ class MinHashIndexBackendTestMixin(object):
             == [("4", [1.0, None]), ("1", [1.0, 0.0]), ("2", [1.0, 0.0]), ("3", [1.0, 0.0])]
         )
 
+    def test_record_many(self):
+        self.index.record_many(
+            "example",
+            [
+                ("1", [("index:a", "hello world"), ("index:b", "hello world")], None),
+                ("2", [("index:a", "hello world")], None),
+                ("3", [], None),
+                ("2", [("index:b", "pizza world")], None),
+            ],
+        )
+        self.index.record("other", "1", [("index:a", "hello world"), ("index:b", "hello world")])
+        self.index.record("other", "2", [("index:a", "hello world"), ("index:b", "pizza world")])
+
+        query = [("index:a", 0, "hello world"), ("index:b", 0, "hello world")]
+        results = self.index.classify("example", query)
+        assert [key for key, _ in results] == ["1", "2"]
+        assert results == self.index.classify("other", query)
+
     def test_merge(self):
         self.index.record("example", "1", [("index", ["foo", "bar"])])
         self.index.record("example", "2", [("index", ["baz"])])
@@ -49,3 +49,21 @@ class RedisScriptMinHashIndexBackendTestCase(MinHashIndexBackendTestMixin, TestC
 
         result = self.index.export("example", [("index", 2)], timestamp=timestamp)
         assert len(result) == 1
+
+    def test_record_many_expiration(self):
+        timestamp = int(time.time())
+        # Backfills record the most recent events first, which must not
+        # shorten the retention of the key.
+        self.index.record_many(
+            "example",
+            [
+                ("1", [("index", "hello world")], timestamp),
+                ("1", [("index", "pizza world")], timestamp - 60 * 60 * 6),
+            ],
+            timestamp=timestamp,
+        )
+
+        result = msgpack.unpackb(
+            self.index.export("example", [("index", 1)], timestamp=timestamp)[0]
+        )
+        self.assertAlmostEqual(result[1], 60 * 60 * 12, delta=10)
@@ -0,0 +1,51 @@
+from __future__ import absolute_import
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import pytz
+
+from sentry.similarity.encoder import Encoder
+from sentry.similarity.features import FeatureSet
+from sentry.utils.compat import mock
+from sentry.utils.dates import to_timestamp
+
+
+class MessageWordsFeature(object):
+    def extract(self, event):
+        return event.message.split()
+
+
+class FeatureSetTestCase(TestCase):
+    def test_bulk_record(self):
+        index = mock.Mock()
+        feature_set = FeatureSet(
+            index,
+            Encoder(),
+            {"message:words": "a"},
+            {"message:words": MessageWordsFeature()},
+            (),
+            (),
+        )
+
+        now = datetime(2020, 1, 1, tzinfo=pytz.utc)
+        events = [
+            mock.Mock(project_id=1, group_id=1, message="foo bar", datetime=now),
+            mock.Mock(project_id=2, group_id=2, message="foo", datetime=now),
+            mock.Mock(project_id=1, group_id=1, message="bar", datetime=now - timedelta(hours=1)),
+            mock.Mock(project_id=1, group_id=None, message="baz", datetime=now),
+            mock.Mock(project_id=1, group_id=3, message="", datetime=now),
+        ]
+        feature_set.bulk_record(events)
+
+        timestamp = int(to_timestamp(now))
+        assert sorted(index.record_many.call_args_list) == [
+            mock.call(
+                u"1",
+                [
+                    (u"1", [("a", [b"foo", b"bar"])], timestamp),
+                    (u"1", [("a", [b"bar"])], timestamp - 3600),
+                ],
+            ),
+            mock.call(u"2", [(u"2", [("a", [b"foo"])], timestamp)]),
+        ]
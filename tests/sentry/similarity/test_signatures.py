@@ -32,3 +32,10 @@ class MinHashSignatureBuilderTestCase(TestCase):
         self.assertAlmostEqual(
             similarity, estimation, delta=0.1  # totally made up constant, seems reasonable
         )
+
+    def test_cached_signatures(self):
+        get_signature = MinHashSignatureBuilder(32, 0xFFFF)
+        get_cached_signature = MinHashSignatureBuilder(32, 0xFFFF, cache_size=2)
+
+        for value in ("hello world", "jello world", "hello world", ["foo", "bar", "foo"]):
+            assert get_cached_signature(value) == get_signature(value)
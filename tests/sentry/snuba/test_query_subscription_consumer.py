@@ -18,6 +18,7 @@ from sentry.snuba.query_subscription_consumer import (
     InvalidMessageError,
     InvalidSchemaError,
     QuerySubscriptionConsumer,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -118,6 +119,76 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         mock_callback.assert_called_once_with(data["payload"], sub)
 
 
+class HandleMessagesTest(BaseQuerySubscriptionTest, TestCase):
+    metrics = patcher("sentry.snuba.query_subscription_consumer.metrics")
+
+    def create_subscription(self, registration_key):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                QueryDatasets.EVENTS,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_message_for_subscription(self, sub):
+        data = deepcopy(self.valid_wrapper)
+        data["payload"]["subscription_id"] = sub.subscription_id
+        return self.build_mock_message(data)
+
+    def test_batch_subscriber(self):
+        registration_key = "registered_batch_test"
+        mock_callback = Mock()
+        mock_batch_callback = Mock()
+        register_subscriber(registration_key)(mock_callback)
+        register_batch_subscriber(registration_key)(mock_batch_callback)
+        sub = self.create_subscription(registration_key)
+        other_sub = self.create_subscription(registration_key)
+
+        self.consumer.handle_messages(
+            [
+                self.build_message_for_subscription(sub),
+                self.build_message_for_subscription(other_sub),
+                self.build_message_for_subscription(sub),
+            ]
+        )
+        assert not mock_callback.called
+        assert mock_batch_callback.call_count == 1
+        (updates,) = mock_batch_callback.call_args[0]
+        assert [(contents["subscription_id"], s) for contents, s in updates] == [
+            (sub.subscription_id, sub),
+            (other_sub.subscription_id, other_sub),
+            (sub.subscription_id, sub),
+        ]
+
+    def test_subscriber_without_batch_support(self):
+        registration_key = "registered_without_batch_test"
+        mock_callback = Mock()
+        register_subscriber(registration_key)(mock_callback)
+        sub = self.create_subscription(registration_key)
+        unregistered_sub = QuerySubscription.objects.create(
+            project=self.project, type="unregistered", subscription_id="an_id"
+        )
+
+        self.consumer.handle_messages(
+            [
+                self.build_message_for_subscription(sub),
+                self.build_message_for_subscription(unregistered_sub),
+                self.build_message_for_subscription(sub),
+            ]
+        )
+        assert mock_callback.call_count == 2
+        assert [call[0][1] for call in mock_callback.call_args_list] == [sub, sub]
+        self.metrics.incr.assert_called_once_with(
+            "snuba_query_subscriber.subscription_type_not_registered"
+        )
+
+
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
         self.consumer.parse_message_value(json.dumps(message))
@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from datetime import datetime
+
+import pytest
+import pytz
+
+from sentry.tagstore.snuba.backend import SnubaTagStorage
+from sentry.tagstore.snuba.coalescer import QueryCoalescer, coalesce_queries
+from sentry.utils.compat import mock
+
+
+def fake_query(**kwargs):
+    aliases = [aggregation[2] for aggregation in kwargs["aggregations"]]
+    result = OrderedDict()
+    for group_id in (1, 2):
+        values = {
+            "times_seen": 3 * group_id,
+            "first_seen": "2020-01-0%d" % group_id,
+            "last_seen": "2020-02-0%d" % group_id,
+            "count": 2 * group_id,
+        }
+        if len(aliases) == 1:
+            result[group_id] = values[aliases[0]]
+        else:
+            result[group_id] = {alias: values[alias] for alias in aliases}
+    return result
+
+
+@pytest.fixture
+def snuba_query():
+    with mock.patch("sentry.utils.snuba.query", side_effect=fake_query) as snuba_query:
+        yield snuba_query
+
+
+def test_merges_compatible_queries(snuba_query):
+    coalescer = QueryCoalescer(cache_ttl=0)
+    filters = {"project_id": [1], "group_id": [1, 2]}
+
+    counts = coalescer.defer(
+        coalescer.query,
+        groupby=["group_id"],
+        filter_keys=filters,
+        aggregations=[["uniq", "tags[sentry:user]", "count"]],
+        referrer="a",
+    )
+    seen = coalescer.defer(
+        coalescer.query,
+        groupby=["group_id"],
+        filter_keys=filters,
+        aggregations=[["count()", "", "times_seen"], ["min", "timestamp", "first_seen"]],
+        referrer="b",
+    )
+
+    assert counts.result() == OrderedDict([(1, 2), (2, 4)])
+    assert seen.result() == OrderedDict(
+        [
+            (1, {"times_seen": 3, "first_seen": "2020-01-01"}),
+            (2, {"times_seen": 6, "first_seen": "2020-01-02"}),
+        ]
+    )
+    assert snuba_query.call_count == 1
+    assert snuba_query.call_args[1]["referrer"] == "tagstore.coalesced"
+    assert coalescer.saved == 1
+
+
+def test_does_not_merge_incompatible_queries(snuba_query):
+    coalescer = QueryCoalescer(cache_ttl=0)
+    query = {
+        "groupby": ["group_id"],
+        "filter_keys": {"project_id": [1], "group_id": [1, 2]},
+        "aggregations": [["count()", "", "times_seen"]],
+    }
+
+    first = coalescer.defer(coalescer.query, **query)
+    # Same alias for a different aggregation.
+    second = coalescer.defer(
+        coalescer.query, **dict(query, aggregations=[["uniq", "tags[sentry:user]", "times_seen"]])
+    )
+    # Different conditions.
+    third = coalescer.defer(coalescer.query, **dict(query, conditions=[["tags[foo]", "=", "bar"]]))
+
+    for handle in (first, second, third):
+        assert handle.result() == OrderedDict([(1, 3), (2, 6)])
+    assert snuba_query.call_count == 3
+    assert coalescer.saved == 0
+
+
+def test_deduplicates_identical_queries(snuba_query):
+    tagstore = SnubaTagStorage()
+    with coalesce_queries(cache_ttl=0) as coalescer:
+        assert tagstore.get_groups_user_counts([1], [1, 2], None) == {1: 2, 2: 4}
+        assert tagstore.get_groups_user_counts([1], [1, 2], None) == {1: 2, 2: 4}
+
+    assert snuba_query.call_count == 1
+    assert coalescer.saved == 1
+
+
+def test_deduplicates_tag_value_queries(snuba_query):
+    tagstore = SnubaTagStorage()
+    with coalesce_queries(cache_ttl=0) as coalescer:
+        for _ in range(2):
+            values = tagstore.get_group_list_tag_value([1], [1, 2], None, "foo", "bar")
+            assert values[2].times_seen == 6
+            assert values[2].first_seen == datetime(2020, 1, 2, tzinfo=pytz.utc)
+
+            seen = tagstore.get_group_seen_values_for_environments([1], [1, 2], [3])
+            assert seen[1]["last_seen"] == datetime(2020, 2, 1, tzinfo=pytz.utc)
+
+    assert snuba_query.call_count == 2
+    assert coalescer.saved == 2
+
+
+def test_deduplicates_top_values_queries():
+    values = {"count": 2, "first_seen": "2020-01-01", "last_seen": "2020-02-01"}
+
+    def query(**kwargs):
+        if kwargs["referrer"] == "tagstore.__get_tag_keys":
+            return {"foo": 2}
+        if kwargs.get("totals"):
+            return OrderedDict([("bar", values)]), {"count": 2, "values_seen": 1}
+        return {"foo": OrderedDict([("bar", values)])}
+
+    tagstore = SnubaTagStorage()
+    with mock.patch("sentry.utils.snuba.query", side_effect=query) as snuba_query:
+        with coalesce_queries(cache_ttl=0) as coalescer:
+            for _ in range(2):
+                tag_key = tagstore.get_group_tag_key(1, 1, None, "foo")
+                assert tag_key.count == 2
+                assert [value.value for value in tag_key.top_values] == ["bar"]
+
+                (tag_key,) = tagstore.get_group_tag_keys_and_top_values(1, 1, None)
+                assert tag_key.count == 2
+                assert [value.value for value in tag_key.top_values] == ["bar"]
+
+    # The tag keys themselves are not coalesced.
+    assert snuba_query.call_count == 4
+    assert coalescer.saved == 2
+
+
+def test_caches_results(snuba_query):
+    tagstore = SnubaTagStorage()
+    for _ in range(2):
+        with coalesce_queries(cache_ttl=60):
+            seen = tagstore.get_group_seen_values_for_environments([1], [1, 2], [3])
+            assert seen[2]["times_seen"] == 6
+
+    assert snuba_query.call_count == 1
+
+
+def test_without_coalescer(snuba_query):
+    tagstore = SnubaTagStorage()
+    assert tagstore.get_groups_user_counts([1], [1, 2], None) == {1: 2, 2: 4}
+    assert tagstore.get_groups_user_counts([1], [1, 2], None) == {1: 2, 2: 4}
+    assert snuba_query.call_count == 2
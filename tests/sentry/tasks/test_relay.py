@@ -223,3 +223,23 @@ def test_projectkeys(default_project, task_runner, redis_cache):
 
     for key in ProjectKey.objects.filter(project_id=default_project.id):
         assert not redis_cache.get(default_project.id)
+
+
+@pytest.mark.django_db
+def test_unchanged_config_not_written(default_project, redis_cache):
+    cfg = {"disabled": False, "rev": "a", "lastFetch": "2020-01-01T00:00:00Z"}
+    redis_cache.set_many({default_project.id: cfg})
+
+    # Overwrite the cached config behind the cache's back to detect writes.
+    key = "relayconfig:%s" % (default_project.id,)
+    redis_cache.cluster.get_local_client_for_key(key).set(key, '{"stale": true}')
+
+    redis_cache.set_many({default_project.id: dict(cfg, rev="b", lastFetch="later")})
+    assert redis_cache.get(default_project.id) == {"stale": True}
+
+    redis_cache.set_many({default_project.id: dict(cfg, disabled=True)})
+    assert redis_cache.get(default_project.id) == dict(cfg, disabled=True)
+
+    redis_cache.delete_many([default_project.id])
+    redis_cache.set_many({default_project.id: cfg})
+    assert redis_cache.get(default_project.id) == cfg
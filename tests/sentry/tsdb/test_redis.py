@@ -8,7 +8,7 @@ from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 from sentry.testutils import TestCase
-from sentry.tsdb.base import TSDBModel, ONE_MINUTE, ONE_HOUR, ONE_DAY
+from sentry.tsdb.base import TSDBModel, TSDBRequest, ONE_MINUTE, ONE_HOUR, ONE_DAY
 from sentry.tsdb.redis import RedisTSDB, CountMinScript, SuppressionWrapper
 from sentry.utils.dates import to_datetime, to_timestamp
 
@@ -320,6 +320,57 @@ class RedisTSDBTest(TestCase):
         )
         assert results == {1: 0, 2: 0}
 
+    def test_get_many(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        self.db.incr_multi([(TSDBModel.group, 1), (TSDBModel.group, 2)], dts[0], count=2)
+        self.db.incr(TSDBModel.group, 1, dts[3], environment_id=1)
+        self.db.record(TSDBModel.users_affected_by_group, 1, ("foo", "bar"), dts[1])
+        self.db.record(TSDBModel.users_affected_by_group, 2, ("foo",), dts[2])
+        self.db.record_frequency_multi(
+            [(TSDBModel.frequent_environments_by_group, {1: {"production": 2, "staging": 1}})],
+            dts[2],
+        )
+
+        requests = [
+            ("get_range", TSDBModel.group, [1, 2], None),
+            ("get_range", TSDBModel.group, [1, 2], [1]),
+            ("get_sums", TSDBModel.group, [1, 2], None),
+            ("get_distinct_counts_series", TSDBModel.users_affected_by_group, [1, 2], None),
+            ("get_distinct_counts_totals", TSDBModel.users_affected_by_group, [1, 2], None),
+            ("get_distinct_counts_union", TSDBModel.users_affected_by_group, [1, 2], None),
+            (
+                "get_frequency_series",
+                TSDBModel.frequent_environments_by_group,
+                {1: ["production", "staging"]},
+                None,
+            ),
+            (
+                "get_frequency_totals",
+                TSDBModel.frequent_environments_by_group,
+                {1: ["production", "staging"]},
+                None,
+            ),
+        ]
+
+        results = self.db.get_many(
+            [
+                TSDBRequest(method, model, keys, dts[0], dts[-1], 3600, environment_ids)
+                for method, model, keys, environment_ids in requests
+            ]
+        )
+
+        assert results == [
+            self.db.get_range(model, keys, dts[0], dts[-1], 3600, environment_ids=environment_ids)
+            if method == "get_range"
+            else getattr(self.db, method)(model, keys, dts[0], dts[-1], rollup=3600)
+            for method, model, keys, environment_ids in requests
+        ]
+        assert results[2] == {1: 2, 2: 2}
+        assert results[4] == {1: 2, 2: 1}
+        assert results[7] == {1: {"production": 2.0, "staging": 1.0}}
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC)
         model = TSDBModel.frequent_issues_by_project
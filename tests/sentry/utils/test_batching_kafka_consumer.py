@@ -0,0 +1,184 @@
+from __future__ import absolute_import
+
+import threading
+
+import pytest
+from confluent_kafka import TopicPartition
+
+from sentry.utils.batching_kafka_consumer import (
+    AbstractBatchWorker,
+    ParallelBatchingKafkaConsumer,
+)
+from sentry.utils.compat import mock
+
+
+class FakeMessage(object):
+    def __init__(self, topic, partition, offset, value):
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._value = value
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return None
+
+
+class FakeConsumer(object):
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.commits = []
+        self.paused = []
+        self.resumed = []
+
+    def poll(self, timeout=None):
+        if self.messages:
+            return self.messages.pop(0)
+
+    def commit(self, offsets=None, asynchronous=True):
+        self.commits.append(sorted((tp.topic, tp.partition, tp.offset) for tp in offsets))
+        return offsets
+
+    def pause(self, partitions):
+        self.paused.append(sorted((tp.topic, tp.partition) for tp in partitions))
+
+    def resume(self, partitions):
+        self.resumed.append(sorted((tp.topic, tp.partition) for tp in partitions))
+
+    def close(self):
+        pass
+
+
+class RecordingWorker(AbstractBatchWorker):
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def process_message(self, message):
+        return (message.partition(), message.value())
+
+    def flush_batch(self, batch):
+        if any(value == "fail" for _, value in batch):
+            raise ValueError("flush failed")
+        with self.lock:
+            self.batches.append(list(batch))
+
+    def shutdown(self):
+        pass
+
+
+def create_consumer(messages, **kwargs):
+    fake_consumer = FakeConsumer(messages)
+    with mock.patch.object(
+        ParallelBatchingKafkaConsumer, "create_consumer", return_value=fake_consumer
+    ):
+        consumer = ParallelBatchingKafkaConsumer(
+            topics=["events"],
+            worker=RecordingWorker(),
+            max_batch_size=2,
+            max_batch_time=100000,
+            cluster_name="default",
+            group_id="test",
+            concurrency=4,
+            **kwargs
+        )
+    return consumer, fake_consumer
+
+
+def test_parallel_consumer_preserves_partition_order():
+    messages = [FakeMessage("events", i % 2, i // 2, i) for i in range(10)]
+    consumer, fake_consumer = create_consumer(messages)
+
+    for _ in range(10):
+        consumer._run_once()
+    consumer._flush(force=True)
+
+    flushed = [item for batch in consumer.worker.batches for item in batch]
+    for partition in (0, 1):
+        values = [value for p, value in flushed if p == partition]
+        assert values == list(range(partition, 10, 2))
+
+    # Offsets are committed past the last message of every partition.
+    assert fake_consumer.commits[-1] == [("events", 0, 5), ("events", 1, 5)]
+
+
+def test_parallel_consumer_does_not_commit_failed_batches():
+    messages = [
+        FakeMessage("events", 0, 0, "ok"),
+        FakeMessage("events", 0, 1, "ok"),
+        FakeMessage("events", 1, 0, "fail"),
+        FakeMessage("events", 1, 1, "ok"),
+    ]
+    consumer, fake_consumer = create_consumer(messages)
+
+    for _ in range(4):
+        consumer._run_once()
+
+    with pytest.raises(ValueError):
+        consumer._flush(force=True)
+
+    for offsets in fake_consumer.commits:
+        assert ("events", 1) not in [(topic, partition) for topic, partition, _ in offsets]
+
+
+def test_parallel_consumer_pauses_partitions_with_backlog():
+    messages = [FakeMessage("events", 0, i, i) for i in range(3)]
+    consumer, fake_consumer = create_consumer(messages, max_pending_messages=2)
+
+    block = threading.Event()
+    flush_batch = consumer.worker.flush_batch
+
+    def blocking_flush_batch(batch):
+        block.wait()
+        flush_batch(batch)
+
+    consumer.worker.flush_batch = blocking_flush_batch
+
+    for _ in range(4):
+        consumer._run_once()
+    assert fake_consumer.paused == [[("events", 0)]]
+
+    block.set()
+    consumer._flush(force=True)
+    assert fake_consumer.resumed == [[("events", 0)]]
+    assert fake_consumer.commits[-1] == [("events", 0, 3)]
+
+
+def test_parallel_consumer_forgets_paused_partitions_on_rebalance():
+    messages = [FakeMessage("events", 0, i, i) for i in range(3)]
+    consumer, fake_consumer = create_consumer(messages, max_pending_messages=2)
+
+    block = threading.Event()
+    flush_batch = consumer.worker.flush_batch
+
+    def blocking_flush_batch(batch):
+        block.wait()
+        flush_batch(batch)
+
+    consumer.worker.flush_batch = blocking_flush_batch
+
+    for _ in range(4):
+        consumer._run_once()
+    assert fake_consumer.paused == [[("events", 0)]]
+
+    # The revoked partition is flushed, but not resumed.
+    block.set()
+    consumer._on_partitions_revoked([TopicPartition("events", 0)])
+    assert fake_consumer.commits[-1] == [("events", 0, 3)]
+    assert fake_consumer.resumed == []
+
+    # Once assigned again, it is not resumed later on either.
+    consumer._on_partitions_assigned([TopicPartition("events", 0)])
+    consumer._flush(force=True)
+    assert fake_consumer.resumed == []
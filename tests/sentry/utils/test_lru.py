@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+
+from sentry.utils.compat import mock
+from sentry.utils.lru import LRUCache
+
+
+def test_get_and_set():
+    cache = LRUCache(max_size=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_empty_cache_is_truthy():
+    cache = LRUCache(max_size=10)
+    assert len(cache) == 0
+    assert cache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_size=10, sizeof=len)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.set("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b", "c"]) == {"a": b"aaaa", "c": b"cccc"}
+    assert cache.size == 8
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_skips_oversized_values():
+    cache = LRUCache(max_size=4, sizeof=len)
+    cache.set("a", b"aa")
+    cache.set("b", b"bbbbbb")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aa"
+
+
+def test_replaces_existing_value():
+    cache = LRUCache(max_size=10, sizeof=len)
+    cache.set("a", b"aaaa")
+    cache.set("a", b"aa")
+    assert cache.size == 2
+    assert len(cache) == 1
+
+
+def test_expires():
+    cache = LRUCache(max_size=10, ttl=60)
+    with mock.patch("sentry.utils.lru.time", return_value=1000):
+        cache.set("a", 1)
+    with mock.patch("sentry.utils.lru.time", return_value=1059):
+        assert cache.get("a") == 1
+    with mock.patch("sentry.utils.lru.time", return_value=1061):
+        assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_delete():
+    cache = LRUCache(max_size=10)
+    cache.set_many({"a": 1, "b": 2, "c": 3})
+    cache.delete("a")
+    cache.delete_many(["b"])
+    assert cache.get_many(["a", "b", "c"]) == {"c": 3}
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
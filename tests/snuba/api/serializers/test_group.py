@@ -385,3 +385,30 @@ class StreamGroupSerializerTestCase(APITestCase, SnubaTestCase):
             assert get_range.call_count == 1
             for args, kwargs in get_range.call_args_list:
                 assert kwargs["environment_ids"] is None
+
+    def test_fields(self):
+        group = self.group
+        serializer = StreamGroupSerializerSnuba(stats_period="14d", fields=["count", "stats"])
+
+        with mock.patch(
+            "sentry.api.serializers.models.group.snuba_tsdb.get_range",
+            side_effect=snuba_tsdb.get_range,
+        ) as get_range:
+            result = serialize([group], self.user, serializer=serializer)[0]
+            assert get_range.call_count == 1
+
+        assert set(result) == {"id", "count", "stats"}
+        assert set(serializer.loader_timings) == {"seen_stats", "stats"}
+
+    def test_fields_without_stats(self):
+        serializer = StreamGroupSerializerSnuba(stats_period="14d", fields=["isBookmarked"])
+
+        with mock.patch(
+            "sentry.api.serializers.models.group.snuba_tsdb.get_range",
+            side_effect=snuba_tsdb.get_range,
+        ) as get_range:
+            result = serialize([self.group], self.user, serializer=serializer)[0]
+            assert get_range.call_count == 0
+
+        assert result == {"id": six.text_type(self.group.id), "isBookmarked": False}
+        assert set(serializer.loader_timings) == {"bookmarks"}
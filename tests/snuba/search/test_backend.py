@@ -5,6 +5,7 @@ from sentry.utils.compat import mock
 import pytz
 from datetime import datetime, timedelta
 from django.utils import timezone
+from freezegun import freeze_time
 from hashlib import md5
 
 from sentry import options
@@ -548,6 +549,54 @@ class EventsSnubaSearchTest(TestCase, SnubaTestCase):
                 assert results.prev.has_results
                 assert not results.next.has_results
 
+    def test_pagination_ranking_cache(self):
+        with self.options({"snuba.search.ranking-cache-ttl": 60}):
+            results = self.backend.query([self.project], limit=1, sort_by="freq", count_hits=True)
+            assert list(results) == [self.group1]
+            assert results.hits == 2
+            assert results.next.has_results
+
+            # The following pages are served from the cached ranking.
+            with mock.patch("sentry.utils.snuba.raw_query") as query_mock:
+                results = self.backend.query(
+                    [self.project], cursor=results.next, limit=1, sort_by="freq"
+                )
+                assert list(results) == [self.group2]
+                assert results.prev.has_results
+                assert not results.next.has_results
+
+                results = self.backend.query(
+                    [self.project], cursor=results.prev, limit=1, sort_by="freq"
+                )
+                assert list(results) == [self.group1]
+                assert not query_mock.called
+
+    def test_pagination_ranking_cache_relative_dates(self):
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        with self.options({"snuba.search.ranking-cache-ttl": 60}), freeze_time(now) as frozen:
+            results = self.backend.query(
+                [self.project],
+                limit=1,
+                sort_by="freq",
+                date_from=timezone.now() - timedelta(days=30),
+                date_to=timezone.now(),
+            )
+            assert list(results) == [self.group1]
+
+            # A later request for the same relative range reuses the ranking.
+            frozen.tick(timedelta(seconds=30, microseconds=123))
+            with mock.patch("sentry.utils.snuba.raw_query") as query_mock:
+                results = self.backend.query(
+                    [self.project],
+                    cursor=results.next,
+                    limit=1,
+                    sort_by="freq",
+                    date_from=timezone.now() - timedelta(days=30),
+                    date_to=timezone.now(),
+                )
+                assert list(results) == [self.group2]
+                assert not query_mock.called
+
     def test_pagination_with_environment(self):
         for dt in [
             self.group1.first_seen + timedelta(days=1),